@@ -0,0 +1,169 @@
+"""
+Nutrition cache warm-up for fresh deployments.
+
+Collects every distinct ingredient from ni-recipes.json, the DIY page's food
+lists and the fallback table, then pre-resolves them into the nutrition
+lookup cache at a bounded request rate.
+
+Usage:
+    python cache_warmup.py --rate 4
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from fallback_nutrition import FALLBACK_NUTRITION_DB
+from ingredient_resolution import get_resolution_store
+from nutrition_lookup import (
+    canonicalize_ingredient,
+    get_cached_nutrition,
+    lookup_ingredient,
+    save_lookup_cache
+)
+
+DEFAULT_RECIPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ni-recipes.json')
+
+# Most recent warm-up report, for display in the app
+LAST_WARMUP_REPORT = {}
+
+
+class RateLimiter:
+    """Spaces calls so no more than `rate` start per second across threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def collect_recipe_ingredients(recipes_path: str = DEFAULT_RECIPES_PATH) -> List[str]:
+    """Ingredient names from the recipe file"""
+    if not os.path.exists(recipes_path):
+        return []
+    with open(recipes_path, 'r') as f:
+        recipes = json.load(f)
+    return [ingredient.get('item', '') for recipe in recipes for ingredient in recipe.get('ingredients', [])]
+
+
+def collect_food_list_names() -> List[str]:
+    """Food names from the DIY page's common food lists"""
+    from food_catalog import get_food_options, COMMON_VEGETABLE_SOURCES, COMMON_FRUIT_SOURCES
+
+    protein_sources, carb_sources, fat_sources = get_food_options()
+    food_lists = protein_sources + carb_sources + fat_sources + COMMON_VEGETABLE_SOURCES + COMMON_FRUIT_SOURCES
+    return [food['name'] for food in food_lists]
+
+
+def collect_warmup_ingredients(recipes_path: str = DEFAULT_RECIPES_PATH) -> List[str]:
+    """
+    One spelling per distinct canonical ingredient from every warm-up source, in first-seen order
+
+    The first spelling seen is kept: a canonical key sorts the words ("butter
+    peanut"), which would search FDC and the fallback table for the wrong food.
+    """
+    names = collect_recipe_ingredients(recipes_path) + collect_food_list_names() + list(FALLBACK_NUTRITION_DB.keys())
+
+    seen = set()
+    ingredients = []
+    for name in names:
+        key = canonicalize_ingredient(name)
+        if key and key not in seen:
+            seen.add(key)
+            ingredients.append(name)
+    return ingredients
+
+
+def warm_nutrition_cache(ingredients: Optional[Iterable[str]] = None,
+                         max_rate: float = 4.0,
+                         max_workers: int = 4,
+                         persist: bool = True) -> Dict:
+    """
+    Pre-resolve ingredients into the nutrition lookup cache
+
+    Parameters:
+    - ingredients: Ingredients to resolve; defaults to collect_warmup_ingredients()
+    - max_rate: Maximum FDC requests started per second
+    - max_workers: Concurrent lookups
+    - persist: Save the cache to disk when done
+
+    Returns:
+    - Report with counts, FDC coverage and elapsed seconds
+    """
+    global LAST_WARMUP_REPORT
+
+    start_time = time.perf_counter()
+    ingredients = list(ingredients) if ingredients is not None else collect_warmup_ingredients()
+
+    already_cached = [name for name in ingredients if get_cached_nutrition(name) is not None]
+    pending = [name for name in ingredients if get_cached_nutrition(name) is None]
+
+    limiter = RateLimiter(max_rate)
+
+    def resolve(name):
+        limiter.wait()
+        return lookup_ingredient(name)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        records = list(executor.map(resolve, pending))
+
+    if persist:
+        save_lookup_cache()
+        get_resolution_store().flush()
+
+    sources = [record['source'] for record in records]
+    cached_sources = [get_cached_nutrition(name) for name in ingredients]
+    fdc_total = sum(1 for record in cached_sources if record and record['source'] == 'fdc')
+
+    report = {
+        'total': len(ingredients),
+        'already_cached': len(already_cached),
+        'resolved': len(records),
+        'resolved_fdc': sources.count('fdc'),
+        'resolved_fallback': sources.count('fallback'),
+        'uncached': sum(1 for record in cached_sources if record is None),
+        'fdc_coverage': fdc_total / len(ingredients) if ingredients else 0.0,
+        'elapsed_seconds': round(time.perf_counter() - start_time, 2)
+    }
+    LAST_WARMUP_REPORT = report
+    return report
+
+
+def start_background_warmup(**kwargs) -> threading.Thread:
+    """Run warm_nutrition_cache in a daemon thread (call once at startup)"""
+    thread = threading.Thread(target=warm_nutrition_cache, kwargs=kwargs, name='nutrition-cache-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the nutrition lookup cache")
+    parser.add_argument('--recipes', default=DEFAULT_RECIPES_PATH, help="Path to ni-recipes.json")
+    parser.add_argument('--rate', type=float, default=4.0, help="Maximum FDC requests per second")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent lookups")
+    args = parser.parse_args()
+
+    ingredients = collect_warmup_ingredients(args.recipes)
+    print(f"Warming {len(ingredients)} distinct ingredients at <= {args.rate:g} req/s...")
+    report = warm_nutrition_cache(ingredients, max_rate=args.rate, max_workers=args.workers)
+
+    print(f"Resolved {report['resolved']} ({report['resolved_fdc']} FDC, {report['resolved_fallback']} fallback), "
+          f"{report['already_cached']} already cached, {report['uncached']} left uncached")
+    print(f"FDC coverage: {report['fdc_coverage']:.1%}")
+    print(f"Elapsed: {report['elapsed_seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Hot reload for the food and recipe catalogs without restarting the server.
+
+A daemon thread polls the catalog sources (common foods database, recipe
+database, fallback tables, ni-recipes.json). When a file's content hash
+changes, the next generation is built off to the side: fresh copies of the
+changed modules, the food catalog, fallback store, search index and spelling
+index. Only then is it swapped in under a new version number. Reruns that
+already hold the previous objects keep using them, and no request waits on
+a rebuild.
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import fallback_nutrition
+import food_catalog
+import food_search_index
+import spelling_index
+from cache_warmup import DEFAULT_RECIPES_PATH
+
+# Watched modules; a changed copy replaces the module for later reruns' imports
+WATCHED_MODULES = ['common_foods_database', 'recipe_database', 'fallback_nutrition']
+RECIPES_SOURCE = 'ni-recipes'
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+def watched_paths() -> Dict[str, str]:
+    """Source file for every watched source present in this deployment"""
+    paths = {}
+    for name in WATCHED_MODULES:
+        spec = importlib.util.find_spec(name)
+        if spec is not None and spec.origin and os.path.exists(spec.origin):
+            paths[name] = spec.origin
+    if os.path.exists(DEFAULT_RECIPES_PATH):
+        paths[RECIPES_SOURCE] = DEFAULT_RECIPES_PATH
+    return paths
+
+
+def file_fingerprint(path: str, previous: Optional[Tuple] = None) -> Tuple[int, int, str]:
+    """(mtime_ns, size, sha1 of the content); the file is only re-hashed when mtime or size moved"""
+    stat = os.stat(path)
+    if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+        return previous
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return stat.st_mtime_ns, stat.st_size, digest
+
+
+def load_module_copy(name: str):
+    """Execute a module's current source into a new module object, without touching sys.modules"""
+    spec = importlib.util.find_spec(name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CatalogSnapshot:
+    """One consistent generation of the catalogs and the indexes built from them (read-only)"""
+
+    def __init__(self, version: int, fingerprints: Dict, catalog, fallback_store, search_index, spell_index,
+                 modules: Optional[Dict] = None):
+        self.version = version
+        self.fingerprints = fingerprints
+        self.catalog = catalog
+        self.fallback_store = fallback_store
+        self.search_index = search_index
+        self.spelling_index = spell_index
+        self.modules = modules or {}
+        self.built_at = time.time()
+
+
+def build_snapshot(version: int, fingerprints: Dict, changed: Set[str]) -> CatalogSnapshot:
+    """
+    Build a generation, reusing the current objects for sources that did not change
+
+    With no changes this just collects (and warms up) the shared catalogs and indexes.
+    """
+    modules = {name: load_module_copy(name) for name in WATCHED_MODULES if name in changed}
+
+    if 'common_foods_database' in modules:
+        catalog = food_catalog.build_food_catalog(modules['common_foods_database'].get_food_by_category)
+        search_index = food_search_index.build_food_search_index(catalog)
+    else:
+        catalog = food_catalog.get_food_catalog()
+        search_index = food_search_index.get_food_search_index()
+
+    if 'fallback_nutrition' in modules:
+        fallback_store = modules['fallback_nutrition'].FALLBACK_STORE
+    else:
+        fallback_store = fallback_nutrition.FALLBACK_STORE
+
+    # The vocabulary spans the foods, the fallback table and the recipes
+    if changed:
+        spell_index = spelling_index.SpellingIndex(spelling_index.collect_vocabulary(catalog=catalog, fallback_store=fallback_store))
+    else:
+        spell_index = spelling_index.get_spelling_index()
+
+    return CatalogSnapshot(version, fingerprints, catalog, fallback_store, search_index, spell_index, modules)
+
+
+class CatalogManager:
+    """
+    Watches the catalog sources and swaps in rebuilt generations
+
+    Parameters:
+    - sources: callable returning {source name: path} to watch (default: watched_paths)
+    - builder: callable (version, fingerprints, changed names) -> CatalogSnapshot
+      (default: build_snapshot)
+    """
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL, sources=watched_paths, builder=build_snapshot):
+        self.poll_interval = poll_interval
+        self.sources = sources
+        self.builder = builder
+        self.last_error = None
+        self._snapshot = None
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Current generation (None until the first build); hold on to it for a consistent rerun"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else 0
+
+    def check(self) -> bool:
+        """
+        Rebuild and swap if any source's content changed
+
+        Returns:
+        - True when a new generation was installed
+        """
+        with self._lock:
+            fingerprints = {name: file_fingerprint(path, self._fingerprints.get(name))
+                            for name, path in self.sources().items()}
+            changed = {name for name, fingerprint in fingerprints.items()
+                       if name not in self._fingerprints or self._fingerprints[name][2] != fingerprint[2]}
+            first_build = self._snapshot is None
+            self._fingerprints = fingerprints
+            if not first_build and not changed:
+                return False
+
+            # A broken edit keeps the previous generation until the file changes again
+            try:
+                snapshot = self.builder(self.version + 1, fingerprints, set() if first_build else changed)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+
+            self._install(snapshot)
+            self.last_error = None
+            return True
+
+    def _install(self, snapshot: CatalogSnapshot):
+        # The module getters serve one-off lookups and can briefly straddle two
+        # generations while they are set; pages read everything from the snapshot,
+        # which is swapped in with one assignment
+        food_catalog.set_food_catalog(snapshot.catalog)
+        fallback_nutrition.set_fallback_store(snapshot.fallback_store)
+        food_search_index.set_food_search_index(snapshot.search_index)
+        spelling_index.set_spelling_index(snapshot.spelling_index)
+
+        # fallback_nutrition stays loaded (its functions are imported by name) and only gets the new store
+        for name, module in snapshot.modules.items():
+            if name != 'fallback_nutrition':
+                sys.modules[name] = module
+        self._snapshot = snapshot
+
+    def _run(self):
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def start(self) -> threading.Thread:
+        """Start the watcher thread (the first pass builds the current generation)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='catalog-watcher', daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_catalog_manager() -> CatalogManager:
+    """Process-wide catalog manager"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CatalogManager()
+        return _manager
+
+
+def start_catalog_watcher(poll_interval: float = DEFAULT_POLL_INTERVAL) -> CatalogManager:
+    """Start watching the catalog sources (call once per server process)"""
+    manager = get_catalog_manager()
+    manager.poll_interval = poll_interval
+    manager.start()
+    return manager
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Current catalog generation; read it once per rerun and pass it down
+
+    Builds the first generation if the watcher hasn't yet.
+    """
+    manager = get_catalog_manager()
+    snapshot = manager.snapshot()
+    if snapshot is None:
+        manager.check()
+        snapshot = manager.snapshot()
+    return snapshot
@@ -0,0 +1,257 @@
+"""
+Shared fallback nutrition store (per 100g) used when FDC lookups fail.
+
+The table, the substring automaton and the category keyword rules are
+compiled once at import so every page resolves ingredients the same way.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fallback nutrition per 100g, in priority order (earlier keys win ties)
+FALLBACK_NUTRITION_DB = {
+    # Proteins
+    'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
+    'chicken': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
+    'ground turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
+    'turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
+    'salmon': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
+    'fish': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
+    'eggs': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
+    'egg': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
+    'greek yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
+    'yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
+    'cottage cheese': {'calories': 98, 'protein': 11, 'carbs': 3.4, 'fat': 4.3},
+    'cheese': {'calories': 113, 'protein': 7, 'carbs': 1, 'fat': 9},
+    'tofu': {'calories': 76, 'protein': 8, 'carbs': 1.9, 'fat': 4.8},
+    'beef': {'calories': 250, 'protein': 26, 'carbs': 0, 'fat': 15},
+    'pork': {'calories': 242, 'protein': 27, 'carbs': 0, 'fat': 14},
+
+    # Carbs
+    'brown rice': {'calories': 123, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
+    'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3},
+    'quinoa': {'calories': 120, 'protein': 4.4, 'carbs': 22, 'fat': 1.9},
+    'oats': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
+    'oatmeal': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
+    'sweet potato': {'calories': 86, 'protein': 1.6, 'carbs': 20, 'fat': 0.1},
+    'potato': {'calories': 77, 'protein': 2, 'carbs': 17, 'fat': 0.1},
+    'bread': {'calories': 265, 'protein': 9, 'carbs': 49, 'fat': 3.2},
+    'pasta': {'calories': 131, 'protein': 5, 'carbs': 25, 'fat': 1.1},
+    'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3},
+    'apple': {'calories': 52, 'protein': 0.3, 'carbs': 14, 'fat': 0.2},
+    'berries': {'calories': 57, 'protein': 0.7, 'carbs': 14, 'fat': 0.3},
+
+    # Vegetables
+    'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4},
+    'spinach': {'calories': 23, 'protein': 2.9, 'carbs': 3.6, 'fat': 0.4},
+    'kale': {'calories': 35, 'protein': 2.9, 'carbs': 4.4, 'fat': 1.5},
+    'lettuce': {'calories': 15, 'protein': 1.4, 'carbs': 2.9, 'fat': 0.2},
+    'tomato': {'calories': 18, 'protein': 0.9, 'carbs': 3.9, 'fat': 0.2},
+    'cucumber': {'calories': 16, 'protein': 0.7, 'carbs': 4, 'fat': 0.1},
+    'bell pepper': {'calories': 31, 'protein': 1, 'carbs': 7, 'fat': 0.3},
+    'carrot': {'calories': 41, 'protein': 0.9, 'carbs': 10, 'fat': 0.2},
+    'onion': {'calories': 40, 'protein': 1.1, 'carbs': 9.3, 'fat': 0.1},
+
+    # Fats
+    'avocado': {'calories': 160, 'protein': 2, 'carbs': 9, 'fat': 15},
+    'almonds': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
+    'nuts': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
+    'walnuts': {'calories': 654, 'protein': 15, 'carbs': 14, 'fat': 65},
+    'olive oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
+    'oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
+    'butter': {'calories': 717, 'protein': 0.9, 'carbs': 0.1, 'fat': 81},
+    'peanut butter': {'calories': 588, 'protein': 25, 'carbs': 20, 'fat': 50},
+    'seeds': {'calories': 486, 'protein': 19, 'carbs': 23, 'fat': 42}
+}
+
+# Category keyword rules, checked in order when no table key matches
+FALLBACK_CATEGORY_RULES = [
+    (['meat', 'protein', 'chicken', 'beef', 'fish'], {'calories': 200, 'protein': 25, 'carbs': 0, 'fat': 10}),
+    (['vegetable', 'veggie', 'green'], {'calories': 25, 'protein': 2, 'carbs': 5, 'fat': 0.2}),
+    (['fruit', 'berry'], {'calories': 50, 'protein': 0.5, 'carbs': 12, 'fat': 0.2}),
+    (['grain', 'cereal', 'carb'], {'calories': 120, 'protein': 3, 'carbs': 25, 'fat': 1}),
+    (['fat', 'oil', 'nut'], {'calories': 600, 'protein': 15, 'carbs': 10, 'fat': 55})
+]
+
+# Default when nothing matches
+DEFAULT_FALLBACK_NUTRITION = {'calories': 150, 'protein': 8, 'carbs': 15, 'fat': 5}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting every keyword found in a text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for keyword in keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        """Insert a keyword into the trie"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(len(self.keywords))
+        self.keywords.append(keyword)
+
+    def _build_failure_links(self):
+        """Breadth-first pass computing failure links and merged outputs"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """Return (keyword_index, end_position) for every keyword occurrence"""
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword_index in self._output[state]:
+                matches.append((keyword_index, position))
+        return matches
+
+    def matched_indices(self, text: str) -> set:
+        """Return the set of keyword indices that occur in text"""
+        return {keyword_index for keyword_index, _ in self.find_all(text)}
+
+
+class FallbackNutritionStore:
+    """Compiled fallback lookup: exact hash, substring automaton, category rules"""
+
+    def __init__(self, table: Dict[str, Dict], category_rules: List, default: Dict):
+        self.table = {key.lower(): nutrition for key, nutrition in table.items()}
+        self.default = default
+        self._keys = list(self.table.keys())
+
+        # Keys contained in the ingredient (longest match wins)
+        self._key_automaton = KeywordAutomaton(self._keys)
+
+        # Ingredient contained in a key: every substring of every key maps to its first key
+        self._key_substrings = {}
+        for key in self._keys:
+            for start in range(len(key)):
+                for end in range(start + 1, len(key) + 1):
+                    self._key_substrings.setdefault(key[start:end], key)
+
+        # Category keywords, each tagged with its rule index
+        self._rule_nutrition = [nutrition for _, nutrition in category_rules]
+        rule_keywords = []
+        self._keyword_rule = []
+        for rule_index, (words, _) in enumerate(category_rules):
+            for word in words:
+                rule_keywords.append(word)
+                self._keyword_rule.append(rule_index)
+        self._rule_automaton = KeywordAutomaton(rule_keywords)
+
+    def _resolve(self, ingredient: str) -> Tuple[Dict, Optional[str], str]:
+        """Return (nutrition, matched label, match type) for an ingredient"""
+        ingredient_lower = (ingredient or '').lower().strip()
+        if not ingredient_lower:
+            return self.default, None, 'default'
+
+        # First try exact matches
+        if ingredient_lower in self.table:
+            return self.table[ingredient_lower], ingredient_lower, 'exact'
+
+        # Then keys contained in the ingredient, preferring the longest key
+        key_hits = self._key_automaton.matched_indices(ingredient_lower)
+        if key_hits:
+            key = self._keys[min(key_hits, key=lambda i: (-len(self._keys[i]), i))]
+            return self.table[key], key, 'substring'
+
+        # Then the ingredient contained in a key
+        containing_key = self._key_substrings.get(ingredient_lower)
+        if containing_key:
+            return self.table[containing_key], containing_key, 'substring'
+
+        # Category keyword rules, in rule order
+        rule_hits = self._rule_automaton.matched_indices(ingredient_lower)
+        if rule_hits:
+            keyword_index = min(rule_hits, key=lambda i: (self._keyword_rule[i], i))
+            rule_index = self._keyword_rule[keyword_index]
+            return self._rule_nutrition[rule_index], self._rule_automaton.keywords[keyword_index], 'category'
+
+        return self.default, None, 'default'
+
+    def match(self, ingredient: str) -> Tuple[Optional[str], str]:
+        """
+        Resolve an ingredient to its fallback entry
+
+        Returns:
+        - (matched key or rule keyword, match type) where match type is
+          'exact', 'substring', 'category' or 'default'
+        """
+        _, matched, match_type = self._resolve(ingredient)
+        return matched, match_type
+
+    def lookup(self, ingredient: str) -> Dict:
+        """Return fallback nutrition per 100g for an ingredient"""
+        nutrition, _, _ = self._resolve(ingredient)
+        return dict(nutrition)
+
+    def lookup_many(self, ingredients: Iterable[str]) -> Dict[str, Dict]:
+        """Return fallback nutrition per 100g for each distinct ingredient"""
+        results = {}
+        for ingredient in ingredients:
+            if ingredient not in results:
+                results[ingredient] = self.lookup(ingredient)
+        return results
+
+
+FALLBACK_STORE = FallbackNutritionStore(FALLBACK_NUTRITION_DB, FALLBACK_CATEGORY_RULES, DEFAULT_FALLBACK_NUTRITION)
+
+
+def set_fallback_store(store: FallbackNutritionStore):
+    """Swap in a rebuilt store; the lookups below read FALLBACK_STORE on every call"""
+    global FALLBACK_STORE
+    FALLBACK_STORE = store
+
+
+def get_fallback_per_100g(ingredient: str) -> Dict:
+    """Fallback nutrition per 100g for a single ingredient"""
+    return FALLBACK_STORE.lookup(ingredient)
+
+
+def get_fallback_per_100g_batch(ingredients: Iterable[str]) -> Dict[str, Dict]:
+    """Fallback nutrition per 100g for a batch of ingredients, keyed by ingredient"""
+    return FALLBACK_STORE.lookup_many(ingredients)
+
+
+def get_fallback_for_amount(ingredient_name: str, amount_grams: float) -> Dict:
+    """Fallback nutrition scaled to an amount, in the pages' ingredient format"""
+    base_nutrition = FALLBACK_STORE.lookup(ingredient_name)
+    scaling_factor = amount_grams / 100
+
+    return {
+        'name': ingredient_name,
+        'amount': f"{amount_grams}g",
+        'calories': round(base_nutrition['calories'] * scaling_factor, 1),
+        'protein': round(base_nutrition['protein'] * scaling_factor, 1),
+        'carbs': round(base_nutrition['carbs'] * scaling_factor, 1),
+        'fat': round(base_nutrition['fat'] * scaling_factor, 1),
+        'fdc_verified': False
+    }
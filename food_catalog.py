@@ -0,0 +1,141 @@
+"""
+Food source lists shared by the DIY meal planning page and offline tools.
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from common_foods_database import get_food_by_category
+
+CATALOG_CATEGORIES = ['proteins', 'carbs', 'fats', 'vegetables', 'fruits']
+MACRO_KEYS = ['calories', 'protein', 'carbs', 'fat']
+
+COMMON_VEGETABLE_SOURCES = [
+    {"name": "Broccoli", "calories": 34, "protein": 2.8, "carbs": 7, "fat": 0.4},
+    {"name": "Spinach", "calories": 23, "protein": 2.9, "carbs": 3.6, "fat": 0.4},
+    {"name": "Kale", "calories": 49, "protein": 4.3, "carbs": 8.8, "fat": 0.9},
+    {"name": "Bell Peppers", "calories": 20, "protein": 0.9, "carbs": 4.6, "fat": 0.2},
+    {"name": "Carrots", "calories": 41, "protein": 0.9, "carbs": 9.6, "fat": 0.2},
+    {"name": "Cauliflower", "calories": 25, "protein": 1.9, "carbs": 5, "fat": 0.3},
+    {"name": "Zucchini", "calories": 17, "protein": 1.2, "carbs": 3.1, "fat": 0.3},
+    {"name": "Asparagus", "calories": 20, "protein": 2.2, "carbs": 3.9, "fat": 0.2},
+    {"name": "Tomatoes", "calories": 18, "protein": 0.9, "carbs": 3.9, "fat": 0.2},
+    {"name": "Mixed Greens", "calories": 17, "protein": 1.2, "carbs": 3.3, "fat": 0.2}
+]
+
+COMMON_FRUIT_SOURCES = [
+    {"name": "Apple", "calories": 52, "protein": 0.3, "carbs": 14, "fat": 0.2},
+    {"name": "Banana", "calories": 89, "protein": 1.1, "carbs": 22.8, "fat": 0.3},
+    {"name": "Blueberries", "calories": 57, "protein": 0.7, "carbs": 14.5, "fat": 0.3},
+    {"name": "Strawberries", "calories": 32, "protein": 0.7, "carbs": 7.7, "fat": 0.3},
+    {"name": "Orange", "calories": 47, "protein": 0.9, "carbs": 11.8, "fat": 0.1},
+    {"name": "Grapefruit", "calories": 32, "protein": 0.6, "carbs": 8, "fat": 0.1},
+    {"name": "Grapes", "calories": 67, "protein": 0.6, "carbs": 17.2, "fat": 0.4},
+    {"name": "Pineapple", "calories": 50, "protein": 0.5, "carbs": 13.1, "fat": 0.1},
+    {"name": "Mango", "calories": 60, "protein": 0.8, "carbs": 15, "fat": 0.4},
+    {"name": "Kiwi", "calories": 61, "protein": 1.1, "carbs": 14.7, "fat": 0.5}
+]
+
+
+def get_food_options(get_foods=get_food_by_category):
+    """Get food options from local database (get_foods: a database's get_food_by_category)"""
+    proteins = get_foods("proteins")
+    carbs = get_foods("carbs")
+    fats = get_foods("fats")
+
+    # Convert to list format needed by optimizer
+    protein_sources = [{"name": name, **nutrition} for name, nutrition in proteins.items()]
+    carb_sources = [{"name": name, **nutrition} for name, nutrition in carbs.items()]
+    fat_sources = [{"name": name, **nutrition} for name, nutrition in fats.items()]
+
+    return protein_sources, carb_sources, fat_sources
+
+
+class FoodCatalog:
+    """Per-100g macro matrix over the DIY food lists with name and category indexes"""
+
+    def __init__(self, foods_by_category: Dict[str, List[Dict]]):
+        self.foods = []
+        categories = []
+        for category in CATALOG_CATEGORIES:
+            for food in foods_by_category.get(category, []):
+                self.foods.append(food)
+                categories.append(category)
+
+        self.names = [food['name'] for food in self.foods]
+        self.values = np.array([[food.get(macro, 0) for macro in MACRO_KEYS] for food in self.foods],
+                               dtype=np.float64).reshape(len(self.foods), len(MACRO_KEYS))
+        self.values.setflags(write=False)
+
+        # First occurrence wins when a name appears in two categories
+        self.row_index = {}
+        for row, name in enumerate(self.names):
+            self.row_index.setdefault(name, row)
+
+        categories = np.array(categories)
+        self.category_masks = {category: categories == category for category in CATALOG_CATEGORIES}
+        self._category_foods = {category: [self.foods[row] for row in np.flatnonzero(mask)]
+                                for category, mask in self.category_masks.items()}
+
+    def __len__(self):
+        return len(self.foods)
+
+    def category_foods(self, category: str) -> List[Dict]:
+        """Food dicts for one category (shared lists, don't mutate)"""
+        return self._category_foods[category]
+
+    def category_rows(self, category: str) -> np.ndarray:
+        return np.flatnonzero(self.category_masks[category])
+
+    def rows(self, names: Iterable[str]) -> np.ndarray:
+        """Row indices for food names (-1 when not in the catalog)"""
+        return np.array([self.row_index.get(name, -1) for name in names], dtype=np.int64)
+
+    def macro_matrix(self, foods: List[Dict]) -> np.ndarray:
+        """
+        Per-gram macros for foods, shape (4, n_foods)
+
+        Catalog foods are gathered by row; foods from elsewhere (e.g. USDA
+        search results) are read from their dicts.
+        """
+        rows = self.rows(food['name'] for food in foods)
+        values = np.empty((len(foods), len(MACRO_KEYS)))
+        in_catalog = rows >= 0
+        values[in_catalog] = self.values[rows[in_catalog]]
+        for position in np.flatnonzero(~in_catalog):
+            values[position] = [foods[position].get(macro, 0) for macro in MACRO_KEYS]
+        return values.T / 100
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def build_food_catalog(get_foods=get_food_by_category) -> FoodCatalog:
+    """Catalog over a common foods database plus the DIY vegetable and fruit lists"""
+    protein_sources, carb_sources, fat_sources = get_food_options(get_foods)
+    return FoodCatalog({
+        'proteins': protein_sources,
+        'carbs': carb_sources,
+        'fats': fat_sources,
+        'vegetables': COMMON_VEGETABLE_SOURCES,
+        'fruits': COMMON_FRUIT_SOURCES
+    })
+
+
+def get_food_catalog() -> FoodCatalog:
+    """Process-wide food catalog, built on first use and shared by every rerun and session"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = build_food_catalog()
+        return _catalog
+
+
+def set_food_catalog(catalog: FoodCatalog):
+    """Swap in a rebuilt catalog; callers already holding the old one keep using it"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
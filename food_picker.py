@@ -0,0 +1,115 @@
+"""
+Compact food picker for the DIY meal planning page.
+
+Renders only the active category: one searchable multiselect over the
+common foods (with a paginated macro table) or typeahead USDA results,
+instead of a checkbox per food in five always-rendered tabs.
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+import streamlit as st
+
+from food_catalog import FoodCatalog
+from food_search_index import FoodSearchIndex, search_food_suggestions
+from selected_foods import SelectedFoodRegistry
+
+# (label, catalog category, meal_plan key, search placeholder)
+PICKER_CATEGORIES = [
+    ("Protein", 'proteins', 'protein_sources', "e.g. chicken"),
+    ("Carbs", 'carbs', 'carb_sources', "e.g. rice"),
+    ("Fats", 'fats', 'fat_sources', "e.g. avocado"),
+    ("Vegetables", 'vegetables', 'vegetable_sources', "e.g. spinach"),
+    ("Fruits", 'fruits', 'fruit_sources', "e.g. berries")
+]
+
+COMMON_SOURCE = "Common foods"
+SEARCH_SOURCE = "Search USDA Database"
+
+PAGE_SIZE = 10
+
+
+def describe_food(food: Dict) -> str:
+    return f"{food['name']} ({food['protein']}g P, {food['carbs']}g C, {food['fat']}g F)"
+
+
+def macro_table(foods: List[Dict]) -> pd.DataFrame:
+    return pd.DataFrame([{
+        'Food': food['name'],
+        'Calories': f"{food['calories']:.0f} kcal",
+        'Protein': f"{food['protein']:.1f}g",
+        'Carbs': f"{food['carbs']:.1f}g",
+        'Fat': f"{food['fat']:.1f}g"
+    } for food in foods])
+
+
+def pick_foods(label: str, foods: List[Dict], selected: List[str], key: str) -> List[str]:
+    """
+    Searchable multiselect over foods, keeping selections made elsewhere
+
+    Returns:
+    - The category's new selection, in the order foods were picked
+    """
+    foods_by_name = {food['name']: food for food in foods}
+    chosen = st.multiselect(
+        label,
+        list(foods_by_name),
+        default=[name for name in selected if name in foods_by_name],
+        format_func=lambda name: describe_food(foods_by_name[name]),
+        key=key
+    )
+    chosen_set = set(chosen)
+    kept = [name for name in selected if name not in foods_by_name or name in chosen_set]
+    kept_set = set(kept)
+    return kept + [name for name in chosen if name not in kept_set]
+
+
+def render_food_picker(meal_data: Dict, day: str, meal_num: int, registry: SelectedFoodRegistry, catalog: FoodCatalog,
+                       search_index: FoodSearchIndex = None):
+    """
+    Food source picker for one meal; updates meal_data and the selected-food registry in place
+
+    catalog and search_index should come from the same catalog snapshot.
+    """
+    key_prefix = f"picker_{day}_{meal_num}"
+    labels = [label for label, *_ in PICKER_CATEGORIES]
+    active = st.radio("Category", labels, horizontal=True, key=f"{key_prefix}_category")
+    label, category, source_key, placeholder = PICKER_CATEGORIES[labels.index(active)]
+
+    source = st.radio("Source", [COMMON_SOURCE, SEARCH_SOURCE], horizontal=True, key=f"{key_prefix}_{category}_source")
+    selected = list(meal_data[source_key])
+
+    if source == COMMON_SOURCE:
+        foods = catalog.category_foods(category)
+
+        # Paginated reference table; the multiselect itself is searchable
+        if len(foods) > PAGE_SIZE:
+            pages = (len(foods) + PAGE_SIZE - 1) // PAGE_SIZE
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key_prefix}_{category}_page")
+            page_foods = foods[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        else:
+            page_foods = foods
+        with st.expander(f"{label} macros per 100g", expanded=False):
+            st.dataframe(macro_table(page_foods), use_container_width=True, hide_index=True)
+
+        selected = pick_foods(f"Select {label.lower()} foods:", foods, selected, f"{key_prefix}_{category}_common")
+    else:
+        query = st.text_input(f"Search for {label.lower()}:", placeholder=f"Start typing, {placeholder}",
+                              key=f"{key_prefix}_{category}_search")
+        foods = search_food_suggestions(query, category, index=search_index) if query else []
+        if foods:
+            selected = pick_foods(f"Select {label.lower()} from search results:", foods, selected,
+                                  f"{key_prefix}_{category}_results")
+        elif query:
+            st.warning(f"No {label.lower()} found. Try a different search term.")
+
+    foods_by_name = {food['name']: food for food in foods}
+    for name in selected:
+        if name in foods_by_name:
+            registry.add(foods_by_name[name], category)
+    meal_data[source_key] = selected
+
+    # Selections across every category, without rendering the other pickers
+    summary = [f"**{category_label}:** {', '.join(meal_data[key])}" for category_label, _, key, _ in PICKER_CATEGORIES if meal_data[key]]
+    st.caption(" · ".join(summary) if summary else "No foods selected yet.")
@@ -0,0 +1,323 @@
+"""
+Local typeahead search over the DIY food catalog and cached FDC foods.
+
+A prefix trie answers "starts with" queries word by word and a trigram index
+catches misspellings, so suggestions come back in milliseconds while the user
+types. The remote FDC search only runs when the local index has no match, and
+its results are added to the index for the next query.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+import fdc_api
+from fallback_nutrition import KeywordAutomaton
+from food_catalog import CATALOG_CATEGORIES, FoodCatalog, get_food_catalog
+from nutrition_lookup import NUTRIENT_MAPPING, cached_records
+
+CATALOG_SOURCE = 'catalog'
+FDC_SOURCE = 'fdc'
+
+MIN_TRIGRAM_SIMILARITY = 0.3
+MIN_QUERY_LENGTH = 2
+
+# Remote FDC searches: shortest query worth a network call, how long a query's
+# results (empty ones included) are reused, how many queries are remembered and
+# how many remote foods one index takes in
+MIN_REMOTE_QUERY_LENGTH = 3
+REMOTE_CACHE_TTL = 600.0
+REMOTE_CACHE_SIZE = 500
+MAX_REMOTE_FOODS = 2000
+
+# Same name rules the DIY search tabs used for produce
+VEGETABLE_KEYWORDS = ["vegetable", "spinach", "kale", "broccoli", "lettuce", "carrot", "tomato", "cucumber", "pepper", "onion", "garlic"]
+FRUIT_KEYWORDS = ["fruit", "apple", "banana", "orange", "berry", "blueberry", "strawberry", "grape", "melon", "pineapple", "mango"]
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(re.sub(r'[^a-z0-9\s]', ' ', (text or '').lower()).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+_produce_automaton = KeywordAutomaton(VEGETABLE_KEYWORDS + FRUIT_KEYWORDS)
+
+# Dominant energy source -> catalog category
+ENERGY_CATEGORIES = ['proteins', 'carbs', 'fats']
+ENERGY_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+_classified = {}
+_classified_lock = threading.Lock()
+
+
+def classify_foods(foods: List[Dict]) -> List[Set[str]]:
+    """
+    Catalog categories for a batch of normalized foods in one pass
+
+    Produce comes from one keyword automaton over the names; the macro
+    category is the food's dominant energy source.
+    """
+    if not foods:
+        return []
+
+    values = np.array([[food.get(macro, 0) or 0 for macro in ('protein', 'carbs', 'fat')] for food in foods], dtype=float)
+    energy = values * ENERGY_PER_GRAM
+    dominant = np.argmax(energy, axis=1)
+    has_energy = energy.sum(axis=1) > 0
+
+    categories = []
+    for food, macro_index, energetic in zip(foods, dominant, has_energy):
+        food_categories = {ENERGY_CATEGORIES[macro_index]} if energetic else set()
+        for keyword_index in _produce_automaton.matched_indices(food.get('name', '').lower()):
+            food_categories.add('vegetables' if keyword_index < len(VEGETABLE_KEYWORDS) else 'fruits')
+        categories.append(food_categories)
+    return categories
+
+
+def normalize_search_results(results: List[Dict]) -> List[Dict]:
+    """Normalize a page of raw FDC search results: name, fdcId and per-100g macros"""
+    values = np.zeros((len(results), len(NUTRIENT_MAPPING)))
+    columns = {nutrient_id: column for column, nutrient_id in enumerate(NUTRIENT_MAPPING)}
+    for row, result in enumerate(results):
+        for nutrient in result.get('foodNutrients', []):
+            column = columns.get(nutrient.get('nutrientId'))
+            if column is not None:
+                values[row, column] = nutrient.get('value', 0) or 0
+    values = np.round(values, 1)
+
+    return [{
+        'name': result.get('description', ''),
+        'fdcId': result.get('fdcId'),
+        **{macro: float(values[row, column]) for column, macro in enumerate(NUTRIENT_MAPPING.values())}
+    } for row, result in enumerate(results)]
+
+
+def classify_search_results(results: List[Dict]) -> List[Tuple[Dict, Set[str]]]:
+    """
+    (normalized food, categories) for a page of FDC results, cached by fdcId
+
+    One call serves all five DIY tabs.
+    """
+    with _classified_lock:
+        entries = [_classified.get(result.get('fdcId')) for result in results]
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+
+    if missing:
+        foods = normalize_search_results([results[i] for i in missing])
+        for i, entry in zip(missing, zip(foods, classify_foods(foods))):
+            entries[i] = entry
+        with _classified_lock:
+            for i in missing:
+                if results[i].get('fdcId') is not None:
+                    _classified[results[i]['fdcId']] = entries[i]
+    return entries
+
+
+class FoodSearchIndex:
+    """Prefix trie plus trigram postings over food names"""
+
+    def __init__(self):
+        self._foods = []
+        self._names = []
+        self._categories = []
+        self._sources = []
+        self._name_ids = {}
+        self._trie = {}
+        self._trigrams = {}
+        self._remote_foods = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._foods)
+
+    def add(self, food: Dict, categories: Set[str], source: str = CATALOG_SOURCE) -> bool:
+        """Index a food; an already indexed name only gains categories"""
+        with self._lock:
+            return self._add_locked(food, categories, source)
+
+    def add_remote(self, food: Dict, categories: Set[str]) -> bool:
+        """Index a remote search result, up to MAX_REMOTE_FOODS per index"""
+        with self._lock:
+            if self._remote_foods >= MAX_REMOTE_FOODS:
+                return False
+            added = self._add_locked(food, categories, FDC_SOURCE)
+            self._remote_foods += added
+            return added
+
+    def _add_locked(self, food: Dict, categories: Set[str], source: str) -> bool:
+        name = normalize_text(food['name'])
+        if not name:
+            return False
+
+        if name in self._name_ids:
+            self._categories[self._name_ids[name]].update(categories)
+            return False
+
+        food_id = len(self._foods)
+        self._name_ids[name] = food_id
+        self._foods.append(food)
+        self._names.append(name)
+        self._categories.append(set(categories))
+        self._sources.append(source)
+
+        for word in set(name.split()):
+            node = self._trie
+            for char in word:
+                node = node.setdefault(char, {})
+                node.setdefault('', set()).add(food_id)
+        for gram in trigrams(name):
+            self._trigrams.setdefault(gram, set()).add(food_id)
+        return True
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        node = self._trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get('', set())
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """
+        Ranked suggestions for a partial query
+
+        Every query word must prefix a word of the name; fuzzy trigram matches
+        fill the remaining slots. Catalog foods rank ahead of FDC foods.
+        """
+        query = normalize_text(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+
+        with self._lock:
+            words = query.split()
+            prefix_ids = set.intersection(*(self._prefix_ids(word) for word in words))
+
+            scored = []
+            for food_id in prefix_ids:
+                name = self._names[food_id]
+                scored.append((0 if name.startswith(query) else 1, self._sources[food_id] != CATALOG_SOURCE, len(name), food_id))
+
+            if len(scored) < limit:
+                query_grams = trigrams(query)
+                shared = Counter(food_id for gram in query_grams for food_id in self._trigrams.get(gram, ()))
+                for food_id, count in shared.items():
+                    if food_id in prefix_ids:
+                        continue
+                    similarity = count / (len(query_grams) + len(trigrams(self._names[food_id])) - count)
+                    if similarity >= MIN_TRIGRAM_SIMILARITY:
+                        scored.append((2, self._sources[food_id] != CATALOG_SOURCE, -similarity, food_id))
+
+            results = []
+            for *_, food_id in sorted(scored):
+                if category is None or category in self._categories[food_id]:
+                    results.append(self._foods[food_id])
+                    if len(results) == limit:
+                        break
+            return results
+
+
+def build_food_search_index(catalog: Optional[FoodCatalog] = None) -> FoodSearchIndex:
+    """Index the catalog foods by category, then every FDC food in the lookup cache"""
+    index = FoodSearchIndex()
+    catalog = catalog or get_food_catalog()
+    for category in CATALOG_CATEGORIES:
+        for food in catalog.category_foods(category):
+            index.add(food, {category}, CATALOG_SOURCE)
+
+    fdc_foods = [{'name': record['fdc_description'], 'fdcId': record.get('fdc_id'), **record['per_100g']}
+                 for record in cached_records().values() if record['source'] == 'fdc']
+    for food, categories in zip(fdc_foods, classify_foods(fdc_foods)):
+        index.add(food, categories, FDC_SOURCE)
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_food_search_index() -> FoodSearchIndex:
+    """Process-wide search index, built on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = build_food_search_index()
+        return _index
+
+
+def set_food_search_index(index: FoodSearchIndex):
+    """Swap in a rebuilt index; searches already running finish on the old one"""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+_remote_cache = {}
+_remote_cache_lock = threading.Lock()
+
+
+def search_remote_foods(query: str) -> Optional[List[Tuple[Dict, Set[str]]]]:
+    """
+    Classified FDC search results for a query, reused for REMOTE_CACHE_TTL seconds
+
+    Entries are cached per normalized query, empty results included, so every
+    category tab and rerun shares one network call.
+
+    Returns:
+    - (food, categories) pairs, or None when the search failed (not cached)
+    """
+    key = normalize_text(query)
+    now = time.monotonic()
+    with _remote_cache_lock:
+        cached = _remote_cache.get(key)
+    if cached is not None and now - cached[0] < REMOTE_CACHE_TTL:
+        return cached[1]
+
+    try:
+        entries = classify_search_results(fdc_api.search_foods(query) or [])
+    except Exception:
+        return None
+
+    with _remote_cache_lock:
+        _remote_cache.pop(key, None)
+        _remote_cache[key] = (now, entries)
+        # Forget the oldest queries first
+        while len(_remote_cache) > REMOTE_CACHE_SIZE:
+            del _remote_cache[next(iter(_remote_cache))]
+    return entries
+
+
+def search_food_suggestions(query: str, category: str, limit: int = 10,
+                            index: Optional[FoodSearchIndex] = None) -> List[Dict]:
+    """
+    Typeahead suggestions for one DIY category, local first
+
+    Falls back to the (cached) remote FDC search only when nothing local
+    matches and the query has at least MIN_REMOTE_QUERY_LENGTH characters;
+    remote results are indexed so repeating the query stays local.
+
+    Parameters:
+    - index: the search index to use (default: the shared one)
+    """
+    index = index or get_food_search_index()
+    results = index.search(query, category, limit)
+    if results or len(normalize_text(query)) < MIN_REMOTE_QUERY_LENGTH:
+        return results
+
+    entries = search_remote_foods(query)
+    if entries is None:
+        return []
+
+    matches = []
+    for food, categories in entries:
+        index.add_remote(food, categories)
+        if category in categories:
+            matches.append(food)
+    return matches[:limit]
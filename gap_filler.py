@@ -0,0 +1,109 @@
+"""
+Suggest foods and gram amounts that close a remaining macro budget.
+
+Foods are indexed by their energy split (protein/carb/fat share of
+calories) in a KD-tree. The gap's own split finds the nearest candidates,
+and one vectorized non-negative least-squares pass sizes every candidate
+at once. The candidates are then ranked by how much of the gap is left.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from food_catalog import CATALOG_CATEGORIES, MACRO_KEYS, FoodCatalog, get_food_catalog
+from portion_optimizer import MACRO_WEIGHTS, PORTION_BOUNDS
+
+# Gaps smaller than this (per macro) count as closed
+GAP_FLOORS = {'calories': 50, 'protein': 5, 'carbs': 5, 'fat': 3}
+
+CANDIDATE_COUNT = 12
+ENERGY_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+
+def energy_shares(values: np.ndarray) -> np.ndarray:
+    """Protein/carb/fat share of energy for rows of (calories, protein, carbs, fat)"""
+    energy = values[:, 1:] * ENERGY_PER_GRAM
+    total = energy.sum(axis=1, keepdims=True)
+    return np.divide(energy, total, out=np.full_like(energy, 1 / 3), where=total > 0)
+
+
+class MacroGapFiller:
+    """KD-tree over the catalog's per-100g macro profiles"""
+
+    def __init__(self, catalog: FoodCatalog):
+        self.catalog = catalog
+        self.categories = np.empty(len(catalog), dtype=object)
+        for category in CATALOG_CATEGORIES:
+            self.categories[catalog.category_masks[category]] = category
+
+        # Foods without energy have no meaningful profile
+        self.rows = np.flatnonzero(catalog.values[:, 0] > 0)
+        self.tree = cKDTree(energy_shares(catalog.values[self.rows]))
+
+    def suggest(self, remaining: Dict, top_k: int = 3, exclude: Optional[Iterable[str]] = None,
+                candidates: int = CANDIDATE_COUNT) -> List[Dict]:
+        """
+        Foods and amounts that best close a remaining budget
+
+        Parameters:
+        - remaining: remaining calories/protein/carbs/fat (negative values are ignored)
+        - exclude: food names to leave out (e.g. already in the meal)
+
+        Returns:
+        - Up to top_k dicts with name, category, grams, the nutrition added and
+          gap_closed (fraction of the weighted gap removed)
+        """
+        gap = np.array([max(0.0, float(remaining.get(macro, 0) or 0)) for macro in MACRO_KEYS])
+        floors = np.array([GAP_FLOORS[macro] for macro in MACRO_KEYS])
+        if np.all(gap < floors) or len(self.rows) == 0:
+            return []
+
+        excluded = set(exclude or [])
+        _, nearest = self.tree.query(energy_shares(gap[None, :])[0], k=min(candidates + len(excluded), len(self.rows)))
+        rows = [row for row in self.rows[np.atleast_1d(nearest)] if self.catalog.names[row] not in excluded][:candidates]
+        if not rows:
+            return []
+
+        # Relative error per macro, weighted like the portion solver
+        scale = np.sqrt([MACRO_WEIGHTS[macro] for macro in MACRO_KEYS]) / np.maximum(gap, floors)
+        per_gram = self.catalog.values[rows] / 100 * scale
+        target = gap * scale
+
+        # Closed-form one-variable NNLS for every candidate, clipped to the slider range
+        grams = np.clip(per_gram @ target / np.einsum('ij,ij->i', per_gram, per_gram), 0, PORTION_BOUNDS[1])
+        residuals = np.linalg.norm(grams[:, None] * per_gram - target, axis=1)
+        gap_closed = 1 - residuals / np.linalg.norm(target)
+
+        suggestions = []
+        for i in np.argsort(residuals):
+            if grams[i] < PORTION_BOUNDS[0] or gap_closed[i] <= 0:
+                continue
+            row = rows[i]
+            amount = float(np.round(grams[i] / 5) * 5)
+            suggestions.append({
+                'name': self.catalog.names[row],
+                'category': self.categories[row],
+                'grams': amount,
+                **{macro: round(float(self.catalog.values[row, k] * amount / 100), 1) for k, macro in enumerate(MACRO_KEYS)},
+                'gap_closed': round(float(gap_closed[i]), 3)
+            })
+            if len(suggestions) == top_k:
+                break
+        return suggestions
+
+
+_filler = None
+_filler_lock = threading.Lock()
+
+
+def get_gap_filler(catalog: Optional[FoodCatalog] = None) -> MacroGapFiller:
+    """Process-wide gap filler over a catalog (default: the shared food catalog), rebuilt when it changes"""
+    global _filler
+    catalog = catalog or get_food_catalog()
+    with _filler_lock:
+        if _filler is None or _filler.catalog is not catalog:
+            _filler = MacroGapFiller(catalog)
+        return _filler
@@ -0,0 +1,31 @@
+"""
+Ingredient amount strings ("150g", "1 cup", "2 tbsp") as grams.
+"""
+
+import re
+
+# Grams per unit; the first unit named in the amount wins, anything else is grams
+UNIT_GRAMS = [
+    (('cup',), 240),
+    (('tbsp', 'tablespoon'), 15),
+    (('tsp', 'teaspoon'), 5),
+    (('oz',), 28.35),
+    (('lb', 'pound'), 453.6)
+]
+
+# Amounts without a number
+DEFAULT_GRAMS = 100.0
+
+
+def parse_amount_to_grams(amount_str: str) -> float:
+    """Parse an ingredient amount ("150g", "1 cup", "2 tbsp") to grams"""
+    numbers = re.findall(r'\d+(?:\.\d+)?', amount_str or '')
+    if not numbers:
+        return DEFAULT_GRAMS
+
+    amount = float(numbers[0])
+    amount_lower = amount_str.lower()
+    for units, grams in UNIT_GRAMS:
+        if any(unit in amount_lower for unit in units):
+            return amount * grams
+    return amount
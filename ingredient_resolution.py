@@ -0,0 +1,299 @@
+"""
+Persistent ingredient -> FDC food resolution table.
+
+Maps canonical ingredient strings to the chosen fdcId with its per-100g
+macros, a confidence value and where the mapping came from. Manual overrides
+are never replaced by automatic resolutions, and the table can be exported
+and imported so curated mappings ship to every deployment.
+
+Usage:
+    python ingredient_resolution.py export curated.json
+    python ingredient_resolution.py import curated.json
+    python ingredient_resolution.py set "greek yogurt" 171304 --calories 59 --protein 10.2 --carbs 3.6 --fat 0.4
+"""
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+DEFAULT_RESOLUTION_PATH = os.path.join('data', 'ingredient_resolutions.json')
+
+SOURCE_SEARCH_RANK = 'search_rank'
+SOURCE_MANUAL = 'manual'
+SOURCE_FALLBACK = 'fallback'
+SOURCES = (SOURCE_SEARCH_RANK, SOURCE_MANUAL, SOURCE_FALLBACK)
+
+FALLBACK_CONFIDENCE = 0.2
+
+STORE_VERSION = 2
+
+MACRO_KEYS = ('calories', 'protein', 'carbs', 'fat')
+
+# Writes are batched: flush after FLUSH_EVERY unsaved records (or a tenth of the table,
+# whichever is more, so total I/O stays linear) or FLUSH_INTERVAL seconds, and at exit
+FLUSH_EVERY = 50
+FLUSH_INTERVAL = 30.0
+
+# Fallback resolutions are retried after this long (FDC may have the food by then)
+FALLBACK_TTL = timedelta(days=7)
+
+
+class ResolutionStore:
+    """
+    Thread-safe JSON-backed resolution table
+
+    Each flush rewrites the whole file from this process's entries, so
+    several processes sharing one path overwrite each other's changes (last
+    writer wins); give each process its own path and ship curated mappings
+    with export/import.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESOLUTION_PATH):
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._unsaved = 0
+        self._flush_timer = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+            return
+        self._entries = payload.get('resolutions', {})
+
+        # Version 1 keys dropped preparation words ("cooked rice" and "raw rice" shared
+        # one key); keep manual overrides and let automatic entries resolve again
+        if payload.get('version', 1) < STORE_VERSION:
+            self._entries = {key: entry for key, entry in self._entries.items() if entry['source'] == SOURCE_MANUAL}
+
+    def _mark_unsaved_locked(self):
+        """Count a change and schedule the batched flush (call with _lock held)"""
+        self._unsaved += 1
+        if self._unsaved >= max(FLUSH_EVERY, len(self._entries) // 10):
+            return True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return False
+
+    def flush(self):
+        """Write unsaved changes; the file is written outside the entry lock"""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._unsaved:
+                    return
+                entries = {key: dict(entry) for key, entry in self._entries.items()}
+                self._unsaved = 0
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'version': STORE_VERSION, 'resolutions': entries}, f, indent=2, sort_keys=True)
+            os.replace(self.path + '.tmp', self.path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the resolution for a canonical ingredient, if any (expired fallbacks count as missing)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return None
+        if entry['source'] == SOURCE_FALLBACK and _expired(entry):
+            return None
+        return dict(entry, per_100g=dict(entry['per_100g']))
+
+    def record(self, key: str, fdc_id: Optional[int], description: str, per_100g: Dict,
+               confidence: float, source: str, persist: bool = True) -> bool:
+        """
+        Store a resolution (persisted with the next batched flush)
+
+        Returns:
+        - False if an existing manual override blocked the write
+        """
+        entry = {
+            'fdc_id': fdc_id,
+            'description': description,
+            'per_100g': dict(per_100g),
+            'confidence': round(float(confidence), 3),
+            'source': source,
+            'updated_at': datetime.now().isoformat(timespec='seconds')
+        }
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing and existing['source'] == SOURCE_MANUAL and source != SOURCE_MANUAL:
+                return False
+            self._entries[key] = entry
+            flush_now = persist and self._mark_unsaved_locked()
+        if flush_now:
+            self.flush()
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Drop a resolution so the next lookup searches again"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._unsaved += 1
+        self.flush()
+        return True
+
+    def save(self):
+        with self._lock:
+            self._unsaved += 1
+        self.flush()
+
+    def export(self, path: str, sources: Optional[List[str]] = None) -> int:
+        """Write resolutions (optionally only some sources) to a portable JSON file"""
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items()
+                       if sources is None or entry['source'] in sources}
+        with open(path, 'w') as f:
+            json.dump({'version': STORE_VERSION, 'resolutions': entries}, f, indent=2, sort_keys=True)
+        return len(entries)
+
+    def import_file(self, path: str, overwrite_manual: bool = False) -> int:
+        """
+        Merge resolutions from an exported file
+
+        Imported manual entries replace automatic ones; existing manual entries
+        are only replaced when overwrite_manual is set. Entries without a known
+        source or complete per-100g macros are skipped, and a file exported by
+        another store version raises ValueError.
+
+        Returns:
+        - Number of entries written
+        """
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        version = payload.get('version', 1)
+        if version != STORE_VERSION:
+            raise ValueError(f"{path} is resolution store version {version}, expected {STORE_VERSION}")
+
+        written = 0
+        with self._lock:
+            for key, entry in payload.get('resolutions', {}).items():
+                entry = _complete_entry(entry)
+                if entry is None:
+                    continue
+                existing = self._entries.get(key)
+                if existing and existing['source'] == SOURCE_MANUAL and not overwrite_manual:
+                    continue
+                self._entries[key] = entry
+                written += 1
+            self._unsaved += written
+        self.flush()
+        return written
+
+
+def _complete_entry(entry) -> Optional[Dict]:
+    """An imported entry with defaults for optional fields, or None if unusable"""
+    if not isinstance(entry, dict) or entry.get('source') not in SOURCES:
+        return None
+    per_100g = entry.get('per_100g')
+    if not isinstance(per_100g, dict) or not all(isinstance(per_100g.get(macro), (int, float)) for macro in MACRO_KEYS):
+        return None
+    return {
+        'fdc_id': entry.get('fdc_id'),
+        'description': entry.get('description', ''),
+        'per_100g': {macro: per_100g[macro] for macro in MACRO_KEYS},
+        'confidence': entry.get('confidence', 1.0 if entry['source'] == SOURCE_MANUAL else FALLBACK_CONFIDENCE),
+        'source': entry['source'],
+        # Entries without a timestamp count as stale (a fallback is retried)
+        'updated_at': entry.get('updated_at', '')
+    }
+
+
+def _expired(entry: Dict) -> bool:
+    try:
+        updated_at = datetime.fromisoformat(entry.get('updated_at', ''))
+    except ValueError:
+        return True
+    return datetime.now() - updated_at > FALLBACK_TTL
+
+
+def search_confidence(ingredient_key: str, description: str, rank: int = 0) -> float:
+    """Confidence for a search pick: word overlap with the FDC description, discounted by rank"""
+    ingredient_words = set(ingredient_key.split())
+    description_words = set(re.sub(r'[^a-z0-9\s]', ' ', (description or '').lower()).split())
+    if not ingredient_words:
+        return 0.0
+    overlap = len(ingredient_words & description_words) / len(ingredient_words)
+    return round(overlap / (1 + rank), 3)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_resolution_store(path: str = DEFAULT_RESOLUTION_PATH) -> ResolutionStore:
+    """Process-wide resolution store"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = ResolutionStore(path)
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage ingredient -> FDC resolutions")
+    parser.add_argument('--store', default=DEFAULT_RESOLUTION_PATH, help="Resolution table path")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export resolutions")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--manual-only', action='store_true', help="Only export manual overrides")
+
+    import_parser = subparsers.add_parser('import', help="Import resolutions")
+    import_parser.add_argument('path')
+    import_parser.add_argument('--overwrite-manual', action='store_true')
+
+    set_parser = subparsers.add_parser('set', help="Add a manual override")
+    set_parser.add_argument('ingredient')
+    set_parser.add_argument('fdc_id', type=int)
+    set_parser.add_argument('--description', default='')
+    for macro in MACRO_KEYS:
+        set_parser.add_argument(f'--{macro}', type=float, required=True)
+
+    args = parser.parse_args()
+    store = ResolutionStore(args.store)
+
+    if args.command == 'export':
+        count = store.export(args.path, [SOURCE_MANUAL] if args.manual_only else None)
+        print(f"Exported {count} resolutions to {args.path}")
+    elif args.command == 'import':
+        try:
+            count = store.import_file(args.path, overwrite_manual=args.overwrite_manual)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Imported {count} resolutions into {args.store}")
+    elif args.command == 'set':
+        from nutrition_lookup import canonicalize_ingredient
+
+        key = canonicalize_ingredient(args.ingredient)
+        per_100g = {macro: getattr(args, macro) for macro in MACRO_KEYS}
+        store.record(key, args.fdc_id, args.description or args.ingredient, per_100g, 1.0, SOURCE_MANUAL)
+        store.flush()
+        print(f"Set {key} -> {args.fdc_id}")
+
+
+if __name__ == '__main__':
+    main()
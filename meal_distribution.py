@@ -0,0 +1,113 @@
+"""
+Precomputed meal macro distributions for every training slot and meal count.
+
+The shares only depend on when the client trains and how many meals they
+eat, so every (slot, meal count) table is built once at import. A day's
+per-meal targets are then a single multiply of its share table by the
+day's targets.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TRAINING_SLOTS = ['BEFORE 9AM', '9AM-3PM', '3PM-6PM', 'AFTER 6PM', 'REST DAY']
+REST_DAY = 'REST DAY'
+MAX_MEALS = 6
+
+MACRO_KEYS = ['calories', 'protein', 'carbs', 'fat']
+SHARE_KEYS = ['protein', 'carbs', 'fat']
+
+# Peri-workout meals: (description, protein, carbs, fat) shares
+PRE_WORKOUT = ('Pre-Workout', 0.3, 0.4, 0.1)
+POST_WORKOUT = {'BEFORE 9AM': ('Post-Workout', 0.4, 0.4, 0.2)}
+DEFAULT_POST_WORKOUT = ('Post-Workout', 0.4, 0.4, 0.1)
+
+# What's left of each macro, split evenly over the remaining meals
+REMAINING_SHARES = {'BEFORE 9AM': (0.3, 0.2, 0.7)}
+DEFAULT_REMAINING_SHARES = (0.3, 0.2, 0.8)
+
+
+def workout_meal_numbers(slot: str, total_meals: int) -> Tuple[int, int]:
+    """(pre-workout, post-workout) meal numbers for a training slot"""
+    if slot == 'BEFORE 9AM':
+        return 1, 2
+    if slot == '9AM-3PM':
+        return total_meals // 2, total_meals // 2 + 1
+    return total_meals - 1, total_meals
+
+
+def _build_distribution(slot: str, total_meals: int) -> Tuple[np.ndarray, List[str]]:
+    """Protein/carb/fat shares per meal, shape (total_meals, 3), with meal descriptions"""
+    if slot == REST_DAY:
+        return np.full((total_meals, 3), 1.0 / total_meals), [f'Meal {meal_num}' for meal_num in range(1, total_meals + 1)]
+    if total_meals == 1:
+        return np.ones((1, 3)), ['All-in-one Meal']
+
+    pre_meal, post_meal = workout_meal_numbers(slot, total_meals)
+    remaining = REMAINING_SHARES.get(slot, DEFAULT_REMAINING_SHARES)
+
+    shares = np.empty((total_meals, 3))
+    descriptions = []
+    for meal_num in range(1, total_meals + 1):
+        if meal_num == pre_meal:
+            description, *meal_shares = PRE_WORKOUT
+        elif meal_num == post_meal:
+            description, *meal_shares = POST_WORKOUT.get(slot, DEFAULT_POST_WORKOUT)
+        else:
+            description = f'Meal {meal_num}'
+            meal_shares = [share / (total_meals - 2) for share in remaining]
+        shares[meal_num - 1] = meal_shares
+        descriptions.append(description)
+    return shares, descriptions
+
+
+def _build_tables():
+    shares, descriptions, target_shares = {}, {}, {}
+    for slot in TRAINING_SLOTS:
+        for total_meals in range(1, MAX_MEALS + 1):
+            slot_shares, slot_descriptions = _build_distribution(slot, total_meals)
+            slot_shares.setflags(write=False)
+
+            # Calories follow the protein share, like the portion targets always have
+            meal_target_shares = np.column_stack([slot_shares[:, 0], slot_shares])
+            meal_target_shares.setflags(write=False)
+
+            shares[slot, total_meals] = slot_shares
+            descriptions[slot, total_meals] = slot_descriptions
+            target_shares[slot, total_meals] = meal_target_shares
+    return shares, descriptions, target_shares
+
+
+DISTRIBUTION_SHARES, DISTRIBUTION_DESCRIPTIONS, TARGET_SHARES = _build_tables()
+
+
+def training_slot(workout_info: Optional[Dict]) -> str:
+    """Training slot for a day's workout info (REST DAY without a timed workout)"""
+    if workout_info and workout_info.get('has_workout') and workout_info.get('workout_time') in TRAINING_SLOTS:
+        return workout_info['workout_time']
+    return REST_DAY
+
+
+def _table_key(slot: str, total_meals: int) -> Tuple[str, int]:
+    return (slot if slot in TRAINING_SLOTS else REST_DAY, max(1, min(MAX_MEALS, int(total_meals))))
+
+
+def get_meal_distribution_table(slot: str, total_meals: int) -> Dict[int, Dict]:
+    """Per-meal distribution in the pages' format: {meal_num: {'description', 'protein', 'carbs', 'fat'}}"""
+    key = _table_key(slot, total_meals)
+    return {
+        meal_num: {'description': description, **dict(zip(SHARE_KEYS, DISTRIBUTION_SHARES[key][meal_num - 1].tolist()))}
+        for meal_num, description in enumerate(DISTRIBUTION_DESCRIPTIONS[key], start=1)
+    }
+
+
+def get_day_meal_targets(day_targets: Dict, slot: str, total_meals: int) -> np.ndarray:
+    """
+    Every meal's targets for a day in one multiply
+
+    Returns:
+    - (total_meals, 4) array in MACRO_KEYS order (calories, protein, carbs, fat)
+    """
+    targets = np.array([float(day_targets.get(macro, 0) or 0) for macro in MACRO_KEYS])
+    return TARGET_SHARES[_table_key(slot, total_meals)] * targets
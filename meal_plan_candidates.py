@@ -0,0 +1,123 @@
+"""
+Best-of-N meal plan generation.
+
+Fires several candidate generations concurrently, scores each against the
+daily and per-meal targets, and returns the first candidate that passes the
+tolerance (or the most accurate one if none does). Scoring is pure so it can
+run in worker threads; the pages report the returned warnings themselves.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+MACRO_KEYS = ['calories', 'protein', 'carbs', 'fat']
+DEFAULT_TOLERANCE = 0.03
+
+# Candidate i uses CANDIDATE_TEMPERATURES[i % len]
+CANDIDATE_TEMPERATURES = [0.1, 0.3, 0.5]
+
+
+def score_meal_plan(result: Dict, daily_targets: Dict, meal_targets: List[Dict],
+                    tolerance: float = DEFAULT_TOLERANCE) -> Dict:
+    """
+    Score a generated plan with the daily and per-meal deviation checks
+
+    Parameters:
+    - result: plan with 'meals' (each with 'total_macros') and 'daily_totals'
+    - daily_targets: day targets by macro
+    - meal_targets: per-meal targets by macro, matched to meals by index
+
+    Returns:
+    - Dict with 'passed', 'max_deviation' (fraction), 'daily_deviations' and 'warnings'
+    """
+    if not result or not result.get('daily_totals'):
+        return {'passed': False, 'max_deviation': float('inf'), 'daily_deviations': {}, 'warnings': []}
+
+    warnings = []
+    max_deviation = 0.0
+
+    daily_deviations = {}
+    for macro in MACRO_KEYS:
+        target = daily_targets.get(macro, 0)
+        actual = result['daily_totals'].get(macro, 0)
+        if target > 0:
+            deviation = abs(actual - target) / target
+            daily_deviations[macro] = deviation
+            max_deviation = max(max_deviation, deviation)
+            if deviation > tolerance:
+                warnings.append(f"Daily {macro.title()} deviation: {deviation*100:.1f}% (Target: {target}, Actual: {actual})")
+
+    for i, meal in enumerate(result.get('meals', [])):
+        if i >= len(meal_targets):
+            break
+        meal_macros = meal.get('total_macros', {})
+        meal_name = meal.get('name', f'Meal {i+1}')
+        for macro, target in meal_targets[i].items():
+            actual = meal_macros.get(macro, 0)
+            if target > 0:
+                deviation = abs(actual - target) / target
+                max_deviation = max(max_deviation, deviation)
+                if deviation > tolerance:
+                    warnings.append(f"{meal_name} {macro} deviation: {deviation*100:.1f}% (Target: {target}, Actual: {actual})")
+
+    return {
+        'passed': not warnings,
+        'max_deviation': max_deviation,
+        'daily_deviations': daily_deviations,
+        'warnings': warnings
+    }
+
+
+def generate_best_of_n(generate: Callable[[float], Dict], score: Callable[[Dict], Dict],
+                       n_candidates: int = 3, temperatures: Optional[List[float]] = None
+                       ) -> Tuple[Optional[Dict], Optional[Dict], Dict]:
+    """
+    Run n candidate generations concurrently and keep the most accurate
+
+    Returns as soon as a candidate passes; candidates that haven't started are
+    cancelled and in-flight ones finish in the background unused.
+
+    Parameters:
+    - generate: temperature -> plan (must not touch Streamlit)
+    - score: plan -> score_meal_plan result
+
+    Returns:
+    - (best plan, its score, stats with candidates/completed/failed/elapsed_seconds)
+    """
+    temperatures = temperatures or CANDIDATE_TEMPERATURES
+    start = time.time()
+    best_result, best_score = None, None
+    completed, failed = 0, 0
+
+    executor = ThreadPoolExecutor(max_workers=max(1, n_candidates))
+    pending = {executor.submit(generate, temperatures[i % len(temperatures)]) for i in range(n_candidates)}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception:
+                    failed += 1
+                    continue
+                completed += 1
+                if not result:
+                    continue
+
+                result_score = score(result)
+                if best_score is None or result_score['max_deviation'] < best_score['max_deviation']:
+                    best_result, best_score = result, result_score
+
+            if best_score is not None and best_score['passed']:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    stats = {
+        'candidates': n_candidates,
+        'completed': completed,
+        'failed': failed,
+        'elapsed_seconds': round(time.time() - start, 2)
+    }
+    return best_result, best_score, stats
@@ -0,0 +1,277 @@
+"""
+Columnar float32 nutrient matrix (foods x nutrients) shared across processes.
+
+The build step writes the matrix as a Fortran-ordered .npy file plus a JSON
+name/ID index. Loaders memory-map the matrix read-only, so every Streamlit
+server process or batch worker shares one page-cached copy.
+
+Usage:
+    python nutrient_matrix.py --fdc-json data/fdc_foods.json --out data/nutrient_matrix
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Matrix columns and the FDC nutrient IDs that feed them (first ID found wins)
+NUTRIENT_COLUMNS = [
+    ('calories', [1008, 2047, 2048]),
+    ('protein', [1003]),
+    ('carbs', [1005]),
+    ('fat', [1004]),
+    ('fiber', [1079]),
+    ('sugar', [2000, 1063]),
+    ('saturated_fat', [1258]),
+    ('sodium', [1093]),
+    ('potassium', [1092]),
+    ('calcium', [1087]),
+    ('iron', [1089]),
+    ('vitamin_c', [1162])
+]
+
+COLUMN_NAMES = [name for name, _ in NUTRIENT_COLUMNS]
+MACRO_COLUMNS = ['calories', 'protein', 'carbs', 'fat']
+
+DEFAULT_MATRIX_PATH = os.path.join('data', 'nutrient_matrix')
+
+_FDC_ID_TO_COLUMN = {}
+for _column_index, (_, _nutrient_ids) in enumerate(NUTRIENT_COLUMNS):
+    for _priority, _nutrient_id in enumerate(_nutrient_ids):
+        _FDC_ID_TO_COLUMN[_nutrient_id] = (_column_index, _priority)
+
+
+def fdc_record_to_row(record: Dict) -> np.ndarray:
+    """Extract per-100g nutrient values from an FDC food record (search or bulk format)"""
+    row = np.full(len(NUTRIENT_COLUMNS), np.nan, dtype=np.float32)
+    best_priority = [None] * len(NUTRIENT_COLUMNS)
+
+    for nutrient in record.get('foodNutrients', []):
+        # Search results carry nutrientId/value, bulk downloads nutrient.id/amount
+        nutrient_id = nutrient.get('nutrientId')
+        value = nutrient.get('value')
+        if nutrient_id is None and isinstance(nutrient.get('nutrient'), dict):
+            nutrient_id = nutrient['nutrient'].get('id')
+            value = nutrient.get('amount')
+        if nutrient_id not in _FDC_ID_TO_COLUMN or value is None:
+            continue
+
+        column_index, priority = _FDC_ID_TO_COLUMN[nutrient_id]
+        if best_priority[column_index] is None or priority < best_priority[column_index]:
+            row[column_index] = value
+            best_priority[column_index] = priority
+
+    return np.nan_to_num(row, nan=0.0)
+
+
+def food_dict_to_row(food: Dict) -> np.ndarray:
+    """Extract per-100g nutrient values from a local food dict"""
+    return np.array([float(food.get(name, 0) or 0) for name in COLUMN_NAMES], dtype=np.float32)
+
+
+def load_fdc_records(path: str) -> List[Dict]:
+    """Load FDC food records from a JSON list or an FDC bulk download file"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return data
+
+    # Bulk downloads wrap records in a single top-level key (e.g. "FoundationFoods")
+    records = []
+    for value in data.values():
+        if isinstance(value, list):
+            records.extend(value)
+    return records
+
+
+def collect_catalog_foods() -> List[Dict]:
+    """Collect foods from common_foods_database and the DIY vegetable/fruit lists"""
+    from common_foods_database import get_all_foods
+    from food_catalog import COMMON_VEGETABLE_SOURCES, COMMON_FRUIT_SOURCES
+
+    foods = []
+    for name, nutrition in get_all_foods().items():
+        foods.append({'id': f"common:{name}", 'name': name, **nutrition})
+    for food in COMMON_VEGETABLE_SOURCES + COMMON_FRUIT_SOURCES:
+        foods.append({'id': f"diy:{food['name']}", **food})
+    return foods
+
+
+def build_nutrient_matrix(out_path: str = DEFAULT_MATRIX_PATH,
+                          fdc_records: Optional[Iterable[Dict]] = None,
+                          foods: Optional[Iterable[Dict]] = None) -> Dict:
+    """
+    Write the nutrient matrix and its index
+
+    Parameters:
+    - out_path: Base path; writes <out_path>.<digest>.npy and <out_path>.index.json
+    - fdc_records: FDC food records (the local FDC mirror)
+    - foods: Local food dicts with 'name' and per-100g nutrient keys; defaults
+      to common_foods_database plus the DIY vegetable and fruit lists
+
+    Returns:
+    - The written index
+    """
+    if foods is None:
+        foods = collect_catalog_foods()
+
+    rows = []
+    names = []
+    ids = []
+
+    for food in foods:
+        rows.append(food_dict_to_row(food))
+        names.append(food['name'])
+        ids.append(str(food.get('id', food['name'])))
+
+    for record in fdc_records or []:
+        if 'fdcId' not in record:
+            continue
+        rows.append(fdc_record_to_row(record))
+        names.append(record.get('description', str(record['fdcId'])))
+        ids.append(str(record['fdcId']))
+
+    matrix = np.asfortranarray(np.vstack(rows) if rows else np.zeros((0, len(NUTRIENT_COLUMNS))), dtype=np.float32)
+    digest = hashlib.sha1(matrix.tobytes() + json.dumps(ids).encode()).hexdigest()[:12]
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    matrix_file = f"{os.path.basename(out_path)}.{digest}.npy"
+
+    # Write the matrix under a content-addressed name, then swap the index atomically
+    tmp_matrix = os.path.join(out_dir, matrix_file + '.tmp')
+    with open(tmp_matrix, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_matrix, os.path.join(out_dir, matrix_file))
+
+    index = {
+        'version': 1,
+        'matrix_file': matrix_file,
+        'shape': list(matrix.shape),
+        'columns': COLUMN_NAMES,
+        'names': names,
+        'ids': ids
+    }
+    index_path = f"{out_path}.index.json"
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+
+    # Drop superseded matrices; processes that still map them keep their pages
+    prefix = os.path.basename(out_path) + '.'
+    for filename in os.listdir(out_dir):
+        if filename.startswith(prefix) and filename.endswith('.npy') and filename != matrix_file:
+            try:
+                os.remove(os.path.join(out_dir, filename))
+            except OSError:
+                pass
+
+    return index
+
+
+class NutrientMatrix:
+    """Read-only view over a memory-mapped nutrient matrix"""
+
+    def __init__(self, values: np.ndarray, columns: List[str], names: List[str], ids: List[str]):
+        self.values = values
+        self.columns = columns
+        self.names = names
+        self.ids = ids
+        self.column_index = {name: i for i, name in enumerate(columns)}
+
+        self.row_index = {}
+        for row, name in enumerate(names):
+            self.row_index.setdefault(name.lower(), row)
+        self.id_index = {food_id: row for row, food_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return one nutrient column (a view, no copy)"""
+        return self.values[:, self.column_index[name]]
+
+    def rows(self, names: Iterable[str]) -> np.ndarray:
+        """Row indices for food names (-1 when missing)"""
+        return np.array([self.row_index.get(name.lower(), -1) for name in names], dtype=np.int64)
+
+    def submatrix(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> np.ndarray:
+        """Per-100g values for the given rows and columns (optimizer input)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        missing = np.flatnonzero((rows < 0) | (rows >= len(self.names)))
+        if missing.size:
+            # A -1 from rows() would otherwise silently read the last food
+            raise KeyError(f"{missing.size} food(s) not in the nutrient matrix (positions {missing.tolist()})")
+        columns = columns or MACRO_COLUMNS
+        column_ids = [self.column_index[name] for name in columns]
+        return np.asarray(self.values[rows][:, column_ids], dtype=np.float64)
+
+    def totals(self, rows: np.ndarray, grams: np.ndarray, columns: Optional[List[str]] = None) -> Dict[str, float]:
+        """Vectorized nutrient totals for portions in grams"""
+        columns = columns or MACRO_COLUMNS
+        totals = np.asarray(grams, dtype=np.float64) @ self.submatrix(rows, columns) / 100
+        return {name: float(value) for name, value in zip(columns, totals)}
+
+
+def load_nutrient_matrix(path: str = DEFAULT_MATRIX_PATH) -> Optional[NutrientMatrix]:
+    """Memory-map a built nutrient matrix read-only, or return None if it is not built"""
+    index_path = f"{path}.index.json"
+    if not os.path.exists(index_path):
+        return None
+
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+
+    matrix_path = os.path.join(os.path.dirname(os.path.abspath(path)), index['matrix_file'])
+    values = np.load(matrix_path, mmap_mode='r')
+    return NutrientMatrix(values, index['columns'], index['names'], index['ids'])
+
+
+# path -> (index file (mtime_ns, size), matrix)
+_matrix_cache = {}
+_matrix_lock = threading.Lock()
+
+
+def get_nutrient_matrix(path: str = DEFAULT_MATRIX_PATH) -> Optional[NutrientMatrix]:
+    """
+    Process-wide cached nutrient matrix (None, uncached, until it is built)
+
+    A rebuild swaps the index file, so the cached matrix is reloaded when the
+    index's mtime or size moves; callers holding the old matrix keep its mapping.
+    """
+    index_path = f"{path}.index.json"
+    with _matrix_lock:
+        try:
+            stat = os.stat(index_path)
+        except OSError:
+            _matrix_cache.pop(path, None)
+            return None
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+        cached = _matrix_cache.get(path)
+        if cached is None or cached[0] != fingerprint:
+            matrix = load_nutrient_matrix(path)
+            if matrix is None:
+                return None
+            cached = _matrix_cache[path] = (fingerprint, matrix)
+        return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the shared nutrient matrix")
+    parser.add_argument('--fdc-json', help="FDC mirror: JSON list of foods or an FDC bulk download file")
+    parser.add_argument('--out', default=DEFAULT_MATRIX_PATH, help="Output base path")
+    args = parser.parse_args()
+
+    fdc_records = load_fdc_records(args.fdc_json) if args.fdc_json else None
+    index = build_nutrient_matrix(args.out, fdc_records=fdc_records)
+    print(f"Wrote {index['shape'][0]} foods x {index['shape'][1]} nutrients to {index['matrix_file']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Ingredient nutrition lookups (per 100g) backed by a process-wide cache.
+
+Each canonical ingredient is searched in FDC once; the result is shared by
+every rerun, session and page, and persisted so a warmed cache survives
+restarts. Misses fall back to the shared fallback store.
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import fdc_api
+from fallback_nutrition import get_fallback_per_100g
+from ingredient_resolution import (
+    FALLBACK_CONFIDENCE,
+    SOURCE_FALLBACK,
+    SOURCE_SEARCH_RANK,
+    get_resolution_store,
+    search_confidence
+)
+from spelling_index import correct_query
+
+NUTRIENT_MAPPING = {1008: 'calories', 1003: 'protein', 1005: 'carbs', 1004: 'fat'}
+
+# v2: keys keep preparation words, so v1 files (where "cooked rice" and "raw rice"
+# shared one entry) are not reused
+DEFAULT_CACHE_PATH = os.path.join('data', 'nutrition_lookup_cache_v2.json')
+
+_cache = {}
+_cache_lock = threading.Lock()
+_cache_loaded = False
+
+
+def ingredient_query(name: str) -> str:
+    """
+    Search text for an ingredient: lowercase without punctuation, original word order
+
+    Preparation words (raw, cooked, frozen, ...) are kept; they change the per-100g values.
+    """
+    text = re.sub(r'[^a-z0-9%\s]', ' ', (name or '').lower())
+    return ' '.join(text.split())
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def canonicalize_ingredient(name: str) -> str:
+    """Normalize an ingredient string into its cache key (case, punctuation, plurals and word order)"""
+    return ' '.join(sorted(_singular(word) for word in ingredient_query(name).split()))
+
+
+def extract_per_100g(food_item: Dict):
+    """
+    Extract per-100g macros from an FDC search result
+
+    Returns:
+    - (nutrition dict, number of non-zero macros found)
+    """
+    nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
+    nutrients_found = 0
+    for nutrient in food_item.get('foodNutrients', []):
+        nutrient_id = nutrient.get('nutrientId')
+        if nutrient_id in NUTRIENT_MAPPING:
+            value = nutrient.get('value', 0) or 0
+            if value > 0:  # Only count non-zero values
+                nutrition[NUTRIENT_MAPPING[nutrient_id]] = round(value, 1)
+                nutrients_found += 1
+    return nutrition, nutrients_found
+
+
+def load_lookup_cache(path: str = DEFAULT_CACHE_PATH):
+    """Merge a persisted lookup cache into the process cache"""
+    global _cache_loaded
+    with _cache_lock:
+        _cache_loaded = True
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, record in saved.items():
+            _cache.setdefault(key, record)
+
+
+def save_lookup_cache(path: str = DEFAULT_CACHE_PATH):
+    """Persist the process cache atomically"""
+    with _cache_lock:
+        snapshot = dict(_cache)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(path + '.tmp', path)
+
+
+def _ensure_cache_loaded():
+    if not _cache_loaded:
+        load_lookup_cache()
+
+
+def _copy_record(record: Dict) -> Dict:
+    return {**record, 'per_100g': dict(record['per_100g'])}
+
+
+def get_cached_nutrition(ingredient: str) -> Optional[Dict]:
+    """Return the cached record for an ingredient without searching"""
+    _ensure_cache_loaded()
+    with _cache_lock:
+        record = _cache.get(canonicalize_ingredient(ingredient))
+    return _copy_record(record) if record is not None else None
+
+
+def cached_records() -> Dict[str, Dict]:
+    """Snapshot of every cached record by canonical ingredient"""
+    _ensure_cache_loaded()
+    with _cache_lock:
+        return {key: _copy_record(record) for key, record in _cache.items()}
+
+
+def cache_size() -> int:
+    """Number of cached canonical ingredients"""
+    _ensure_cache_loaded()
+    with _cache_lock:
+        return len(_cache)
+
+
+def _record_from_resolution(resolution: Dict) -> Dict:
+    return {
+        'fdc_description': resolution['description'],
+        'per_100g': resolution['per_100g'],
+        'source': 'fdc' if resolution['fdc_id'] is not None else 'fallback',
+        'fdc_id': resolution['fdc_id']
+    }
+
+
+def _search_fdc(ingredient: str, query: str):
+    """
+    Top FDC search result for a query as a lookup record
+
+    Returns:
+    - (record, confidence); a fallback record when FDC has no usable result.
+      Search errors propagate.
+    """
+    record = {
+        'fdc_description': ingredient,
+        'per_100g': get_fallback_per_100g(query),
+        'source': 'fallback',
+        'fdc_id': None
+    }
+    confidence = FALLBACK_CONFIDENCE
+
+    search_results = fdc_api.search_foods(query, page_size=5)
+    if search_results:
+        food_item = search_results[0]
+        nutrition, nutrients_found = extract_per_100g(food_item)
+
+        # Only use FDC data if we found meaningful nutrition info
+        if nutrients_found >= 2:
+            record = {
+                'fdc_description': food_item.get('description', ingredient),
+                'per_100g': nutrition,
+                'source': 'fdc',
+                'fdc_id': food_item.get('fdcId')
+            }
+            confidence = search_confidence(query, record['fdc_description'], rank=0)
+    return record, confidence
+
+
+def lookup_ingredient(ingredient: str) -> Dict:
+    """
+    Resolve per-100g nutrition for an ingredient
+
+    The persistent resolution table is checked first and a hit skips search
+    entirely; otherwise the top FDC search result is used and recorded.
+    When the ingredient as typed finds nothing in FDC (or the search fails),
+    its spelling correction is looked up in the store, the cache and the
+    fallback table instead.
+
+    Returns:
+    - Dict with 'fdc_description', 'per_100g', 'source' ('fdc' or 'fallback')
+      and 'fdc_id' (None for fallback)
+    """
+    key = canonicalize_ingredient(ingredient)
+    store = get_resolution_store()
+
+    resolution = store.get(key)
+    if resolution is not None:
+        record = _record_from_resolution(resolution)
+        with _cache_lock:
+            _cache[key] = record
+        return _copy_record(record)
+
+    cached = get_cached_nutrition(ingredient)
+    if cached is not None:
+        return cached
+
+    query = ingredient_query(ingredient) or ingredient
+    try:
+        record, confidence = _search_fdc(ingredient, query)
+        search_failed = False
+    except Exception:
+        record = {
+            'fdc_description': ingredient,
+            'per_100g': get_fallback_per_100g(query),
+            'source': 'fallback',
+            'fdc_id': None
+        }
+        confidence = FALLBACK_CONFIDENCE
+        search_failed = True
+
+    # Typos ("quinao", "brocoli") miss FDC and land on the generic fallback. Their
+    # correction reuses a resolved record or the fallback table without another
+    # FDC call; found foods are never corrected
+    correction = correct_query(query) if record['source'] != 'fdc' else None
+    if correction and correction['changed']:
+        corrected_key = canonicalize_ingredient(correction['corrected'])
+        resolution = store.get(corrected_key)
+        with _cache_lock:
+            known = _record_from_resolution(resolution) if resolution is not None else _cache.get(corrected_key)
+            if known is not None:
+                _cache[key] = known
+        if known is not None:
+            return _copy_record(known)
+        record['per_100g'] = get_fallback_per_100g(correction['corrected'])
+        confidence = min(confidence, correction['confidence'])
+
+    if search_failed:
+        # Don't cache transient failures
+        return record
+
+    with _cache_lock:
+        _cache[key] = record
+    if key:
+        store.record(key, record['fdc_id'], record['fdc_description'], record['per_100g'], confidence,
+                     SOURCE_SEARCH_RANK if record['source'] == 'fdc' else SOURCE_FALLBACK)
+    return _copy_record(record)
+
+
+def nutrition_for_amount(ingredient_name: str, amount_grams: float, record: Optional[Dict] = None) -> Dict:
+    """Nutrition for an amount in grams, in the pages' ingredient format (record: a lookup record from resolve_ingredients)"""
+    if record is None:
+        record = lookup_ingredient(ingredient_name)
+    scaling_factor = amount_grams / 100
+    per_100g = record['per_100g']
+
+    nutrition = {
+        'name': record['fdc_description'] if record['source'] == 'fdc' else ingredient_name,
+        'amount': f"{amount_grams}g",
+        'calories': round(per_100g['calories'] * scaling_factor, 1),
+        'protein': round(per_100g['protein'] * scaling_factor, 1),
+        'carbs': round(per_100g['carbs'] * scaling_factor, 1),
+        'fat': round(per_100g['fat'] * scaling_factor, 1),
+        'fdc_verified': record['source'] == 'fdc'
+    }
+    if record['source'] == 'fdc':
+        nutrition['fdc_description'] = record['fdc_description']
+    return nutrition
+
+
+def collect_plan_ingredients(meal_plan: Dict) -> List[str]:
+    """Distinct ingredient strings across every day and meal of a (possibly partial) plan"""
+    seen = set()
+    ingredients = []
+    for day_plan in (meal_plan or {}).values():
+        if not isinstance(day_plan, dict):
+            continue
+        for meal in day_plan.get('meals', []):
+            for ingredient in meal.get('ingredients', []):
+                name = ingredient.get('item') or ingredient.get('name')
+                if name and name not in seen:
+                    seen.add(name)
+                    ingredients.append(name)
+    return ingredients
+
+
+def resolve_ingredients(ingredients: List[str], max_workers: int = 8) -> Dict[str, Dict]:
+    """
+    Resolve many ingredients in one concurrent batch
+
+    Each distinct canonical ingredient is looked up once, however many
+    spellings of it appear in the list.
+
+    Returns:
+    - Dict mapping each input ingredient string to its lookup record
+    """
+    keys = {ingredient: canonicalize_ingredient(ingredient) for ingredient in ingredients}
+
+    # One representative spelling per canonical key
+    representatives = {}
+    for ingredient, key in keys.items():
+        representatives.setdefault(key, ingredient)
+
+    if representatives:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(representatives)))) as executor:
+            records = dict(zip(representatives, executor.map(lookup_ingredient, representatives.values())))
+    else:
+        records = {}
+
+    return {ingredient: _copy_record(records[key]) for ingredient, key in keys.items()}
+
+
+def resolve_meal_plan(meal_plan: Dict, max_workers: int = 8) -> Dict[str, Dict]:
+    """Resolve the union of a plan's ingredients once (O(distinct ingredients) lookups)"""
+    return resolve_ingredients(collect_plan_ingredients(meal_plan), max_workers=max_workers)
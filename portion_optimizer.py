@@ -0,0 +1,665 @@
+"""
+Portion optimization for selected foods against meal macro targets.
+
+The DIY objective is a weighted sum of squared relative macro errors, which
+is a bounded linear least-squares problem in the portion sizes. The default
+backend solves it directly with scipy.optimize.lsq_linear on a precomputed
+weighted nutrient matrix; the original SLSQP path is kept for comparison.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, lsq_linear, milp, minimize
+
+MACRO_KEYS = ['calories', 'protein', 'carbs', 'fat']
+
+# Prioritize protein, then calories, then carbs/fat
+MACRO_WEIGHTS = {'calories': 1.0, 'protein': 1.5, 'carbs': 0.8, 'fat': 0.8}
+
+PORTION_BOUNDS = (10, 500)
+DEFAULT_PORTION = 100
+
+# Small pull toward the default portion so underdetermined meals (more foods
+# than macros) get a unique, realistic answer; far below macro error scale
+PORTION_REGULARIZATION = 1e-4
+
+
+def get_target_vector(target_macros: Dict) -> np.ndarray:
+    """Target macros as an array in MACRO_KEYS order"""
+    return np.array([
+        target_macros.get('calories', target_macros.get('target_calories', 0)),
+        target_macros.get('protein', 0),
+        target_macros.get('carbs', 0),
+        target_macros.get('fat', 0)
+    ], dtype=np.float64)
+
+
+def get_nutrient_matrix(selected_foods: List[Dict]) -> np.ndarray:
+    """Per-gram macros, shape (4, n_foods)"""
+    return np.array([[food[macro] for food in selected_foods] for macro in MACRO_KEYS], dtype=np.float64) / 100
+
+
+def get_row_scales(targets: np.ndarray) -> np.ndarray:
+    """sqrt(weight) / target for each macro (0 where the target is unset)"""
+    weights = np.array([MACRO_WEIGHTS[macro] for macro in MACRO_KEYS])
+    return np.where(targets > 0, np.sqrt(weights) / np.maximum(1, targets), 0.0)
+
+
+def build_weighted_system(selected_foods: List[Dict], target_macros: Dict,
+                          nutrients: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted least-squares system for the DIY objective
+
+    Parameters:
+    - nutrients: Optional precomputed per-gram macros (4, n_foods), e.g. from FoodCatalog.macro_matrix
+
+    Returns:
+    - (A, b) such that ||A x - b||^2 equals the weighted relative error sum
+    """
+    targets = get_target_vector(target_macros)
+    scales = get_row_scales(targets)
+    if nutrients is None:
+        nutrients = get_nutrient_matrix(selected_foods)
+    return nutrients * scales[:, None], targets * scales
+
+
+def weighted_error(selected_foods: List[Dict], target_macros: Dict, portions: np.ndarray) -> float:
+    """DIY objective value for the given portions"""
+    A, b = build_weighted_system(selected_foods, target_macros)
+    residual = A @ np.asarray(portions, dtype=np.float64) - b
+    return float(residual @ residual)
+
+
+def solve_portions_lsq(A: np.ndarray, b: np.ndarray, bounds: Tuple[float, float] = PORTION_BOUNDS) -> np.ndarray:
+    """Bounded least-squares portions for a weighted system"""
+    n_foods = A.shape[1]
+    reg = np.sqrt(PORTION_REGULARIZATION) / DEFAULT_PORTION
+    A_reg = np.vstack([A, reg * np.eye(n_foods)])
+    b_reg = np.concatenate([b, np.full(n_foods, reg * DEFAULT_PORTION)])
+    return lsq_linear(A_reg, b_reg, bounds=bounds, method='bvls').x
+
+
+def solve_portions_slsqp(A: np.ndarray, b: np.ndarray, bounds: Tuple[float, float] = PORTION_BOUNDS) -> np.ndarray:
+    """Original SLSQP path (finite-difference gradients, fixed 100g start)"""
+    def objective(portions):
+        residual = A @ portions - b
+        return residual @ residual
+
+    initial_portions = np.full(A.shape[1], float(DEFAULT_PORTION))
+    return minimize(objective, initial_portions, method='SLSQP', bounds=[bounds] * A.shape[1]).x
+
+
+SOLVERS = {
+    'lsq': solve_portions_lsq,
+    'slsqp': solve_portions_slsqp
+}
+
+
+def calculate_optimal_portions(selected_foods, target_macros, method: str = 'lsq', nutrients: np.ndarray = None):
+    """
+    Calculate optimal portion sizes for selected foods to meet target macros
+
+    Parameters:
+    - selected_foods: List of food dictionaries
+    - target_macros: Dict with keys 'calories', 'protein', 'carbs', 'fat'
+    - method: 'lsq' (bounded least squares) or 'slsqp'
+    - nutrients: Optional precomputed per-gram macros (4, n_foods)
+
+    Returns:
+    - Dict with food names as keys and portion sizes as values
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown portion solver: {method}")
+
+    if not selected_foods:
+        return {}
+
+    # If no targets set, return default portions
+    if not np.any(get_target_vector(target_macros) > 0):
+        return {food['name']: DEFAULT_PORTION for food in selected_foods}
+
+    try:
+        A, b = build_weighted_system(selected_foods, target_macros, nutrients)
+        optimal_portions = SOLVERS[method](A, b)
+        return {food['name']: round(portion) for food, portion in zip(selected_foods, optimal_portions)}
+    except Exception:
+        # If optimization fails, return default portions
+        return {food['name']: DEFAULT_PORTION for food in selected_foods}
+
+
+def reoptimize_portions(selected_foods: List[Dict], target_macros: Dict, current_portions: Dict,
+                        bounds: Tuple[float, float] = PORTION_BOUNDS, max_iterations: int = 30,
+                        nutrients: np.ndarray = None) -> Dict:
+    """
+    Re-solve a meal after foods were added or removed, starting from its current portions
+
+    Uses L-BFGS-B with an analytic gradient on the same objective as the LSQ
+    backend. Existing foods start at their current grams and new foods at the
+    default portion, so small edits converge in a few iterations.
+
+    Parameters:
+    - selected_foods: The meal's foods after the edit
+    - target_macros: Dict with keys 'calories', 'protein', 'carbs', 'fat'
+    - current_portions: {food name: grams} before the edit (may include removed foods)
+    - max_iterations: L-BFGS-B iteration cap
+    - nutrients: Optional precomputed per-gram macros (4, n_foods)
+
+    Returns:
+    - Dict with food names as keys and portion sizes as values
+    """
+    if not selected_foods:
+        return {}
+
+    if not np.any(get_target_vector(target_macros) > 0):
+        return {food['name']: current_portions.get(food['name'], DEFAULT_PORTION) for food in selected_foods}
+
+    A, b = build_weighted_system(selected_foods, target_macros, nutrients)
+    reg = PORTION_REGULARIZATION / DEFAULT_PORTION ** 2
+
+    # Precompute the normal equations so each iteration is O(n^2)
+    hessian = A.T @ A + reg * np.eye(len(selected_foods))
+    linear = A.T @ b + reg * DEFAULT_PORTION
+
+    def objective(portions):
+        gradient = hessian @ portions - linear
+        return portions @ (gradient - linear), 2 * gradient
+
+    initial_portions = np.clip(
+        [float(current_portions.get(food['name'], DEFAULT_PORTION)) for food in selected_foods],
+        bounds[0], bounds[1]
+    )
+    result = minimize(objective, initial_portions, method='L-BFGS-B', jac=True,
+                      bounds=[bounds] * len(selected_foods), options={'maxiter': max_iterations})
+    return {food['name']: round(portion) for food, portion in zip(selected_foods, result.x)}
+
+
+# Daily total rows are weighted this much above per-meal rows; 'hard' mode
+# uses a penalty large enough that totals are met whenever bounds allow
+DAILY_SOFT_WEIGHT = 2.0
+DAILY_HARD_WEIGHT = 1e4
+
+
+def optimize_day_portions(meals: List[Tuple[List[Dict], Dict]], daily_targets: Dict,
+                          daily_mode: str = 'hard', bounds: Tuple[float, float] = PORTION_BOUNDS) -> List[Dict]:
+    """
+    Optimize every meal's portions for a day in one block-structured problem
+
+    Parameters:
+    - meals: (selected_foods, meal_targets) per meal; meal targets are soft
+    - daily_targets: Dict with keys 'calories', 'protein', 'carbs', 'fat'
+    - daily_mode: 'hard' (daily totals enforced by a large penalty) or 'soft'
+    - bounds: Per-food portion bounds in grams
+
+    Returns:
+    - One {food name: grams} dict per meal, in input order
+    """
+    if daily_mode not in ('hard', 'soft'):
+        raise ValueError(f"Unknown daily mode: {daily_mode}")
+
+    sizes = [len(foods) for foods, _ in meals]
+    n_total = sum(sizes)
+    if n_total == 0:
+        return [{} for _ in meals]
+
+    # Per-meal soft targets: block-diagonal rows
+    meal_rows = np.zeros((4 * len(meals), n_total))
+    meal_rhs = np.zeros(4 * len(meals))
+    nutrient_blocks = []
+    offset = 0
+    for index, (foods, meal_targets) in enumerate(meals):
+        nutrients = get_nutrient_matrix(foods) if foods else np.zeros((4, 0))
+        nutrient_blocks.append(nutrients)
+        if foods:
+            A, b = build_weighted_system(foods, meal_targets)
+            meal_rows[4 * index:4 * index + 4, offset:offset + len(foods)] = A
+            meal_rhs[4 * index:4 * index + 4] = b
+        offset += len(foods)
+
+    # Daily totals: one dense row block across all meals
+    daily_vector = get_target_vector(daily_targets)
+    daily_scales = get_row_scales(daily_vector)
+    daily_weight = np.sqrt(DAILY_HARD_WEIGHT if daily_mode == 'hard' else DAILY_SOFT_WEIGHT)
+    daily_rows = daily_weight * np.hstack(nutrient_blocks) * daily_scales[:, None]
+    daily_rhs = daily_weight * daily_vector * daily_scales
+
+    reg = np.sqrt(PORTION_REGULARIZATION) / DEFAULT_PORTION
+    A_day = np.vstack([meal_rows, daily_rows, reg * np.eye(n_total)])
+    b_day = np.concatenate([meal_rhs, daily_rhs, np.full(n_total, reg * DEFAULT_PORTION)])
+    portions = lsq_linear(A_day, b_day, bounds=bounds, method='bvls').x
+
+    results = []
+    offset = 0
+    for (foods, _), size in zip(meals, sizes):
+        results.append({food['name']: round(portion) for food, portion in zip(foods, portions[offset:offset + size])})
+        offset += size
+    return results
+
+
+# Practical portion units: (keywords, grams per unit, unit label). Keywords match whole
+# words of the food name ("apple" is not in "Pineapple"). First match wins, so specific
+# foods come before the generic ones they contain (peanut butter / butter)
+KITCHEN_UNIT_RULES = [
+    (['egg white'], 33, 'egg white'),
+    (['egg'], 50, 'egg'),
+    (['peanut butter', 'almond butter', 'nut butter'], 16, 'tbsp'),
+    (['oil', 'butter', 'ghee'], 5, '5 g'),
+    (['almonds', 'walnuts', 'cashews', 'nuts', 'seeds'], 14, '2 tbsp'),
+    (['rice', 'quinoa', 'oats', 'pasta', 'couscous', 'barley', 'grain'], 40, '1/4 cup'),
+    (['bread', 'toast'], 30, 'slice'),
+    (['yogurt', 'milk', 'cottage cheese'], 60, '1/4 cup'),
+    (['banana', 'apple', 'orange', 'kiwi'], 50, '1/2 piece')
+]
+CATEGORY_UNITS = {'proteins': (25, '25 g')}
+DEFAULT_UNIT = (10, '10 g')
+
+# Leaves room in the 100 ms interactive budget for building the problem and the
+# rounding fallback when the solver stops without a solution
+KITCHEN_TIME_LIMIT = 0.05
+
+
+def _unit_words(text: str) -> Tuple[str, ...]:
+    """Lowercase words with a plural 's' dropped, so 'Eggs' matches 'egg' and 'oats' matches 'Oat'"""
+    return tuple(word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+                 for word in re.findall(r'[a-z]+', text.lower()))
+
+
+_KITCHEN_UNIT_WORDS = [([_unit_words(keyword) for keyword in keywords], grams, label)
+                       for keywords, grams, label in KITCHEN_UNIT_RULES]
+
+
+def get_kitchen_unit(food: Dict, category: str = None) -> Tuple[float, str]:
+    """Grams per practical unit for a food (food dict 'unit_grams'/'unit_label' override the table)"""
+    if food.get('unit_grams'):
+        return float(food['unit_grams']), food.get('unit_label', f"{food['unit_grams']:g} g")
+
+    words = _unit_words(food['name'])
+    for keywords, grams, label in _KITCHEN_UNIT_WORDS:
+        if any(words[i:i + len(keyword)] == keyword for keyword in keywords for i in range(len(words))):
+            return float(grams), label
+    grams, label = CATEGORY_UNITS.get(category or food.get('category'), DEFAULT_UNIT)
+    return float(grams), label
+
+
+def describe_portion(food: Dict, grams: float, category: str = None) -> str:
+    """Human portion label, e.g. '3 x egg (150 g)'"""
+    unit_grams, label = get_kitchen_unit(food, category)
+    count = grams / unit_grams
+    count_text = f"{count:.0f}" if abs(count - round(count)) < 1e-6 else f"{count:.2f}"
+    return f"{count_text} x {label} ({grams:.0f} g)"
+
+
+def calculate_kitchen_portions(selected_foods: List[Dict], target_macros: Dict,
+                               categories: Dict[str, str] = None,
+                               bounds: Tuple[float, float] = PORTION_BOUNDS,
+                               time_limit: float = KITCHEN_TIME_LIMIT) -> Dict:
+    """
+    Optimal portions restricted to whole kitchen units (mixed-integer)
+
+    Minimizes the weighted relative absolute macro error (a linear
+    objective, so scipy.optimize.milp applies) over integer unit counts.
+
+    Parameters:
+    - selected_foods: List of food dictionaries
+    - target_macros: Dict with keys 'calories', 'protein', 'carbs', 'fat'
+    - categories: Optional {food name: category} for unit defaults
+    - bounds: Portion bounds in grams (at least one unit is always allowed)
+    - time_limit: Solver time limit in seconds; the best solution found is used
+
+    Returns:
+    - Dict with food names as keys and portion sizes (unit multiples) in grams
+    """
+    if not selected_foods:
+        return {}
+
+    categories = categories or {}
+    units = np.array([get_kitchen_unit(food, categories.get(food['name']))[0] for food in selected_foods])
+    targets = get_target_vector(target_macros)
+    if not np.any(targets > 0):
+        return {food['name']: float(unit * max(1, round(DEFAULT_PORTION / unit))) for food, unit in zip(selected_foods, units)}
+
+    n_foods = len(selected_foods)
+    scales = np.where(targets > 0, np.array([MACRO_WEIGHTS[macro] for macro in MACRO_KEYS]) / np.maximum(1, targets), 0.0)
+
+    # Variables: unit counts (integer), then over/under deviation per macro
+    nutrients_per_unit = get_nutrient_matrix(selected_foods) * units[None, :]
+    cost = np.concatenate([np.zeros(n_foods), scales, scales])
+    deviation_rows = np.hstack([nutrients_per_unit, -np.eye(4), np.eye(4)])
+    constraints = LinearConstraint(deviation_rows, targets, targets)
+
+    lower_counts = np.maximum(1, np.ceil(bounds[0] / units))
+    upper_counts = np.maximum(lower_counts, np.floor(bounds[1] / units))
+    variable_bounds = Bounds(np.concatenate([lower_counts, np.zeros(8)]),
+                             np.concatenate([upper_counts, np.full(8, np.inf)]))
+    integrality = np.concatenate([np.ones(n_foods), np.zeros(8)])
+
+    result = milp(cost, constraints=constraints, integrality=integrality, bounds=variable_bounds,
+                  options={'time_limit': time_limit})
+    if result.x is None:
+        # No integer solution within the time limit: round the continuous optimum to units
+        continuous = calculate_optimal_portions(selected_foods, target_macros)
+        counts = np.clip([round(continuous[food['name']] / unit) for food, unit in zip(selected_foods, units)],
+                         lower_counts, upper_counts)
+    else:
+        counts = np.round(result.x[:n_foods])
+
+    return {food['name']: float(count * unit) for food, count, unit in zip(selected_foods, counts, units)}
+
+
+# Floors/ceilings are squared-hinge penalties weighted well above target rows
+BOUND_PENALTY_WEIGHT = 50.0
+CANDIDATE_BOUNDS = (0, 500)
+
+
+def build_sparse_nutrient_matrix(foods: List[Dict], nutrients: List[str]):
+    """Per-gram nutrients as a sparse (n_nutrients, n_foods) CSR matrix; missing values are 0"""
+    rows, cols, values = [], [], []
+    for col, food in enumerate(foods):
+        for row, nutrient in enumerate(nutrients):
+            value = food.get(nutrient) or 0
+            if value:
+                rows.append(row)
+                cols.append(col)
+                values.append(value / 100)
+    return sparse.csr_matrix((values, (rows, cols)), shape=(len(nutrients), len(foods)))
+
+
+def solve_nutrient_portions(nutrient_matrix, targets: np.ndarray, weights: np.ndarray,
+                            floors: np.ndarray, ceilings: np.ndarray,
+                            bounds: Tuple[float, float] = CANDIDATE_BOUNDS,
+                            initial_portions: np.ndarray = None, max_iterations: int = 200) -> np.ndarray:
+    """
+    Bounded QP over an arbitrary nutrient set
+
+    Minimizes weighted squared relative target error plus squared-hinge
+    penalties for floors and ceilings, with L-BFGS-B and an analytic
+    gradient. Each evaluation is two sparse mat-vecs, so hundreds of
+    candidate foods stay cheap.
+
+    Parameters:
+    - nutrient_matrix: Per-gram nutrients, shape (n_nutrients, n_foods), dense or sparse
+    - targets, weights: Per-nutrient targets (NaN = no target) and weights
+    - floors, ceilings: Per-nutrient minimums/maximums (NaN = none)
+    - bounds: Per-food portion bounds in grams
+    - initial_portions: Warm start (defaults to the lower bound)
+
+    Returns:
+    - Portions in grams, one per food
+    """
+    n_foods = nutrient_matrix.shape[1]
+    has_target = ~np.isnan(targets) & (np.nan_to_num(targets) > 0)
+    target_scale = np.where(has_target, np.sqrt(np.nan_to_num(weights)) / np.maximum(1, np.nan_to_num(targets)), 0.0)
+    target_values = np.nan_to_num(targets)
+
+    has_floor = ~np.isnan(floors)
+    has_ceiling = ~np.isnan(ceilings)
+    floor_values = np.nan_to_num(floors)
+    ceiling_values = np.nan_to_num(ceilings)
+    floor_scale = np.where(has_floor, np.sqrt(BOUND_PENALTY_WEIGHT) / np.maximum(1, floor_values), 0.0)
+    ceiling_scale = np.where(has_ceiling, np.sqrt(BOUND_PENALTY_WEIGHT) / np.maximum(1, ceiling_values), 0.0)
+
+    def objective(portions):
+        totals = nutrient_matrix @ portions
+        target_residual = (totals - target_values) * target_scale
+        floor_residual = np.minimum(0.0, totals - floor_values) * floor_scale
+        ceiling_residual = np.maximum(0.0, totals - ceiling_values) * ceiling_scale
+
+        value = target_residual @ target_residual + floor_residual @ floor_residual + ceiling_residual @ ceiling_residual
+        total_gradient = 2 * (target_residual * target_scale + floor_residual * floor_scale + ceiling_residual * ceiling_scale)
+        return value, nutrient_matrix.T @ total_gradient
+
+    if initial_portions is None:
+        initial_portions = np.full(n_foods, float(bounds[0]))
+    initial_portions = np.clip(np.asarray(initial_portions, dtype=np.float64), bounds[0], bounds[1])
+
+    result = minimize(objective, initial_portions, method='L-BFGS-B', jac=True,
+                      bounds=[bounds] * n_foods, options={'maxiter': max_iterations})
+    return result.x
+
+
+def _nutrient_vectors(nutrient_targets: Dict, floors: Dict, ceilings: Dict, weights: Dict):
+    """Nutrient order plus aligned target/weight/floor/ceiling vectors (NaN = unset)"""
+    floors = floors or {}
+    ceilings = ceilings or {}
+    weights = weights or {}
+    nutrients = list(dict.fromkeys(list(nutrient_targets) + list(floors) + list(ceilings)))
+
+    def vector(values):
+        return np.array([values.get(nutrient, np.nan) for nutrient in nutrients], dtype=np.float64)
+
+    weight_vector = np.array([weights.get(nutrient, MACRO_WEIGHTS.get(nutrient, 1.0)) for nutrient in nutrients])
+    return nutrients, vector(nutrient_targets), weight_vector, vector(floors), vector(ceilings)
+
+
+def optimize_nutrient_portions(foods: List[Dict], nutrient_targets: Dict,
+                               floors: Dict = None, ceilings: Dict = None, weights: Dict = None,
+                               bounds: Tuple[float, float] = CANDIDATE_BOUNDS,
+                               current_portions: Dict = None) -> Dict:
+    """
+    Portions for any nutrient set (e.g. macros plus a fiber floor and sodium cap)
+
+    Parameters:
+    - foods: Food dicts with per-100g values for any nutrient keys
+    - nutrient_targets: {nutrient: target}
+    - floors: {nutrient: minimum}, e.g. {'fiber': 30}
+    - ceilings: {nutrient: maximum}, e.g. {'sodium': 2300}
+    - weights: {nutrient: weight}; macros default to MACRO_WEIGHTS, others to 1.0
+    - bounds: Per-food grams; the default lower bound of 0 lets candidates drop out
+    - current_portions: Optional {food name: grams} warm start
+
+    Returns:
+    - Dict with food names as keys and portion sizes as values
+    """
+    if not foods:
+        return {}
+
+    nutrients, targets, weight_vector, floor_vector, ceiling_vector = _nutrient_vectors(nutrient_targets, floors, ceilings, weights)
+    initial_portions = None
+    if current_portions:
+        initial_portions = np.array([current_portions.get(food['name'], bounds[0]) for food in foods], dtype=np.float64)
+
+    portions = solve_nutrient_portions(
+        build_sparse_nutrient_matrix(foods, nutrients), targets, weight_vector, floor_vector, ceiling_vector,
+        bounds=bounds, initial_portions=initial_portions
+    )
+    return {food['name']: round(portion) for food, portion in zip(foods, portions)}
+
+
+def optimize_matrix_portions(matrix, rows: np.ndarray, nutrient_targets: Dict,
+                             floors: Dict = None, ceilings: Dict = None, weights: Dict = None,
+                             bounds: Tuple[float, float] = CANDIDATE_BOUNDS) -> np.ndarray:
+    """
+    Same solve over rows of a shared NutrientMatrix (see nutrient_matrix.py)
+
+    Returns:
+    - Portions in grams aligned with rows
+    """
+    nutrients, targets, weight_vector, floor_vector, ceiling_vector = _nutrient_vectors(nutrient_targets, floors, ceilings, weights)
+    per_gram = sparse.csr_matrix(matrix.submatrix(rows, nutrients).T / 100)
+    return solve_nutrient_portions(per_gram, targets, weight_vector, floor_vector, ceiling_vector, bounds=bounds)
+
+
+# Ingredient factor adjustment (the AI pages' {meal_key}_adjustments sliders)
+FACTOR_BOUNDS = (0.1, 3.0)
+
+# Small pull toward the current factors so the fix changes as little as needed
+FACTOR_REGULARIZATION = 1e-3
+
+
+def solve_adjustment_factors_batch(meals: List[Tuple[np.ndarray, Dict, np.ndarray]],
+                                   bounds: Tuple[float, float] = FACTOR_BOUNDS,
+                                   step: float = None) -> List[np.ndarray]:
+    """
+    Per-ingredient factors for many meals in one batched solve (solve_factors_vectorized)
+
+    Parameters:
+    - meals: (base_nutrition, target_macros, current_factors) per meal, where
+      base_nutrition is (n_ingredients, 4) macros at factor 1.0 in MACRO_KEYS order
+    - bounds: Factor bounds (the slider range)
+    - step: Optional slider step to round factors to
+
+    Returns:
+    - One factor array per meal, in input order
+    """
+    sizes = [len(current_factors) for _, _, current_factors in meals]
+    n_ingredients = max(sizes, default=0)
+    if n_ingredients == 0:
+        return [np.zeros(0) for _ in meals]
+
+    # Pad every meal to the widest one; padding is masked out of the solve
+    base = np.zeros((len(meals), n_ingredients, 4))
+    targets = np.zeros((len(meals), 4))
+    current = np.zeros((len(meals), n_ingredients))
+    mask = np.zeros((len(meals), n_ingredients), dtype=bool)
+    for index, ((base_nutrition, target_macros, current_factors), size) in enumerate(zip(meals, sizes)):
+        base[index, :size] = np.asarray(base_nutrition, dtype=np.float64).reshape(size, 4)
+        targets[index] = get_target_vector(target_macros)
+        current[index, :size] = current_factors
+        mask[index, :size] = True
+
+    factors = solve_factors_vectorized(base, targets, current, mask,
+                                       np.full(mask.shape, bounds[0]), np.full(mask.shape, bounds[1]))
+    if step:
+        factors = np.clip(np.round(factors / step) * step, bounds[0], bounds[1])
+
+    return [factors[index, :size] for index, size in enumerate(sizes)]
+
+
+def optimize_adjustment_factors_batch(meals: List[Tuple[Dict, Dict, Dict]],
+                                      bounds: Tuple[float, float] = FACTOR_BOUNDS,
+                                      step: float = None) -> List[Dict]:
+    """
+    Dict front end for solve_adjustment_factors_batch
+
+    Parameters:
+    - meals: (current_factors {name: factor}, base_nutrition {name: macros at factor 1.0},
+      target_macros) per meal
+
+    Returns:
+    - One {name: factor} dict per meal
+    """
+    arrays = []
+    for current_factors, base_nutrition, target_macros in meals:
+        names = list(current_factors)
+        base = np.array([[base_nutrition[name].get(macro, 0) for macro in MACRO_KEYS] for name in names], dtype=np.float64)
+        arrays.append((base.reshape(len(names), 4), target_macros, np.array([current_factors[name] for name in names], dtype=np.float64)))
+
+    solved = solve_adjustment_factors_batch(arrays, bounds=bounds, step=step)
+    return [
+        {name: round(float(factor), 2) for name, factor in zip(current_factors, factors)}
+        for (current_factors, _, _), factors in zip(meals, solved)
+    ]
+
+
+def optimize_adjustment_factors(current_factors: Dict, base_nutrition: Dict, target_macros: Dict,
+                                bounds: Tuple[float, float] = FACTOR_BOUNDS, step: float = None) -> Dict:
+    """Per-ingredient factors for one meal (see optimize_adjustment_factors_batch)"""
+    return optimize_adjustment_factors_batch([(current_factors, base_nutrition, target_macros)], bounds, step)[0]
+
+
+def solve_factors_vectorized(base_nutrition: np.ndarray, targets: np.ndarray, current_factors: np.ndarray,
+                             mask: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                             max_iterations: int = None, regularization: float = FACTOR_REGULARIZATION) -> np.ndarray:
+    """
+    Batched bounded least-squares factors for many independent meals at once
+
+    Minimizes the weighted squared relative macro error plus a small pull toward
+    current_factors with a batched active-set method: every iteration is one
+    stacked np.linalg.solve over all meals, so hundreds of meals cost about as
+    much as a few.
+
+    Parameters:
+    - base_nutrition: (M, n, 4) macros at factor 1.0, meals padded to n ingredients
+    - targets: (M, 4) meal targets in MACRO_KEYS order
+    - current_factors: (M, n) factors to stay close to
+    - mask: (M, n) True for real ingredients, False for padding
+    - lower, upper: (M, n) per-ingredient factor bounds
+    - regularization: pull toward current_factors (FACTOR_REGULARIZATION by default)
+
+    Returns:
+    - (M, n) factors (0 for padding)
+    """
+    n_meals, n_ingredients, _ = base_nutrition.shape
+    weights = np.array([MACRO_WEIGHTS[macro] for macro in MACRO_KEYS])
+    scales = np.where(targets > 0, np.sqrt(weights) / np.maximum(1, targets), 0.0)
+
+    A = scales[:, :, None] * np.transpose(base_nutrition, (0, 2, 1))
+    identity = np.eye(n_ingredients)
+    hessian = np.einsum('mki,mkj->mij', A, A) + regularization * identity
+    linear = np.einsum('mki,mk->mi', A, targets * scales) + regularization * np.clip(current_factors, lower, upper)
+
+    # Padding is fixed at 0; real ingredients start free
+    fixed = ~mask
+    fixed_values = np.zeros((n_meals, n_ingredients))
+    factors = np.zeros((n_meals, n_ingredients))
+
+    for _ in range(max_iterations or 3 * n_ingredients + 3):
+        free = ~fixed
+        reduced = hessian * (free[:, :, None] & free[:, None, :]) + identity * fixed[:, :, None]
+        rhs = np.where(fixed, fixed_values, linear - np.einsum('mij,mj->mi', hessian, np.where(fixed, fixed_values, 0.0)))
+        factors = np.linalg.solve(reduced, rhs[:, :, None])[:, :, 0]
+
+        # Fix free variables that left their bounds
+        below = free & (factors < lower - 1e-9)
+        above = free & (factors > upper + 1e-9)
+        if below.any() or above.any():
+            fixed = fixed | below | above
+            fixed_values = np.where(below, lower, np.where(above, upper, fixed_values))
+            continue
+
+        # Release bound variables whose gradient points back inside (one per meal)
+        gradient = np.einsum('mij,mj->mi', hessian, factors) - linear
+        at_bound = fixed & mask
+        wrong_sign = at_bound & (((fixed_values == lower) & (gradient < -1e-12)) | ((fixed_values == upper) & (gradient > 1e-12)))
+        if not wrong_sign.any():
+            break
+        release = np.zeros_like(wrong_sign)
+        meals_to_release = np.flatnonzero(wrong_sign.any(axis=1))
+        release[meals_to_release, np.argmax(np.abs(gradient) * wrong_sign, axis=1)[meals_to_release]] = True
+        fixed = fixed & ~release
+
+    return np.where(mask, np.clip(factors, lower, upper), 0.0)
+
+
+def optimize_portions_batch(meals: List[Tuple[List[Dict], Dict]],
+                            bounds: Tuple[float, float] = PORTION_BOUNDS) -> List[Dict]:
+    """
+    calculate_optimal_portions for many independent meals in one vectorized solve
+
+    Portions are solved as factors of DEFAULT_PORTION with solve_factors_vectorized,
+    using the same objective and regularization as the per-meal LSQ path.
+
+    Parameters:
+    - meals: (selected_foods, meal_targets) per meal
+
+    Returns:
+    - One {food name: grams} dict per meal, in input order
+    """
+    sizes = [len(foods) for foods, _ in meals]
+    n_ingredients = max(sizes, default=0)
+    if n_ingredients == 0:
+        return [{} for _ in meals]
+
+    base_nutrition = np.zeros((len(meals), n_ingredients, 4))
+    targets = np.array([get_target_vector(meal_targets) for _, meal_targets in meals]).reshape(len(meals), 4)
+    mask = np.zeros((len(meals), n_ingredients), dtype=bool)
+    for index, (foods, _) in enumerate(meals):
+        if foods:
+            base_nutrition[index, :len(foods)] = get_nutrient_matrix(foods).T * DEFAULT_PORTION
+            mask[index, :len(foods)] = True
+
+    lower = np.full(mask.shape, bounds[0] / DEFAULT_PORTION)
+    upper = np.full(mask.shape, bounds[1] / DEFAULT_PORTION)
+    factors = solve_factors_vectorized(base_nutrition, targets, np.ones(mask.shape), mask, lower, upper,
+                                       regularization=PORTION_REGULARIZATION)
+
+    results = []
+    for (foods, _), meal_targets, meal_factors in zip(meals, targets, factors):
+        # Like calculate_optimal_portions, meals without targets keep the default portion
+        if not np.any(meal_targets > 0):
+            results.append({food['name']: DEFAULT_PORTION for food in foods})
+        else:
+            results.append({food['name']: round(factor * DEFAULT_PORTION) for food, factor in zip(foods, meal_factors)})
+    return results
@@ -0,0 +1,243 @@
+"""
+What-if evaluation of a meal plan against many daily target vectors.
+
+The plan's meals (AI plan ingredients or DIY food selections) are turned into
+per-meal portion problems once, then every scenario x meal problem is solved
+in a single batched pass. Each scenario gets day-level accuracy against its
+targets and a portion table.
+
+Usage:
+    problems = ai_plan_problems(st.session_state['ai_meal_plan'])
+    results = evaluate_scenarios(problems, calorie_sweep(day_targets, range(1800, 3001, 100)))
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ingredient_amounts import parse_amount_to_grams
+from portion_optimizer import FACTOR_BOUNDS, MACRO_KEYS, PORTION_BOUNDS, solve_factors_vectorized
+
+TOLERANCE = 0.03
+
+
+def _meal_shares(meal_targets: List[Dict], meal_totals: List[np.ndarray]) -> np.ndarray:
+    """
+    Each meal's share of the day per macro
+
+    Uses the meals' own targets when every meal has them, otherwise the
+    meals' current nutrition, otherwise an even split.
+    """
+    n_meals = len(meal_totals)
+    for values in (
+        [[float((targets or {}).get(macro, 0) or 0) for macro in MACRO_KEYS] for targets in meal_targets],
+        meal_totals
+    ):
+        values = np.array(values, dtype=float).reshape(n_meals, len(MACRO_KEYS))
+        day_totals = values.sum(axis=0)
+        if np.all(day_totals > 0):
+            return values / day_totals
+    return np.full((n_meals, len(MACRO_KEYS)), 1.0 / max(1, n_meals))
+
+
+def ai_plan_problems(ai_meal_plan: Dict, resolved: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """
+    Portion problems from an AI meal plan (day -> {'meals': [...]})
+
+    Ingredient amounts are the factor-1.0 portions; per-100g macros come from
+    a plan-level resolution (resolve_meal_plan) when given.
+    """
+    if resolved is None:
+        from nutrition_lookup import resolve_meal_plan
+        resolved = resolve_meal_plan(ai_meal_plan)
+
+    problems = []
+    for day, day_plan in (ai_meal_plan or {}).items():
+        if not isinstance(day_plan, dict):
+            continue
+
+        day_problems = []
+        for meal_index, meal in enumerate(day_plan.get('meals', [])):
+            names, grams, per_100g = [], [], []
+            for ingredient in meal.get('ingredients', []):
+                name = ingredient.get('item') or ingredient.get('name')
+                record = resolved.get(name)
+                if not name or not record:
+                    continue
+                names.append(name)
+                grams.append(parse_amount_to_grams(str(ingredient.get('amount', ''))))
+                per_100g.append([record['per_100g'].get(macro, 0) for macro in MACRO_KEYS])
+            if not names:
+                continue
+
+            grams = np.array(grams, dtype=float)
+            day_problems.append({
+                'day': day,
+                'meal': meal.get('name', f"Meal {meal_index + 1}"),
+                'ingredients': names,
+                'grams': grams,
+                'base': np.array(per_100g, dtype=float) * grams[:, None] / 100,
+                'bounds': (np.full(len(names), FACTOR_BOUNDS[0]), np.full(len(names), FACTOR_BOUNDS[1])),
+                'meal_targets': meal.get('total_macros')
+            })
+        problems.extend(_with_shares(day_problems))
+    return problems
+
+
+def diy_plan_problems(meal_plan: Dict, selected_foods: List[Dict], portions: Optional[Dict] = None,
+                      meal_shares: Optional[Dict] = None) -> List[Dict]:
+    """
+    Portion problems from a DIY meal plan (day -> meal_num -> *_sources lists)
+
+    Parameters:
+    - selected_foods: food dicts with per-100g macros
+    - portions: optional {(day, meal_num): {food name: grams}}; defaults to 100 g each
+    - meal_shares: optional {day: {meal_num: {'protein': share, 'carbs': ..., 'fat': ...}}} as
+      returned by the page's meal distribution; calories follow the protein share
+    """
+    foods_by_name = {food['name']: food for food in selected_foods}
+    portions = portions or {}
+    meal_shares = meal_shares or {}
+
+    problems = []
+    for day, meals in (meal_plan or {}).items():
+        day_problems = []
+        for meal_num in sorted(meals.keys()):
+            meal_data = meals[meal_num]
+            names = [name for category in ['protein_sources', 'carb_sources', 'fat_sources', 'vegetable_sources', 'fruit_sources']
+                     for name in meal_data.get(category, []) if name in foods_by_name]
+            if not names:
+                continue
+
+            meal_portions = portions.get((day, meal_num), {})
+            grams = np.array([float(meal_portions.get(name, 100)) for name in names])
+            per_100g = np.array([[float(foods_by_name[name].get(macro, 0)) for macro in MACRO_KEYS] for name in names])
+
+            share = meal_shares.get(day, {}).get(meal_num)
+            day_problems.append({
+                'day': day,
+                'meal': meal_num,
+                'ingredients': names,
+                'grams': grams,
+                'base': per_100g * grams[:, None] / 100,
+                'bounds': (PORTION_BOUNDS[0] / grams, PORTION_BOUNDS[1] / grams),
+                'meal_targets': {'calories': share['protein'], **share} if share else None
+            })
+        problems.extend(_with_shares(day_problems))
+    return problems
+
+
+def _with_shares(day_problems: List[Dict]) -> List[Dict]:
+    shares = _meal_shares([problem['meal_targets'] for problem in day_problems],
+                          [problem['base'].sum(axis=0) for problem in day_problems])
+    for problem, share in zip(day_problems, shares):
+        problem['share'] = share
+    return day_problems
+
+
+def calorie_sweep(base_targets: Dict, calories: List[float]) -> List[Dict]:
+    """Scenarios at each calorie level, holding protein and splitting the rest like the base carbs/fat"""
+    base_carb_energy = base_targets.get('carbs', 0) * 4
+    base_fat_energy = base_targets.get('fat', 0) * 9
+    remaining_base = base_carb_energy + base_fat_energy
+
+    scenarios = []
+    for calorie_level in calories:
+        remaining = max(0.0, calorie_level - base_targets.get('protein', 0) * 4)
+        carb_share = base_carb_energy / remaining_base if remaining_base > 0 else 0.5
+        scenarios.append({
+            'calories': float(calorie_level),
+            'protein': float(base_targets.get('protein', 0)),
+            'carbs': remaining * carb_share / 4,
+            'fat': remaining * (1 - carb_share) / 9
+        })
+    return scenarios
+
+
+def _scenario_day_targets(scenario: Dict, day: str) -> np.ndarray:
+    """A scenario is either one daily target dict for every day or a {day: targets} mapping"""
+    targets = scenario if any(macro in scenario for macro in MACRO_KEYS) else scenario.get(day, {})
+    return np.array([float(targets.get(macro, 0) or 0) for macro in MACRO_KEYS])
+
+
+def evaluate_scenarios(problems: List[Dict], scenarios: List[Dict], tolerance: float = TOLERANCE) -> List[Dict]:
+    """
+    Re-solve every meal's portions for every scenario in one batched pass
+
+    Returns:
+    - One result per scenario with 'targets', per-day 'days' accuracy
+      (targets, totals, deviation_pct, within_tolerance), 'within_tolerance_rate',
+      'max_deviation_pct' and a 'portions' table of rows
+      (day, meal, ingredient, factor, grams and macros)
+    """
+    if not problems or not scenarios:
+        return []
+
+    n_problems, n_scenarios = len(problems), len(scenarios)
+    width = max(len(problem['ingredients']) for problem in problems)
+
+    # Pad the meal problems once, then tile them across scenarios
+    base = np.zeros((n_problems, width, len(MACRO_KEYS)))
+    mask = np.zeros((n_problems, width), dtype=bool)
+    lower = np.zeros((n_problems, width))
+    upper = np.zeros((n_problems, width))
+    for p, problem in enumerate(problems):
+        n = len(problem['ingredients'])
+        base[p, :n] = problem['base']
+        mask[p, :n] = True
+        lower[p, :n], upper[p, :n] = problem['bounds']
+
+    days = list(dict.fromkeys(problem['day'] for problem in problems))
+    day_index = np.array([days.index(problem['day']) for problem in problems])
+    shares = np.array([problem['share'] for problem in problems])
+    day_targets = np.array([[_scenario_day_targets(scenario, day) for day in days] for scenario in scenarios])
+    meal_targets = day_targets[:, day_index, :] * shares[None, :, :]
+
+    factors = solve_factors_vectorized(
+        np.tile(base, (n_scenarios, 1, 1)),
+        meal_targets.reshape(-1, len(MACRO_KEYS)),
+        np.tile(mask.astype(float), (n_scenarios, 1)),
+        np.tile(mask, (n_scenarios, 1)),
+        np.tile(lower, (n_scenarios, 1)),
+        np.tile(upper, (n_scenarios, 1))
+    ).reshape(n_scenarios, n_problems, width)
+
+    ingredient_nutrition = factors[:, :, :, None] * base[None, :, :, :]
+    meal_totals = ingredient_nutrition.sum(axis=2)
+    day_totals = np.zeros((n_scenarios, len(days), len(MACRO_KEYS)))
+    np.add.at(day_totals, (slice(None), day_index), meal_totals)
+    deviation = np.where(day_targets > 0, np.abs(day_totals - day_targets) / np.maximum(day_targets, 1e-9), 0.0)
+    within = np.all(deviation <= tolerance, axis=2)
+
+    results = []
+    for s, scenario in enumerate(scenarios):
+        day_results = {
+            day: {
+                'targets': dict(zip(MACRO_KEYS, np.round(day_targets[s, d], 1).tolist())),
+                'totals': dict(zip(MACRO_KEYS, np.round(day_totals[s, d], 1).tolist())),
+                'deviation_pct': dict(zip(MACRO_KEYS, np.round(deviation[s, d] * 100, 2).tolist())),
+                'within_tolerance': bool(within[s, d])
+            }
+            for d, day in enumerate(days)
+        }
+
+        portions = []
+        for p, problem in enumerate(problems):
+            for i, name in enumerate(problem['ingredients']):
+                portions.append({
+                    'day': problem['day'],
+                    'meal': problem['meal'],
+                    'ingredient': name,
+                    'factor': round(float(factors[s, p, i]), 3),
+                    'grams': round(float(factors[s, p, i] * problem['grams'][i]), 1),
+                    **{macro: round(float(ingredient_nutrition[s, p, i, k]), 1) for k, macro in enumerate(MACRO_KEYS)}
+                })
+
+        results.append({
+            'targets': scenario,
+            'days': day_results,
+            'within_tolerance_rate': round(float(within[s].mean()), 4),
+            'max_deviation_pct': round(float(deviation[s].max() * 100), 2),
+            'portions': portions
+        })
+    return results
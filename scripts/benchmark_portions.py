@@ -0,0 +1,122 @@
+"""
+Benchmark the DIY portion solvers (bounded least squares vs SLSQP, plus
+the mixed-integer kitchen-unit mode), and time the sparse multi-nutrient
+solver over a large candidate pool.
+
+Builds seeded random meals from the DIY food lists with targets taken from a
+random "reference" portioning, then reports solve time and weighted error.
+
+Usage:
+    python scripts/benchmark_portions.py --meals 200 --seed 7
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+from food_catalog import get_food_options, COMMON_VEGETABLE_SOURCES, COMMON_FRUIT_SOURCES
+from portion_optimizer import (
+    SOLVERS,
+    calculate_kitchen_portions,
+    calculate_optimal_portions,
+    optimize_nutrient_portions,
+    weighted_error
+)
+
+
+def build_meals(n_meals, seed):
+    """Seeded (foods, targets) pairs: one protein, carb and fat source plus 0-2 produce items"""
+    rng = np.random.default_rng(seed)
+    protein_sources, carb_sources, fat_sources = get_food_options()
+    produce = COMMON_VEGETABLE_SOURCES + COMMON_FRUIT_SOURCES
+
+    meals = []
+    for _ in range(n_meals):
+        foods = [
+            protein_sources[rng.integers(len(protein_sources))],
+            carb_sources[rng.integers(len(carb_sources))],
+            fat_sources[rng.integers(len(fat_sources))]
+        ]
+        for index in rng.choice(len(produce), size=rng.integers(0, 3), replace=False):
+            foods.append(produce[index])
+
+        reference = rng.uniform(30, 250, size=len(foods))
+        targets = {
+            macro: float(sum(food[macro] * grams / 100 for food, grams in zip(foods, reference)))
+            for macro in ['calories', 'protein', 'carbs', 'fat']
+        }
+        meals.append((foods, targets))
+    return meals
+
+
+def run_solver(method, meals):
+    timings = []
+    errors = []
+    for foods, targets in meals:
+        start = time.perf_counter()
+        if method == 'units':
+            portions = calculate_kitchen_portions(foods, targets)
+        else:
+            portions = calculate_optimal_portions(foods, targets, method=method)
+        timings.append(time.perf_counter() - start)
+        errors.append(weighted_error(foods, targets, [portions[food['name']] for food in foods]))
+    return np.array(timings) * 1000, np.array(errors)
+
+
+def run_multi_nutrient(n_candidates, seed):
+    """Time one day-level solve over random candidates with a fiber floor and sodium cap"""
+    rng = np.random.default_rng(seed)
+    foods = [{
+        'name': f"candidate {i}",
+        'calories': rng.uniform(20, 600),
+        'protein': rng.uniform(0, 30),
+        'carbs': rng.uniform(0, 70),
+        'fat': rng.uniform(0, 40),
+        'fiber': rng.uniform(0, 10) if rng.random() < 0.5 else 0,
+        'sodium': rng.uniform(0, 800)
+    } for i in range(n_candidates)]
+
+    start = time.perf_counter()
+    portions = optimize_nutrient_portions(
+        foods, {'calories': 2000, 'protein': 150, 'carbs': 200, 'fat': 70},
+        floors={'fiber': 30}, ceilings={'sodium': 2300}
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+
+    totals = {nutrient: sum(food[nutrient] * portions[food['name']] / 100 for food in foods) for nutrient in ['fiber', 'sodium']}
+    return elapsed, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DIY portion solvers")
+    parser.add_argument('--meals', type=int, default=200, help="Number of random meals")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed")
+    parser.add_argument('--candidates', type=int, default=400, help="Candidate foods for the multi-nutrient solve")
+    args = parser.parse_args()
+
+    meals = build_meals(args.meals, args.seed)
+    print(f"{args.meals} meals, seed {args.seed}")
+    print(f"{'solver':<8} {'median ms':>10} {'p95 ms':>8} {'mean err':>10} {'max err':>10}")
+
+    unit_timings = None
+    for method in list(SOLVERS) + ['units']:
+        timings, errors = run_solver(method, meals)
+        if method == 'units':
+            unit_timings = timings
+        print(f"{method:<8} {np.median(timings):>10.2f} {np.percentile(timings, 95):>8.2f} "
+              f"{errors.mean():>10.5f} {errors.max():>10.5f}")
+
+    # Kitchen units are interactive if p95 stays under 100 ms
+    print(f"units p95 {'within' if np.percentile(unit_timings, 95) < 100 else 'OVER'} the 100 ms interactive budget")
+
+    elapsed, totals = run_multi_nutrient(args.candidates, args.seed)
+    print(f"multi-nutrient, {args.candidates} candidates: {elapsed:.1f} ms "
+          f"(fiber {totals['fiber']:.1f} g >= 30, sodium {totals['sodium']:.0f} mg <= 2300)")
+
+
+if __name__ == '__main__':
+    main()
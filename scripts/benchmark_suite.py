@@ -0,0 +1,241 @@
+"""
+Portion-optimizer benchmark suite.
+
+Generates reproducible meal fixtures (2-12 foods from common_foods_database
+and the fallback table, targets sampled from realistic day_specific_nutrition
+ranges) and runs every portion backend and adjustment method on them, plus
+one batched what-if scenario sweep.
+Reports median/p95 solve time, per-macro error and the share of meals within
+the pages' 3% tolerance, and writes the results as JSON.
+
+Usage:
+    python scripts/benchmark_suite.py --fixtures 300 --seed 42 --out data/benchmarks/portion_benchmark.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+from common_foods_database import get_all_foods
+from fallback_nutrition import FALLBACK_NUTRITION_DB
+from portion_optimizer import (
+    FACTOR_BOUNDS,
+    MACRO_KEYS,
+    calculate_kitchen_portions,
+    calculate_optimal_portions,
+    optimize_adjustment_factors,
+    optimize_nutrient_portions,
+    reoptimize_portions
+)
+from scenario_evaluator import calorie_sweep, evaluate_scenarios
+
+TOLERANCE = 0.03
+
+# Realistic day_specific_nutrition ranges
+DAY_CALORIES = (1600, 3400)
+PROTEIN_PER_CALORIE = (0.06, 0.09)  # g protein per kcal (~24-36% of energy)
+FAT_SHARE = (0.22, 0.35)
+MEALS_PER_DAY = (3, 5)
+
+
+def food_pool():
+    """Foods with per-100g macros from the local database and the fallback table"""
+    pool = {name: nutrition for name, nutrition in get_all_foods().items()}
+    for name, nutrition in FALLBACK_NUTRITION_DB.items():
+        pool.setdefault(name.title(), nutrition)
+    return [{'name': name, **{macro: float(nutrition.get(macro, 0)) for macro in MACRO_KEYS}}
+            for name, nutrition in pool.items()]
+
+
+def sample_meal_targets(rng):
+    """One meal's targets from a sampled day"""
+    calories = rng.uniform(*DAY_CALORIES)
+    protein = calories * rng.uniform(*PROTEIN_PER_CALORIE)
+    fat = calories * rng.uniform(*FAT_SHARE) / 9
+    carbs = max(0.0, (calories - protein * 4 - fat * 9) / 4)
+    meals = rng.integers(MEALS_PER_DAY[0], MEALS_PER_DAY[1] + 1)
+    return {'calories': calories / meals, 'protein': protein / meals, 'carbs': carbs / meals, 'fat': fat / meals}
+
+
+def generate_fixtures(n_fixtures, seed):
+    """Seeded (foods, targets) meal fixtures with 2-12 foods each"""
+    rng = np.random.default_rng(seed)
+    pool = food_pool()
+    fixtures = []
+    for _ in range(n_fixtures):
+        n_foods = int(rng.integers(2, min(12, len(pool)) + 1))
+        foods = [pool[i] for i in rng.choice(len(pool), size=n_foods, replace=False)]
+        fixtures.append((foods, sample_meal_targets(rng)))
+    return fixtures
+
+
+def macro_totals(foods, portions):
+    return {macro: sum(food[macro] * portions[food['name']] / 100 for food in foods) for macro in MACRO_KEYS}
+
+
+def relative_errors(totals, targets):
+    return {macro: abs(totals[macro] - targets[macro]) / targets[macro] if targets[macro] > 0 else 0.0
+            for macro in MACRO_KEYS}
+
+
+# Portion backends: (foods, targets) -> {name: grams}
+PORTION_BACKENDS = {
+    'lsq': lambda foods, targets: calculate_optimal_portions(foods, targets, method='lsq'),
+    'slsqp': lambda foods, targets: calculate_optimal_portions(foods, targets, method='slsqp'),
+    'kitchen_units': calculate_kitchen_portions,
+    'warm_start': lambda foods, targets: reoptimize_portions(foods, targets, {}),
+    'multi_nutrient': lambda foods, targets: optimize_nutrient_portions(foods, targets, bounds=(10, 500))
+}
+
+
+def calorie_scale(current_factors, base_nutrition, targets):
+    """Previous Quick Fix: scale everything by target/current calories, clamped to [0.5, 2.0]"""
+    calories = sum(base_nutrition[name]['calories'] * factor for name, factor in current_factors.items())
+    scale = max(0.5, min(2.0, targets['calories'] / calories)) if calories > 0 else 1.0
+    return {name: factor * scale for name, factor in current_factors.items()}
+
+
+def average_ratio(current_factors, base_nutrition, targets):
+    """Previous auto_adjust_portions: scale everything by the mean macro ratio"""
+    totals = {macro: sum(base_nutrition[name][macro] * factor for name, factor in current_factors.items())
+              for macro in MACRO_KEYS}
+    ratios = [targets[macro] / totals[macro] for macro in MACRO_KEYS if totals[macro] > 0 and targets[macro] > 0]
+    scale = sum(ratios) / len(ratios) if ratios else 1.0
+    return {name: factor * scale for name, factor in current_factors.items()}
+
+
+# Adjustment methods: (current_factors, base_nutrition, targets) -> {name: factor}
+ADJUSTMENT_METHODS = {
+    'calorie_scale': calorie_scale,
+    'average_ratio': average_ratio,
+    'factor_lsq': lambda current, base, targets: optimize_adjustment_factors(current, base, targets, step=0.05)
+}
+
+
+def summarize(timings_ms, errors):
+    """Timing and accuracy statistics for one method"""
+    errors_by_macro = {macro: np.array([error[macro] for error in errors]) for macro in MACRO_KEYS}
+    within = [all(error[macro] <= TOLERANCE for macro in MACRO_KEYS) for error in errors]
+    return {
+        'runs': len(timings_ms),
+        'median_ms': round(float(np.median(timings_ms)), 3),
+        'p95_ms': round(float(np.percentile(timings_ms, 95)), 3),
+        'mean_error_pct': {macro: round(float(values.mean() * 100), 2) for macro, values in errors_by_macro.items()},
+        'p95_error_pct': {macro: round(float(np.percentile(values, 95) * 100), 2) for macro, values in errors_by_macro.items()},
+        'within_tolerance_rate': round(float(np.mean(within)), 4)
+    }
+
+
+def run_portion_backends(fixtures):
+    results = {}
+    for name, backend in PORTION_BACKENDS.items():
+        timings, errors = [], []
+        for foods, targets in fixtures:
+            start = time.perf_counter()
+            portions = backend(foods, targets)
+            timings.append((time.perf_counter() - start) * 1000)
+            errors.append(relative_errors(macro_totals(foods, portions), targets))
+        results[name] = summarize(timings, errors)
+    return results
+
+
+def run_adjustment_methods(fixtures, seed):
+    """Adjustment fixtures: AI-style ingredient amounts (factor 1.0) that miss calories by up to 30%"""
+    rng = np.random.default_rng(seed + 1)
+    problems = []
+    for foods, targets in fixtures:
+        grams = rng.uniform(20, 250, size=len(foods))
+        calories = sum(food['calories'] * g / 100 for food, g in zip(foods, grams))
+        if calories > 0:
+            grams *= targets['calories'] * rng.uniform(0.7, 1.3) / calories
+        base_nutrition = {food['name']: {macro: food[macro] * g / 100 for macro in MACRO_KEYS}
+                          for food, g in zip(foods, grams)}
+        problems.append(({food['name']: 1.0 for food in foods}, base_nutrition, targets))
+
+    results = {}
+    for name, method in ADJUSTMENT_METHODS.items():
+        timings, errors = [], []
+        for current_factors, base_nutrition, targets in problems:
+            start = time.perf_counter()
+            factors = method(current_factors, base_nutrition, targets)
+            timings.append((time.perf_counter() - start) * 1000)
+
+            # Factors outside the slider range can't be shown, so score them clamped
+            factors = {k: min(FACTOR_BOUNDS[1], max(FACTOR_BOUNDS[0], v)) for k, v in factors.items()}
+            totals = {macro: sum(base_nutrition[k][macro] * f for k, f in factors.items()) for macro in MACRO_KEYS}
+            errors.append(relative_errors(totals, targets))
+        results[name] = summarize(timings, errors)
+    return results
+
+
+def run_scenario_sweep(fixtures, n_scenarios=36, days=7, meals_per_day=4):
+    """Time one batched what-if sweep over a week built from the fixtures"""
+    problems = []
+    for index, (foods, targets) in enumerate(fixtures[:days * meals_per_day]):
+        grams = np.full(len(foods), 100.0)
+        problems.append({
+            'day': f"Day {index // meals_per_day + 1}",
+            'meal': index % meals_per_day + 1,
+            'ingredients': [food['name'] for food in foods],
+            'grams': grams,
+            'base': np.array([[food[macro] for macro in MACRO_KEYS] for food in foods]),
+            'bounds': (np.full(len(foods), 0.1), np.full(len(foods), 5.0)),
+            'share': np.full(len(MACRO_KEYS), 1.0 / meals_per_day)
+        })
+
+    scenarios = calorie_sweep({'calories': 2400, 'protein': 180, 'carbs': 250, 'fat': 75},
+                              np.linspace(DAY_CALORIES[0], DAY_CALORIES[1], n_scenarios))
+    start = time.perf_counter()
+    results = evaluate_scenarios(problems, scenarios)
+    elapsed = (time.perf_counter() - start) * 1000
+    return {
+        'scenarios': n_scenarios,
+        'meal_problems': len(problems),
+        'elapsed_ms': round(elapsed, 2),
+        'mean_within_tolerance_rate': round(float(np.mean([result['within_tolerance_rate'] for result in results])), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the portion-optimizer benchmark suite")
+    parser.add_argument('--fixtures', type=int, default=300, help="Number of meal fixtures")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--out', default=os.path.join('data', 'benchmarks', 'portion_benchmark.json'),
+                        help="JSON results path")
+    args = parser.parse_args()
+
+    fixtures = generate_fixtures(args.fixtures, args.seed)
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'fixtures': args.fixtures,
+        'seed': args.seed,
+        'tolerance': TOLERANCE,
+        'portion_backends': run_portion_backends(fixtures),
+        'adjustment_methods': run_adjustment_methods(fixtures, args.seed),
+        'scenario_sweep': run_scenario_sweep(fixtures)
+    }
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for section in ['portion_backends', 'adjustment_methods']:
+        print(f"\n{section}")
+        print(f"{'method':<16} {'median ms':>10} {'p95 ms':>8} {'within 3%':>10}  mean error % (cal/pro/carb/fat)")
+        for name, stats in report[section].items():
+            errors = '/'.join(f"{stats['mean_error_pct'][macro]:.1f}" for macro in MACRO_KEYS)
+            print(f"{name:<16} {stats['median_ms']:>10.2f} {stats['p95_ms']:>8.2f} "
+                  f"{stats['within_tolerance_rate']:>10.1%}  {errors}")
+    sweep = report['scenario_sweep']
+    print(f"\nscenario sweep: {sweep['scenarios']} scenarios x {sweep['meal_problems']} meals in {sweep['elapsed_ms']:.1f} ms")
+    print(f"\nWrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Measure what one DIY meal planning rerun sends to the browser.
+
+Runs the page headless with Streamlit's AppTest on a seeded session (day
+targets for the week, three foods picked for every meal of the selected day)
+and reports the element and widget counts, the serialized element payload
+and the script run time. Run it against two checkouts to compare versions.
+With --slider it also times moving a portion slider in the first meal, which
+reruns only that meal's fragment (a full run on pages without fragments).
+
+Usage:
+    python scripts/measure_diy_page.py --meals 6 --runs 5 --slider
+    python scripts/measure_diy_page.py --page /path/to/other/checkout/streamlit_pages/7_DIY_Meal_Planning.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.element_tree import Widget
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + '/../'))
+from food_catalog import get_food_catalog
+from selected_foods import MEAL_SOURCE_KEYS
+
+DEFAULT_PAGE = os.path.abspath(os.path.dirname(__file__) + '/../streamlit_pages/7_DIY_Meal_Planning.py')
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_TARGETS = {'calories': 2400, 'protein': 180, 'carbs': 250, 'fat': 75}
+
+
+def seed_session(app: AppTest, total_meals: int):
+    """Day targets for the week and one protein, carb and fat food in every Monday meal"""
+    catalog = get_food_catalog()
+    picks = {key: catalog.category_foods(category)[0]
+             for key, category in [('protein_sources', 'proteins'), ('carb_sources', 'carbs'), ('fat_sources', 'fats')]}
+
+    app.session_state['user_info'] = {'name': 'Benchmark'}
+    app.session_state['day_specific_nutrition'] = {day: dict(DAY_TARGETS) for day in DAYS}
+    app.session_state['selected_foods'] = list(picks.values())
+    app.session_state['meal_plan'] = {'Monday': {
+        meal_num: {key: [picks[key]['name']] if key in picks else [] for key in MEAL_SOURCE_KEYS}
+        for meal_num in range(1, total_meals + 1)
+    }}
+
+
+def walk(node):
+    yield node
+    for child in getattr(node, 'children', {}).values():
+        yield from walk(child)
+
+
+def run_fragments(app: AppTest, fragment_ids):
+    """Run only the given fragments, as the browser does after a widget inside one changes"""
+    # AppTest always reruns the whole script, so hand the fragment queue to the runner directly
+    rerun_data = local_script_runner.RerunData
+    local_script_runner.RerunData = lambda **kwargs: rerun_data(fragment_id_queue=list(fragment_ids), **kwargs)
+    try:
+        app.run()
+    finally:
+        local_script_runner.RerunData = rerun_data
+
+
+def measure(page: str, total_meals: int, runs: int, slider: bool = False):
+    app = AppTest.from_file(page, default_timeout=120)
+    seed_session(app, total_meals)
+
+    # The meal count widget has no key; set it once it exists
+    app.run()
+    app.number_input[0].set_value(total_meals)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    nodes = [node for node in walk(app._tree) if getattr(node, 'proto', None) is not None]
+    result = {
+        'elements': len(nodes),
+        'widgets': sum(isinstance(node, Widget) for node in nodes),
+        'widget_types': Counter(type(node).__name__ for node in nodes if isinstance(node, Widget)),
+        'payload_bytes': sum(node.proto.ByteSize() for node in nodes),
+        'median_ms': float(np.median(timings[1:] or timings)) * 1000
+    }
+
+    if slider:
+        # Fragments register in render order, so the first one is meal 1
+        first_meal = list(app._fragment_storage._fragments)[:1]
+        portion_slider = next(s for s in app.slider if s.key.startswith(f"portion_slider_{DAYS[0]}_1_"))
+        slider_timings = []
+        for step in range(runs):
+            portion_slider.set_value(100 + 10 * (step + 1))
+            start = time.perf_counter()
+            run_fragments(app, first_meal)
+            slider_timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+        result['slider_ms'] = float(np.median(slider_timings[1:] or slider_timings)) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure one DIY meal planning rerun")
+    parser.add_argument('--page', default=DEFAULT_PAGE, help="Page script to run")
+    parser.add_argument('--meals', type=int, default=4, help="Meals planned for Monday")
+    parser.add_argument('--runs', type=int, default=5, help="Reruns to time (the first warms up)")
+    parser.add_argument('--slider', action='store_true', help="Also time a portion slider move in the first meal")
+    args = parser.parse_args()
+
+    result = measure(args.page, args.meals, args.runs, args.slider)
+    print(f"{args.page}, {args.meals} meals")
+    print(f"elements {result['elements']}, widgets {result['widgets']}, "
+          f"payload {result['payload_bytes'] / 1024:.1f} KiB, median rerun {result['median_ms']:.0f} ms")
+    if 'slider_ms' in result:
+        print(f"median slider move {result['slider_ms']:.0f} ms")
+    print("widgets by type: " + ", ".join(f"{name} {count}" for name, count in result['widget_types'].most_common()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Name-indexed registry of the foods picked on the DIY page.
+
+Replaces the plain selected_foods list: membership, lookup and per-meal
+filtering are dict/set operations instead of list scans, while iteration
+keeps the order foods were first picked (portion sliders are keyed by
+position, so the order has to stay stable).
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+# meal_plan[day][meal_num] keys in display order, with their catalog category
+MEAL_SOURCE_KEYS = {
+    'protein_sources': 'proteins',
+    'carb_sources': 'carbs',
+    'fat_sources': 'fats',
+    'vegetable_sources': 'vegetables',
+    'fruit_sources': 'fruits'
+}
+
+DEFAULT_MEAL_PLAN_PATH = os.path.join('data', 'meal_plan.json')
+
+
+class SelectedFoodRegistry:
+    """Ordered, name-keyed store of selected food dicts with category sets"""
+
+    def __init__(self, foods: Optional[Iterable[Dict]] = None):
+        self._foods = {}
+        self._position = {}
+        self._categories = {category: set() for category in MEAL_SOURCE_KEYS.values()}
+        for food in foods or []:
+            self.add(food, food.get('category'))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._foods
+
+    def __len__(self) -> int:
+        return len(self._foods)
+
+    def __iter__(self):
+        return iter(self._foods.values())
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self._foods.get(name)
+
+    def add(self, food: Dict, category: Optional[str] = None) -> bool:
+        """Add a food unless one with the same name is already selected"""
+        name = food['name']
+        if category in self._categories:
+            self._categories[category].add(name)
+        if name in self._foods:
+            return False
+        self._position[name] = len(self._position)
+        self._foods[name] = food
+        return True
+
+    def names(self, category: Optional[str] = None) -> Set[str]:
+        """Selected names, optionally limited to one category"""
+        return set(self._categories[category]) if category else set(self._foods)
+
+    def foods_for(self, names: Iterable[str]) -> List[Dict]:
+        """Selected foods among names, in selection order"""
+        present = {name for name in names if name in self._foods}
+        return [self._foods[name] for name in sorted(present, key=self._position.__getitem__)]
+
+    def to_list(self) -> List[Dict]:
+        """Foods in selection order, each tagged with its category if known"""
+        categories = {name: category for category, names in self._categories.items() for name in names}
+        return [dict(food, category=categories[name]) if name in categories else dict(food)
+                for name, food in self._foods.items()]
+
+    @classmethod
+    def from_list(cls, foods: List[Dict]) -> 'SelectedFoodRegistry':
+        return cls(foods)
+
+
+def meal_selection(meal_data: Dict) -> Set[str]:
+    """All food names selected for one meal"""
+    return {name for key in MEAL_SOURCE_KEYS for name in meal_data.get(key, [])}
+
+
+def meal_categories(meal_data: Dict) -> Dict[str, str]:
+    """Catalog category of every food selected for one meal (the first list it appears in)"""
+    categories = {}
+    for key, category in MEAL_SOURCE_KEYS.items():
+        for name in meal_data.get(key, []):
+            categories.setdefault(name, category)
+    return categories
+
+
+def save_meal_plan(meal_plan: Dict, registry: SelectedFoodRegistry, path: str = DEFAULT_MEAL_PLAN_PATH):
+    """Write the meal plan and selected foods with a stable key order"""
+    payload = {
+        'version': 1,
+        'meal_plan': {
+            day: {str(meal_num): {key: list(meal_data.get(key, [])) for key in MEAL_SOURCE_KEYS}
+                  for meal_num, meal_data in sorted(meals.items())}
+            for day, meals in meal_plan.items()
+        },
+        'selected_foods': registry.to_list()
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def load_meal_plan(path: str = DEFAULT_MEAL_PLAN_PATH, catalog=None):
+    """
+    Read a saved meal plan
+
+    Parameters:
+    - catalog: FoodCatalog used to rebuild the selected foods for files written
+      before the registry, which only hold the meal plan (foods it doesn't know,
+      such as USDA search results, can't be restored)
+
+    Returns:
+    - (meal_plan with int meal numbers, SelectedFoodRegistry)
+    """
+    with open(path, 'r') as f:
+        payload = json.load(f)
+
+    if payload.get('version'):
+        meal_plan = payload.get('meal_plan', {})
+        registry = SelectedFoodRegistry.from_list(payload.get('selected_foods', []))
+    else:
+        meal_plan = payload
+        registry = SelectedFoodRegistry()
+
+    meal_plan = {day: {int(meal_num): {key: list(meal_data.get(key, [])) for key in MEAL_SOURCE_KEYS}
+                       for meal_num, meal_data in meals.items()}
+                 for day, meals in meal_plan.items()}
+
+    if not payload.get('version') and catalog is not None:
+        for meals in meal_plan.values():
+            for meal_data in meals.values():
+                for key, category in MEAL_SOURCE_KEYS.items():
+                    for name in meal_data[key]:
+                        row = catalog.row_index.get(name)
+                        if row is not None:
+                            registry.add(catalog.foods[row], category)
+    return meal_plan, registry
@@ -0,0 +1,210 @@
+"""
+Symmetric-delete spelling correction for ingredient queries.
+
+Every vocabulary word is stored under all of its deletes (up to
+MAX_EDIT_DISTANCE characters removed from its first PREFIX_LENGTH
+characters). A misspelled word generates its own deletes, and any shared
+delete is a candidate within the edit distance. Candidates are confirmed
+with an exact distance check, so a correction costs a few dictionary lookups
+instead of a scan over the vocabulary.
+
+The vocabulary comes from the common foods database, the fallback table,
+the ni-recipes ingredients, the FDC mirror names in the nutrient matrix and
+cached FDC descriptions.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+# Shorter words are too ambiguous to index ("egg" vs "fig")
+MIN_WORD_LENGTH = 4
+
+# Real foods missing from the vocabulary sit one edit from other foods ("taro" /
+# "taco", "millet" / "fillet"), so only longer words are corrected, words under
+# LONG_WORD_LENGTH letters by one edit at most, and the first letter has to match
+MIN_CORRECTION_LENGTH = 5
+LONG_WORD_LENGTH = 8
+
+# Corrections below this confidence leave the query unchanged
+MIN_CONFIDENCE = 0.75
+
+
+def tokenize(text: str):
+    return re.findall(r'[a-z]+', (text or '').lower())
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once), capped at max_distance + 1"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def max_correction_distance(word: str) -> int:
+    """Edits allowed when correcting a word (0: leave it alone)"""
+    if len(word) < MIN_CORRECTION_LENGTH:
+        return 0
+    return 1 if len(word) < LONG_WORD_LENGTH else MAX_EDIT_DISTANCE
+
+
+def deletes(word: str, max_distance: int = MAX_EDIT_DISTANCE) -> Set[str]:
+    """The word's prefix with up to max_distance characters removed (including the prefix itself)"""
+    results = {word[:PREFIX_LENGTH]}
+    frontier = {word[:PREFIX_LENGTH]}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        results |= frontier
+    return results
+
+
+class SpellingIndex:
+    """Word counts plus the symmetric-delete map over them"""
+
+    def __init__(self, words: Iterable[str]):
+        self.counts = Counter(word for word in words if len(word) >= MIN_WORD_LENGTH)
+        self._deletes = {}
+        for word in self.counts:
+            for delete in deletes(word):
+                self._deletes.setdefault(delete, []).append(word)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.counts
+
+    def lookup(self, word: str) -> Tuple[str, float]:
+        """
+        Best correction for one word
+
+        Candidates start with the same letter and are within max_correction_distance.
+
+        Returns:
+        - (correction, confidence); known, short or uncorrectable words come back
+          unchanged with confidence 1.0 (known) or 0.0 (no candidate)
+        """
+        if word in self.counts:
+            return word, 1.0
+        max_distance = max_correction_distance(word)
+        if not max_distance:
+            return word, 0.0
+
+        best_distance = max_distance + 1
+        best = []
+        seen = set()
+        for delete in deletes(word, max_distance):
+            for candidate in self._deletes.get(delete, ()):
+                if candidate in seen or candidate[0] != word[0]:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, min(best_distance, max_distance))
+                if distance < best_distance:
+                    best_distance, best = distance, [candidate]
+                elif distance == best_distance <= max_distance:
+                    best.append(candidate)
+
+        if not best:
+            return word, 0.0
+
+        # Closer and more common is more likely; ties at the same distance share the confidence
+        best.sort(key=lambda candidate: (-self.counts[candidate], candidate))
+        share = self.counts[best[0]] / sum(self.counts[candidate] for candidate in best)
+        return best[0], round((1 - best_distance / len(word)) * share, 3)
+
+    def correct(self, text: str, min_confidence: float = MIN_CONFIDENCE) -> Dict:
+        """
+        Correct every word of a query
+
+        Only purely alphabetic words are corrected; numbers and the like pass through.
+
+        Returns:
+        - Dict with 'query', 'corrected' (lowercase words joined by spaces),
+          'changed' and 'confidence' (lowest confidence among corrected words)
+        """
+        words = (text or '').lower().split()
+        corrected = []
+        confidence = 1.0
+        for word in words:
+            correction, word_confidence = self.lookup(word) if word.isalpha() else (word, 0.0)
+            if correction != word and word_confidence >= min_confidence:
+                corrected.append(correction)
+                confidence = min(confidence, word_confidence)
+            else:
+                corrected.append(word)
+
+        changed = corrected != words
+        return {
+            'query': text,
+            'corrected': ' '.join(corrected),
+            'changed': changed,
+            'confidence': confidence if changed else 1.0
+        }
+
+
+def collect_vocabulary(recipes_path: Optional[str] = None, catalog=None, fallback_store=None):
+    """
+    Words from every canonical food source
+
+    Parameters:
+    - catalog, fallback_store: the food catalog and fallback store to read
+      (default: the shared ones)
+    """
+    # Imported here: these modules pull in the nutrition lookup that uses this index
+    import fallback_nutrition
+    from cache_warmup import DEFAULT_RECIPES_PATH, collect_recipe_ingredients
+    from food_catalog import get_food_catalog
+    from nutrient_matrix import get_nutrient_matrix
+    from nutrition_lookup import cached_records
+
+    names = collect_recipe_ingredients(recipes_path or DEFAULT_RECIPES_PATH) + list((catalog or get_food_catalog()).names)
+    names += list((fallback_store or fallback_nutrition.FALLBACK_STORE).table)
+
+    matrix = get_nutrient_matrix()
+    if matrix is not None:
+        names += matrix.names
+    names += [record['fdc_description'] for record in cached_records().values() if record['source'] == 'fdc']
+
+    return [word for name in names for word in tokenize(name)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_spelling_index() -> SpellingIndex:
+    """Process-wide spelling index, built on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SpellingIndex(collect_vocabulary())
+        return _index
+
+
+def set_spelling_index(index: SpellingIndex):
+    """Swap in a rebuilt index"""
+    global _index
+    with _index_lock:
+        _index = index
+
+
+def correct_query(text: str, min_confidence: float = MIN_CONFIDENCE) -> Dict:
+    """Spell-correct an ingredient query against the shared index (see SpellingIndex.correct)"""
+    return get_spelling_index().correct(text, min_confidence)
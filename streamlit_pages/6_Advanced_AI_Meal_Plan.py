@@ -2,15 +2,17 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-import re
 from datetime import datetime, time
 import copy
 from typing import Dict, List
 
 # Import our modules
 import utils
-import fdc_api
 import macro_validator
+from cache_warmup import start_background_warmup
+from catalog_manager import start_catalog_watcher
+from portion_optimizer import optimize_adjustment_factors, optimize_adjustment_factors_batch
+from meal_plan_candidates import generate_best_of_n, score_meal_plan
 from nutrition_cache import NutritionCache
 from pdf_export import export_meal_plan_pdf
 from session_manager import add_session_controls
@@ -201,33 +203,32 @@ Return JSON with:
     except:
         return {"meal_structure": [], "rationale": "Error parsing meal structure"}
 
-def generate_quick_meal_plan(day_targets, user_context, dietary_context, schedule_info, openai_client):
-    """Intelligent meal generation with dynamic structure based on schedule and workout timing"""
-    
-    # Step 1: Generate optimal meal structure based on schedule and workout timing
-    meal_structure_result = step1_generate_meal_structure(
-        day_targets, user_context, dietary_context, schedule_info, openai_client
-    )
-    
-    meal_structure = meal_structure_result.get('meal_structure', [])
-    structure_rationale = meal_structure_result.get('rationale', '')
-    
-    if not meal_structure:
-        st.error("Failed to generate meal structure")
-        return {}
-    
-    # Extract total targets for validation
-    if 'daily_totals' in day_targets:
-        total_cal = day_targets['daily_totals'].get('calories', 2624)
-        total_protein = day_targets['daily_totals'].get('protein', 200)
-        total_carbs = day_targets['daily_totals'].get('carbs', 250)
-        total_fat = day_targets['daily_totals'].get('fat', 80)
-    else:
-        # Direct structure from day_specific_nutrition
-        total_cal = day_targets.get('calories', 2624)
-        total_protein = day_targets.get('protein', 200)
-        total_carbs = day_targets.get('carbs', 250)
-        total_fat = day_targets.get('fat', 80)
+def get_quick_plan_totals(day_targets):
+    """Daily totals from either a daily_totals wrapper or day_specific_nutrition"""
+    totals = day_targets.get('daily_totals', day_targets)
+    return {
+        'calories': totals.get('calories', 2624),
+        'protein': totals.get('protein', 200),
+        'carbs': totals.get('carbs', 250),
+        'fat': totals.get('fat', 80)
+    }
+
+def get_structure_meal_targets(meal_structure):
+    """Per-meal macro targets from a meal structure, in meal order"""
+    return [{
+        'calories': meal['target_calories'],
+        'protein': meal['target_protein'],
+        'carbs': meal['target_carbs'],
+        'fat': meal['target_fat']
+    } for meal in meal_structure]
+
+def build_quick_meal_plan_prompt(day_targets, user_context, dietary_context, meal_structure, structure_rationale):
+    """System message and prompt for a full-day generation over a fixed meal structure"""
+    totals = get_quick_plan_totals(day_targets)
+    total_cal = totals['calories']
+    total_protein = totals['protein']
+    total_carbs = totals['carbs']
+    total_fat = totals['fat']
     
     # Build meal structure details for prompt
     meal_structure_text = []
@@ -309,6 +310,10 @@ Return JSON:
     meal_count = len(meal_structure)
     system_msg = f"You are a precision nutritionist. Create meal plans that hit macro targets within ±3% accuracy. CRITICAL: Use exact portions and calculations. ALWAYS include a 'type' field (meal/snack) and 'workout_relation' field for each entry. Generate exactly {meal_count} meals matching the provided structure with their specific macro targets."
     
+    return system_msg, prompt
+
+def request_quick_meal_plan(system_msg, prompt, openai_client, temperature=0.1):
+    """One full-day generation; safe to run in a worker thread (no Streamlit calls)"""
     response = openai_client.chat.completions.create(
         model="gpt-4o",
         messages=[
@@ -316,66 +321,83 @@ Return JSON:
             {"role": "user", "content": prompt}
         ],
         response_format={"type": "json_object"},
-        temperature=0.1,
+        temperature=temperature,
         max_tokens=4000
     )
-    
-    try:
-        result = safe_json_parse(response.choices[0].message.content, {})
-        
-        # Validate macro accuracy - check both daily totals AND per-meal accuracy
-        validation_passed = True
-        
-        if result.get('daily_totals'):
-            daily_totals = result['daily_totals']
-            daily_deviations = {}
-            
-            # Check daily totals
-            for macro in ['calories', 'protein', 'carbs', 'fat']:
-                target = total_cal if macro == 'calories' else (total_protein if macro == 'protein' else (total_carbs if macro == 'carbs' else total_fat))
-                actual = daily_totals.get(macro, 0)
-                if target > 0:
-                    deviation = abs(actual - target) / target
-                    daily_deviations[macro] = deviation
-                    if deviation > 0.03:  # Over 3% tolerance
-                        st.warning(f"⚠️ Daily {macro.title()} deviation: {deviation*100:.1f}% (Target: {target}, Actual: {actual})")
-                        validation_passed = False
-            
-            # Check per-meal accuracy against meal_structure targets
-            meals = result.get('meals', [])
-            for i, meal in enumerate(meals):
-                meal_macros = meal.get('total_macros', {})
-                meal_name = meal.get('name', f'Meal {i+1}')
-                
-                # Get target macros from meal_structure (matches by index)
-                if i < len(meal_structure):
-                    structure_meal = meal_structure[i]
-                    targets = {
-                        'calories': structure_meal['target_calories'],
-                        'protein': structure_meal['target_protein'],
-                        'carbs': structure_meal['target_carbs'],
-                        'fat': structure_meal['target_fat']
-                    }
-                    
-                    # Validate each macro for this meal against its specific target
-                    for macro, target in targets.items():
-                        actual = meal_macros.get(macro, 0)
-                        if target > 0:
-                            deviation = abs(actual - target) / target
-                            if deviation > 0.03:
-                                st.warning(f"⚠️ {meal_name} {macro} deviation: {deviation*100:.1f}% (Target: {target}, Actual: {actual})")
-                                validation_passed = False
-            
-            # Set validation flag
-            result['accuracy_validated'] = validation_passed
-            if not validation_passed:
-                st.error("❌ Macro accuracy validation failed - regeneration needed")
-            else:
-                st.success("✅ All macros within ±3% tolerance!")
-        
+    return safe_json_parse(response.choices[0].message.content if response else "", {})
+
+def report_meal_plan_score(result, plan_score):
+    """Show a plan's deviation warnings and record whether it passed"""
+    if not result.get('daily_totals'):
         return result
-    except:
-        return safe_json_parse(response.choices[0].message.content if response else "", {})
+    
+    for warning in plan_score['warnings']:
+        st.warning(f"⚠️ {warning}")
+    
+    result['accuracy_validated'] = plan_score['passed']
+    if not plan_score['passed']:
+        st.error("❌ Macro accuracy validation failed - regeneration needed")
+    else:
+        st.success("✅ All macros within ±3% tolerance!")
+    return result
+
+def generate_quick_meal_plan(day_targets, user_context, dietary_context, schedule_info, openai_client):
+    """Intelligent meal generation with dynamic structure based on schedule and workout timing"""
+    
+    # Step 1: Generate optimal meal structure based on schedule and workout timing
+    meal_structure_result = step1_generate_meal_structure(
+        day_targets, user_context, dietary_context, schedule_info, openai_client
+    )
+    
+    meal_structure = meal_structure_result.get('meal_structure', [])
+    structure_rationale = meal_structure_result.get('rationale', '')
+    
+    if not meal_structure:
+        st.error("Failed to generate meal structure")
+        return {}
+    
+    system_msg, prompt = build_quick_meal_plan_prompt(
+        day_targets, user_context, dietary_context, meal_structure, structure_rationale
+    )
+    result = request_quick_meal_plan(system_msg, prompt, openai_client)
+    
+    # Validate macro accuracy - check both daily totals AND per-meal accuracy
+    plan_score = score_meal_plan(result, get_quick_plan_totals(day_targets), get_structure_meal_targets(meal_structure))
+    return report_meal_plan_score(result, plan_score)
+
+def generate_best_of_n_meal_plan(day_targets, user_context, dietary_context, schedule_info, openai_client, n_candidates=3):
+    """
+    Best-of-N full-day generation: one shared meal structure, N concurrent
+    candidates at varied temperatures, first one within tolerance wins
+    
+    Returns:
+    - (plan, stats) where stats counts completed/failed candidates
+    """
+    meal_structure_result = step1_generate_meal_structure(
+        day_targets, user_context, dietary_context, schedule_info, openai_client
+    )
+    
+    meal_structure = meal_structure_result.get('meal_structure', [])
+    structure_rationale = meal_structure_result.get('rationale', '')
+    
+    if not meal_structure:
+        st.error("Failed to generate meal structure")
+        return {}, {}
+    
+    system_msg, prompt = build_quick_meal_plan_prompt(
+        day_targets, user_context, dietary_context, meal_structure, structure_rationale
+    )
+    daily_targets = get_quick_plan_totals(day_targets)
+    meal_targets = get_structure_meal_targets(meal_structure)
+    
+    result, plan_score, stats = generate_best_of_n(
+        lambda temperature: request_quick_meal_plan(system_msg, prompt, openai_client, temperature),
+        lambda candidate: score_meal_plan(candidate, daily_targets, meal_targets),
+        n_candidates=n_candidates
+    )
+    if not result:
+        return {}, stats
+    return report_meal_plan_score(result, plan_score), stats
 
 def step2_generate_meal_concepts(meal_structure, user_context, dietary_context, openai_client):
     """Step 2: Generate specific meal concepts for each meal in the structure"""
@@ -440,140 +462,28 @@ Return JSON:
     
     return meal_concepts
 
-def get_fdc_nutrition_data(ingredients_list):
-    """Get real FDC nutrition data for ingredient list with comprehensive fallbacks"""
-    nutrition_database = {}
-    
-    for ingredient in ingredients_list:
-        st.write(f"   📊 Looking up: {ingredient}")
-        
-        # Initialize with fallback first
-        fallback_nutrition = get_fallback_nutrition_per_100g(ingredient)
-        nutrition_database[ingredient] = {
-            'fdc_description': ingredient,
-            'per_100g': fallback_nutrition,
-            'source': 'fallback'
-        }
-        
-        try:
-            search_results = fdc_api.search_foods(ingredient, page_size=5)
-            if search_results and len(search_results) > 0:
-                food_item = search_results[0]
-                nutrients = food_item.get('foodNutrients', [])
-                
-                # Extract per 100g nutrition
-                nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
-                nutrient_mapping = {1008: 'calories', 1003: 'protein', 1005: 'carbs', 1004: 'fat'}
-                
-                nutrients_found = 0
-                for nutrient in nutrients:
-                    nutrient_id = nutrient.get('nutrientId')
-                    if nutrient_id in nutrient_mapping:
-                        value = nutrient.get('value', 0)
-                        if value > 0:  # Only count non-zero values
-                            nutrition[nutrient_mapping[nutrient_id]] = round(value, 1)
-                            nutrients_found += 1
-                
-                # Only use FDC data if we found meaningful nutrition info
-                if nutrients_found >= 2:  # At least 2 macros found
-                    nutrition_database[ingredient] = {
-                        'fdc_description': food_item.get('description', ingredient),
-                        'per_100g': nutrition,
-                        'source': 'fdc'
-                    }
-                    st.write(f"   ✅ FDC found: {nutrition}")
-                else:
-                    st.write(f"   📊 FDC incomplete, using fallback: {fallback_nutrition}")
-            else:
-                st.write(f"   📊 No FDC results, using fallback: {fallback_nutrition}")
-                
-        except Exception as e:
-            st.write(f"   ⚠️ FDC error for {ingredient}: {str(e)}, using fallback")
-    
-    return nutrition_database
-
-def get_fallback_nutrition_per_100g(ingredient):
-    """Comprehensive fallback nutrition per 100g with fuzzy matching"""
-    fallback_db = {
-        # Proteins
-        'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
-        'chicken': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
-        'ground turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
-        'turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
-        'salmon': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
-        'fish': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
-        'eggs': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
-        'egg': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
-        'greek yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
-        'yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
-        'cottage cheese': {'calories': 98, 'protein': 11, 'carbs': 3.4, 'fat': 4.3},
-        'cheese': {'calories': 113, 'protein': 7, 'carbs': 1, 'fat': 9},
-        'tofu': {'calories': 76, 'protein': 8, 'carbs': 1.9, 'fat': 4.8},
-        'beef': {'calories': 250, 'protein': 26, 'carbs': 0, 'fat': 15},
-        'pork': {'calories': 242, 'protein': 27, 'carbs': 0, 'fat': 14},
-        
-        # Carbs
-        'brown rice': {'calories': 123, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
-        'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3},
-        'quinoa': {'calories': 120, 'protein': 4.4, 'carbs': 22, 'fat': 1.9},
-        'oats': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
-        'oatmeal': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
-        'sweet potato': {'calories': 86, 'protein': 1.6, 'carbs': 20, 'fat': 0.1},
-        'potato': {'calories': 77, 'protein': 2, 'carbs': 17, 'fat': 0.1},
-        'bread': {'calories': 265, 'protein': 9, 'carbs': 49, 'fat': 3.2},
-        'pasta': {'calories': 131, 'protein': 5, 'carbs': 25, 'fat': 1.1},
-        'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3},
-        'apple': {'calories': 52, 'protein': 0.3, 'carbs': 14, 'fat': 0.2},
-        'berries': {'calories': 57, 'protein': 0.7, 'carbs': 14, 'fat': 0.3},
-        
-        # Vegetables
-        'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4},
-        'spinach': {'calories': 23, 'protein': 2.9, 'carbs': 3.6, 'fat': 0.4},
-        'kale': {'calories': 35, 'protein': 2.9, 'carbs': 4.4, 'fat': 1.5},
-        'lettuce': {'calories': 15, 'protein': 1.4, 'carbs': 2.9, 'fat': 0.2},
-        'tomato': {'calories': 18, 'protein': 0.9, 'carbs': 3.9, 'fat': 0.2},
-        'cucumber': {'calories': 16, 'protein': 0.7, 'carbs': 4, 'fat': 0.1},
-        'bell pepper': {'calories': 31, 'protein': 1, 'carbs': 7, 'fat': 0.3},
-        'carrot': {'calories': 41, 'protein': 0.9, 'carbs': 10, 'fat': 0.2},
-        'onion': {'calories': 40, 'protein': 1.1, 'carbs': 9.3, 'fat': 0.1},
-        
-        # Fats
-        'avocado': {'calories': 160, 'protein': 2, 'carbs': 9, 'fat': 15},
-        'almonds': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
-        'nuts': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
-        'walnuts': {'calories': 654, 'protein': 15, 'carbs': 14, 'fat': 65},
-        'olive oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
-        'oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
-        'butter': {'calories': 717, 'protein': 0.9, 'carbs': 0.1, 'fat': 81},
-        'peanut butter': {'calories': 588, 'protein': 25, 'carbs': 20, 'fat': 50},
-        'seeds': {'calories': 486, 'protein': 19, 'carbs': 23, 'fat': 42}
-    }
-    
-    ingredient_lower = ingredient.lower()
-    
-    # First try exact matches
-    if ingredient_lower in fallback_db:
-        return fallback_db[ingredient_lower]
-    
-    # Then try partial matches
-    for key, nutrition in fallback_db.items():
-        if key in ingredient_lower or ingredient_lower in key:
-            return nutrition
-    
-    # Fuzzy matching for common food patterns
-    if any(word in ingredient_lower for word in ['meat', 'protein', 'chicken', 'beef', 'fish']):
-        return {'calories': 200, 'protein': 25, 'carbs': 0, 'fat': 10}
-    elif any(word in ingredient_lower for word in ['vegetable', 'veggie', 'green']):
-        return {'calories': 25, 'protein': 2, 'carbs': 5, 'fat': 0.2}
-    elif any(word in ingredient_lower for word in ['fruit', 'berry']):
-        return {'calories': 50, 'protein': 0.5, 'carbs': 12, 'fat': 0.2}
-    elif any(word in ingredient_lower for word in ['grain', 'cereal', 'carb']):
-        return {'calories': 120, 'protein': 3, 'carbs': 25, 'fat': 1}
-    elif any(word in ingredient_lower for word in ['fat', 'oil', 'nut']):
-        return {'calories': 600, 'protein': 15, 'carbs': 10, 'fat': 55}
+# Concurrent Monday candidates in best-of-N mode
+BEST_OF_N_CANDIDATES = 3
+
+# Slider granularity for ingredient portion factors
+ADJUSTMENT_SLIDER_STEP = 0.05
+
+def get_adjustment_problem(meal_key):
+    """Current factors and factor-1.0 nutrition from a meal's adjustment state"""
+    adjustments = st.session_state[f"{meal_key}_adjustments"]
+    current_factors = {ing_name: adj_data['factor'] for ing_name, adj_data in adjustments.items()}
+    base_nutrition = {ing_name: adj_data['nutrition'] for ing_name, adj_data in adjustments.items()}
+    return current_factors, base_nutrition
+
+def apply_adjustment_factors(meal_key, meal_index, factors):
+    """Write factors into a meal's adjustment state and reset its sliders to show them"""
+    for ing_name, factor in factors.items():
+        st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = factor
     
-    # Default fallback
-    return {'calories': 150, 'protein': 8, 'carbs': 15, 'fat': 5}
+    # Slider widget state overrides value=, so drop it
+    slider_prefix = f"monday_meal_{meal_index}_"
+    for key in [key for key in st.session_state.keys() if str(key).startswith(slider_prefix) and '_slider_' in str(key)]:
+        del st.session_state[key]
 
 def step3_generate_precise_recipes(meal_concepts, openai_client):
     """Step 3: Generate precise recipes with accurate macro targeting"""
@@ -936,6 +846,20 @@ st.markdown("""
 # Session controls in sidebar
 add_session_controls()
 
+# Warm the shared nutrition cache once per server process
+@st.cache_resource
+def start_nutrition_cache_warmup():
+    return start_background_warmup()
+
+start_nutrition_cache_warmup()
+
+# Pick up catalog edits without a server restart (one watcher per server process)
+@st.cache_resource
+def start_catalog_hot_reload():
+    return start_catalog_watcher()
+
+start_catalog_hot_reload()
+
 # Check for required data
 if not all([
     st.session_state.get('user_info'),
@@ -1047,6 +971,13 @@ if st.session_state['meal_plan_stage'] == 'start':
     3. **Apply to Week** - Use the same rules for similar days or customize each day
     """)
     
+    st.checkbox(
+        "⚡ Generate candidates in parallel (best of 3)",
+        value=st.session_state.get('best_of_n_generation', True),
+        key='best_of_n_generation',
+        help="Runs three Monday generations at once and keeps the first one within ±3% instead of retrying one after another"
+    )
+    
     if st.button("🚀 Start with Monday Example", type="primary", use_container_width=True):
         st.session_state['meal_plan_stage'] = 'generating_monday'
         st.rerun()
@@ -1084,34 +1015,48 @@ elif st.session_state['meal_plan_stage'] == 'generating_monday':
                 progress_placeholder.info("⚡ Generating optimized Monday meal plan based on your personalized targets...")
                 
                 try:
-                    # Use the new quick generation function with retry for accuracy
                     final_result = None
                     result = None
-                    max_attempts = 3
                     
-                    for attempt in range(max_attempts):
-                        if attempt > 0:
-                            progress_placeholder.info(f"🔄 Attempt {attempt + 1}/{max_attempts}: Regenerating for better macro accuracy...")
-                        
-                        result = generate_quick_meal_plan(
-                            monday_data, user_context, diet_context, monday_schedule, openai_client
+                    if st.session_state.get('best_of_n_generation', True):
+                        # Best-of-N: concurrent candidates, first within tolerance wins
+                        progress_placeholder.info(f"⚡ Generating {BEST_OF_N_CANDIDATES} candidates in parallel...")
+                        result, generation_stats = generate_best_of_n_meal_plan(
+                            monday_data, user_context, diet_context, monday_schedule, openai_client,
+                            n_candidates=BEST_OF_N_CANDIDATES
                         )
-                        
-                        # Check if result is valid and accurate
+                        final_result = result
                         if result and result.get('accuracy_validated', False):
-                            final_result = result
-                            progress_placeholder.success(f"✅ Accurate meal plan generated (Attempt {attempt + 1})")
-                            break
-                        elif result and not result.get('accuracy_validated', False):
-                            # Store last result even if not perfect
-                            final_result = result
-                            if attempt < max_attempts - 1:
-                                progress_placeholder.warning(f"⚠️ Attempt {attempt + 1} had macro deviations, retrying...")
+                            progress_placeholder.success(f"✅ Accurate meal plan generated ({generation_stats['completed']} of {BEST_OF_N_CANDIDATES} candidates checked in {generation_stats['elapsed_seconds']}s)")
+                        elif result:
+                            progress_placeholder.warning("⚠️ No candidate was within ±3%. Showing the most accurate one.")
+                    else:
+                        # Use the new quick generation function with retry for accuracy
+                        max_attempts = 3
+                        
+                        for attempt in range(max_attempts):
+                            if attempt > 0:
+                                progress_placeholder.info(f"🔄 Attempt {attempt + 1}/{max_attempts}: Regenerating for better macro accuracy...")
+                            
+                            result = generate_quick_meal_plan(
+                                monday_data, user_context, diet_context, monday_schedule, openai_client
+                            )
+                            
+                            # Check if result is valid and accurate
+                            if result and result.get('accuracy_validated', False):
+                                final_result = result
+                                progress_placeholder.success(f"✅ Accurate meal plan generated (Attempt {attempt + 1})")
+                                break
+                            elif result and not result.get('accuracy_validated', False):
+                                # Store last result even if not perfect
+                                final_result = result
+                                if attempt < max_attempts - 1:
+                                    progress_placeholder.warning(f"⚠️ Attempt {attempt + 1} had macro deviations, retrying...")
+                                else:
+                                    progress_placeholder.error("❌ Maximum attempts reached. Showing best result available.")
                             else:
-                                progress_placeholder.error("❌ Maximum attempts reached. Showing best result available.")
-                        else:
-                            if attempt < max_attempts - 1:
-                                progress_placeholder.warning(f"⚠️ Attempt {attempt + 1} failed, retrying...")
+                                if attempt < max_attempts - 1:
+                                    progress_placeholder.warning(f"⚠️ Attempt {attempt + 1} failed, retrying...")
                     
                     # If still no result after all attempts, try fallback
                     if not final_result:
@@ -1289,58 +1234,37 @@ elif st.session_state['meal_plan_stage'] == 'review_monday':
         with col2:
             if st.button("⚡ Quick Fix All", type="primary", help="Auto-adjust all meal portions"):
                 try:
-                    # Simple bulk scaling for all meals
-                    total_fixed = 0
-                    results = []
-                    
-                    # Get per-meal targets
-                    per_meal_targets = st.session_state.get('per_meal_macros', {})
+                    # Solve every meal's per-ingredient factors in one batched call
+                    monday_targets = st.session_state.get('per_meal_macros', {}).get('Monday', [])
                     
+                    meal_keys = []
+                    problems = []
                     for i, meal in enumerate(meals):
                         meal_key = f"monday_meal_{i}"
-                        meal_name = ["Breakfast", "Lunch", "Dinner", "Mid-Morning Snack", "Afternoon Snack"][i]
+                        if f"{meal_key}_adjustments" not in st.session_state:
+                            continue
                         
-                        # Get targets for this meal
-                        meal_targets = per_meal_targets.get(meal_name, {
-                            "calories": 400, "protein": 30, "carbs": 40, "fat": 15
-                        })
+                        # Same targets as the meal's expander, falling back to an equal split
+                        if i < len(monday_targets):
+                            meal_targets = monday_targets[i]
+                        else:
+                            meal_targets = {macro: nutrition_targets.get(macro, default) / len(meals)
+                                            for macro, default in [('calories', 2000), ('protein', 150), ('carbs', 200), ('fat', 70)]}
                         
-                        # Check if meal has adjustments
-                        if f"{meal_key}_adjustments" in st.session_state:
-                            adjustments = st.session_state[f"{meal_key}_adjustments"]
-                            
-                            # Calculate current totals
-                            current_totals = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
-                            for ing_name, adj_data in adjustments.items():
-                                factor = adj_data['factor']
-                                nutrition = adj_data['nutrition']
-                                for macro in current_totals:
-                                    current_totals[macro] += nutrition.get(macro, 0) * factor
-                            
-                            # Calculate and apply scaling
-                            target_calories = meal_targets.get('calories', 400)
-                            current_calories = current_totals.get('calories', 1)
-                            
-                            if current_calories > 0:
-                                scale_factor = target_calories / current_calories
-                                scale_factor = max(0.5, min(2.0, scale_factor))  # Reasonable limits
-                                
-                                # Apply scaling to all ingredients in this meal
-                                for ing_name in adjustments:
-                                    current_factor = adjustments[ing_name]['factor']
-                                    new_factor = current_factor * scale_factor
-                                    st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = round(new_factor, 2)
-                                
-                                projected_calories = current_calories * scale_factor
-                                projected_protein = current_totals.get('protein', 0) * scale_factor
-                                
-                                results.append(f"✅ {meal_name}: {projected_calories:.0f} cal, {projected_protein:.0f}g protein")
-                                total_fixed += 1
+                        current_factors, base_nutrition = get_adjustment_problem(meal_key)
+                        meal_keys.append((i, meal_key))
+                        problems.append((current_factors, base_nutrition, meal_targets))
                     
-                    if total_fixed > 0:
-                        st.success(f"🎉 Quick-fixed {total_fixed} meals!")
-                        for result in results:
-                            st.write(result)
+                    if problems:
+                        solved = optimize_adjustment_factors_batch(problems, step=ADJUSTMENT_SLIDER_STEP)
+                        for (i, meal_key), factors, (_, base_nutrition, _) in zip(meal_keys, solved, problems):
+                            apply_adjustment_factors(meal_key, i, factors)
+                            projected = {macro: sum(base_nutrition[name].get(macro, 0) * factor for name, factor in factors.items())
+                                         for macro in ['calories', 'protein']}
+                            meal_label = f"Meal {i+1}" if i < 3 else f"Snack {i-2}"
+                            st.write(f"✅ {meal_label}: {projected['calories']:.0f} cal, {projected['protein']:.0f}g protein")
+                        
+                        st.success(f"🎉 Quick-fixed {len(problems)} meals!")
                         st.rerun()
                     else:
                         st.warning("No meals found to fix")
@@ -1502,45 +1426,29 @@ elif st.session_state['meal_plan_stage'] == 'review_monday':
                     simple_opt_key = f"simple_opt_{meal_key}_{i}"
                     
                     if st.button("⚡ Quick Fix", key=simple_opt_key, help="Auto-adjust portions to hit targets", type="primary"):
-                        # Simple proportion-based optimization (no complex database calls)
+                        # Per-ingredient factors that minimize weighted macro error within slider bounds
                         try:
-                            # Calculate current totals from displayed ingredients
-                            current_totals = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
-                            for ing in updated_ingredients:
-                                for macro in current_totals:
-                                    current_totals[macro] += ing.get(macro, 0)
+                            current_factors, base_nutrition = get_adjustment_problem(meal_key)
                             
-                            # Calculate scaling factors needed
-                            target_calories = meal_targets.get('calories', 400)
-                            current_calories = current_totals.get('calories', 1)
-                            
-                            if current_calories > 0:
-                                scale_factor = target_calories / current_calories
-                                # Limit to reasonable range
-                                scale_factor = max(0.5, min(2.0, scale_factor))
-                                
-                                # Apply scaling to all ingredients
-                                for ing_name in st.session_state[f"{meal_key}_adjustments"]:
-                                    current_factor = st.session_state[f"{meal_key}_adjustments"][ing_name]['factor']
-                                    new_factor = current_factor * scale_factor
-                                    st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = round(new_factor, 2)
+                            if current_factors:
+                                factors = optimize_adjustment_factors(current_factors, base_nutrition, meal_targets, step=ADJUSTMENT_SLIDER_STEP)
+                                apply_adjustment_factors(meal_key, i, factors)
                                 
                                 # Calculate projected results
-                                projected_calories = current_calories * scale_factor
-                                projected_protein = current_totals.get('protein', 0) * scale_factor
+                                projected_calories = sum(base_nutrition[name]['calories'] * factor for name, factor in factors.items())
+                                projected_protein = sum(base_nutrition[name]['protein'] * factor for name, factor in factors.items())
                                 
-                                st.success(f"✅ Quick Fix Applied: {projected_calories:.0f} cal, {projected_protein:.0f}g protein (×{scale_factor:.2f})")
+                                st.success(f"✅ Quick Fix Applied: {projected_calories:.0f} cal, {projected_protein:.0f}g protein")
                                 st.rerun()
                             else:
-                                st.error("Cannot optimize - no calories detected")
+                                st.error("Cannot optimize - no ingredients found")
                                 
                         except Exception as e:
                             st.error(f"Quick fix failed: {str(e)}")
                     
                     # Reset button 
                     if st.button("🔄 Reset", key=f"reset_{meal_key}_{i}", help="Reset all portions to original"):
-                        for ing_name in st.session_state[f"{meal_key}_adjustments"]:
-                            st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = 1.0
+                        apply_adjustment_factors(meal_key, i, {ing_name: 1.0 for ing_name in st.session_state[f"{meal_key}_adjustments"]})
                         st.success("✅ Reset to original portions")
                         st.rerun()
                 
@@ -2237,129 +2145,6 @@ if 'ai_meal_plan' in st.session_state and st.session_state['ai_meal_plan']:
 else:
     st.info("👆 Click the button above to generate your personalized weekly meal plan using our new step-by-step AI approach!")
 
-# FDC Integration Functions
-def get_fdc_nutrition(ingredient_name: str, amount_grams: float) -> Dict:
-    """Get nutrition data with FDC verification"""
-    try:
-        # Search FDC database
-        search_results = fdc_api.search_foods(ingredient_name, page_size=5)
-        
-        if search_results and len(search_results) > 0:
-            # Use the first result (most relevant)
-            food_item = search_results[0]
-            nutrition = extract_nutrition_from_fdc(food_item, amount_grams)
-            nutrition['fdc_verified'] = True
-            nutrition['fdc_description'] = food_item.get('description', ingredient_name)
-            return nutrition
-        
-    except Exception as e:
-        st.warning(f"FDC lookup failed for {ingredient_name}: {e}")
-    
-    # Fallback to estimated nutrition
-    return get_fallback_nutrition(ingredient_name, amount_grams)
-
-def extract_nutrition_from_fdc(food_item: Dict, amount_grams: float) -> Dict:
-    """Extract nutrition from FDC food item"""
-    nutrition = {
-        'name': food_item.get('description', 'Unknown'),
-        'amount': f"{amount_grams}g",
-        'calories': 0,
-        'protein': 0,
-        'carbs': 0,
-        'fat': 0
-    }
-    
-    # Extract from foodNutrients if available
-    nutrients = food_item.get('foodNutrients', [])
-    
-    nutrient_mapping = {
-        1008: 'calories',  # Energy
-        1003: 'protein',   # Protein  
-        1005: 'carbs',     # Carbohydrates
-        1004: 'fat'        # Total lipid (fat)
-    }
-    
-    for nutrient in nutrients:
-        nutrient_id = nutrient.get('nutrientId')
-        if nutrient_id in nutrient_mapping:
-            value = nutrient.get('value', 0)
-            # Scale from per 100g to requested amount
-            scaled_value = (value * amount_grams) / 100
-            nutrition[nutrient_mapping[nutrient_id]] = round(scaled_value, 1)
-    
-    return nutrition
-
-def get_fallback_nutrition(ingredient_name: str, amount_grams: float) -> Dict:
-    """Fallback nutrition estimates"""
-    
-    fallback_db = {
-        'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
-        'ground turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
-        'salmon': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
-        'eggs': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
-        'greek yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
-        'brown rice': {'calories': 123, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
-        'quinoa': {'calories': 120, 'protein': 4.4, 'carbs': 22, 'fat': 1.9},
-        'oats': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
-        'sweet potato': {'calories': 86, 'protein': 1.6, 'carbs': 20, 'fat': 0.1},
-        'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4},
-        'spinach': {'calories': 23, 'protein': 2.9, 'carbs': 3.6, 'fat': 0.4},
-        'avocado': {'calories': 160, 'protein': 2, 'carbs': 9, 'fat': 15},
-        'almonds': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
-        'olive oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
-        'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3}
-    }
-    
-    # Find best match
-    ingredient_lower = ingredient_name.lower()
-    base_nutrition = None
-    
-    for food_key, nutrition in fallback_db.items():
-        if food_key in ingredient_lower or ingredient_lower in food_key:
-            base_nutrition = nutrition
-            break
-    
-    if not base_nutrition:
-        # Generic fallback
-        base_nutrition = {'calories': 100, 'protein': 5, 'carbs': 15, 'fat': 3}
-    
-    # Scale to requested amount
-    scaling_factor = amount_grams / 100
-    
-    return {
-        'name': ingredient_name,
-        'amount': f"{amount_grams}g",
-        'calories': round(base_nutrition['calories'] * scaling_factor, 1),
-        'protein': round(base_nutrition['protein'] * scaling_factor, 1),
-        'carbs': round(base_nutrition['carbs'] * scaling_factor, 1),
-        'fat': round(base_nutrition['fat'] * scaling_factor, 1),
-        'fdc_verified': False
-    }
-
-def parse_amount_to_grams(amount_str: str) -> float:
-    """Parse amount string to grams"""
-    # Extract numbers
-    numbers = re.findall(r'\d+(?:\.\d+)?', amount_str)
-    if not numbers:
-        return 100.0
-    
-    amount = float(numbers[0])
-    amount_lower = amount_str.lower()
-    
-    # Convert to grams
-    if 'cup' in amount_lower:
-        return amount * 240  # 1 cup ≈ 240g
-    elif 'tbsp' in amount_lower or 'tablespoon' in amount_lower:
-        return amount * 15
-    elif 'tsp' in amount_lower or 'teaspoon' in amount_lower:
-        return amount * 5
-    elif 'oz' in amount_lower:
-        return amount * 28.35
-    elif 'lb' in amount_lower or 'pound' in amount_lower:
-        return amount * 453.6
-    else:
-        return amount  # Assume grams
-
 # Remove duplicate function definition
 
 def get_meal_portion_targets(daily_targets: Dict, total_meals: int, meal_index: int) -> Dict:
@@ -2374,19 +2159,10 @@ def get_meal_portion_targets(daily_targets: Dict, total_meals: int, meal_index:
 
 def auto_adjust_meal_portions(meal_key: str, targets: Dict, actuals: Dict):
     """Auto-adjust ingredient portions to hit targets"""
-    scaling_factors = []
-    for macro in ['calories', 'protein', 'carbs', 'fat']:
-        if actuals.get(macro, 0) > 0 and targets.get(macro, 0) > 0:
-            factor = targets[macro] / actuals[macro]
-            scaling_factors.append(factor)
-    
-    if scaling_factors:
-        avg_scaling = sum(scaling_factors) / len(scaling_factors)
-        
-        # Apply to all ingredients
-        for ing_name in st.session_state[f"{meal_key}_adjustments"]:
-            current = st.session_state[f"{meal_key}_adjustments"][ing_name]['factor']
-            st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = current * avg_scaling
+    current_factors, base_nutrition = get_adjustment_problem(meal_key)
+    factors = optimize_adjustment_factors(current_factors, base_nutrition, targets, step=ADJUSTMENT_SLIDER_STEP)
+    for ing_name, factor in factors.items():
+        st.session_state[f"{meal_key}_adjustments"][ing_name]['factor'] = factor
 
 def display_ingredient_table(ingredients: List[Dict]):
     """Display detailed ingredient table"""
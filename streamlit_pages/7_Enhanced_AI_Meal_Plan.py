@@ -7,14 +7,15 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-import re
 from datetime import datetime
 from typing import Dict, List
 from openai import OpenAI
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from fdc_api import search_foods
+from ingredient_amounts import parse_amount_to_grams
+from nutrition_lookup import nutrition_for_amount, resolve_ingredients
+from portion_optimizer import optimize_adjustment_factors
 
 st.set_page_config(page_title="Enhanced AI Meal Plan", page_icon="🧠", layout="wide")
 
@@ -78,128 +79,9 @@ class EnhancedMealPlanner:
             st.error(f"OpenAI client initialization failed: {e}")
         return None
     
-    def get_fdc_nutrition(self, ingredient_name: str, amount_grams: float) -> Dict:
-        """Get nutrition data with FDC verification"""
-        try:
-            # Search FDC database
-            search_results = search_foods(ingredient_name, page_size=5)
-            
-            if search_results and len(search_results) > 0:
-                # Use the first result (most relevant)
-                food_item = search_results[0]
-                nutrition = self._extract_nutrition_from_fdc(food_item, amount_grams)
-                nutrition['fdc_verified'] = True
-                nutrition['fdc_description'] = food_item.get('description', ingredient_name)
-                return nutrition
-            
-        except Exception as e:
-            st.warning(f"FDC lookup failed for {ingredient_name}: {e}")
-        
-        # Fallback to estimated nutrition
-        return self._get_fallback_nutrition(ingredient_name, amount_grams)
-    
-    def _extract_nutrition_from_fdc(self, food_item: Dict, amount_grams: float) -> Dict:
-        """Extract nutrition from FDC food item"""
-        nutrition = {
-            'name': food_item.get('description', 'Unknown'),
-            'amount': f"{amount_grams}g",
-            'calories': 0,
-            'protein': 0,
-            'carbs': 0,
-            'fat': 0
-        }
-        
-        # Extract from foodNutrients if available
-        nutrients = food_item.get('foodNutrients', [])
-        
-        nutrient_mapping = {
-            1008: 'calories',  # Energy
-            1003: 'protein',   # Protein  
-            1005: 'carbs',     # Carbohydrates
-            1004: 'fat'        # Total lipid (fat)
-        }
-        
-        for nutrient in nutrients:
-            nutrient_id = nutrient.get('nutrientId')
-            if nutrient_id in nutrient_mapping:
-                value = nutrient.get('value', 0)
-                # Scale from per 100g to requested amount
-                scaled_value = (value * amount_grams) / 100
-                nutrition[nutrient_mapping[nutrient_id]] = round(scaled_value, 1)
-        
-        return nutrition
-    
-    def _get_fallback_nutrition(self, ingredient_name: str, amount_grams: float) -> Dict:
-        """Fallback nutrition estimates"""
-        
-        # Enhanced fallback database with common foods
-        fallback_db = {
-            'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6},
-            'ground turkey': {'calories': 189, 'protein': 27, 'carbs': 0, 'fat': 8},
-            'salmon': {'calories': 206, 'protein': 22, 'carbs': 0, 'fat': 12},
-            'eggs': {'calories': 155, 'protein': 13, 'carbs': 1, 'fat': 11},
-            'greek yogurt': {'calories': 97, 'protein': 10, 'carbs': 4, 'fat': 5},
-            'brown rice': {'calories': 123, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
-            'quinoa': {'calories': 120, 'protein': 4.4, 'carbs': 22, 'fat': 1.9},
-            'oats': {'calories': 68, 'protein': 2.4, 'carbs': 12, 'fat': 1.4},
-            'sweet potato': {'calories': 86, 'protein': 1.6, 'carbs': 20, 'fat': 0.1},
-            'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4},
-            'spinach': {'calories': 23, 'protein': 2.9, 'carbs': 3.6, 'fat': 0.4},
-            'avocado': {'calories': 160, 'protein': 2, 'carbs': 9, 'fat': 15},
-            'almonds': {'calories': 576, 'protein': 21, 'carbs': 22, 'fat': 49},
-            'olive oil': {'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100},
-            'banana': {'calories': 89, 'protein': 1.1, 'carbs': 23, 'fat': 0.3}
-        }
-        
-        # Find best match
-        ingredient_lower = ingredient_name.lower()
-        base_nutrition = None
-        
-        for food_key, nutrition in fallback_db.items():
-            if food_key in ingredient_lower or ingredient_lower in food_key:
-                base_nutrition = nutrition
-                break
-        
-        if not base_nutrition:
-            # Generic fallback
-            base_nutrition = {'calories': 100, 'protein': 5, 'carbs': 15, 'fat': 3}
-        
-        # Scale to requested amount
-        scaling_factor = amount_grams / 100
-        
-        return {
-            'name': ingredient_name,
-            'amount': f"{amount_grams}g",
-            'calories': round(base_nutrition['calories'] * scaling_factor, 1),
-            'protein': round(base_nutrition['protein'] * scaling_factor, 1),
-            'carbs': round(base_nutrition['carbs'] * scaling_factor, 1),
-            'fat': round(base_nutrition['fat'] * scaling_factor, 1),
-            'fdc_verified': False
-        }
-    
-    def parse_amount_to_grams(self, amount_str: str) -> float:
-        """Parse amount string to grams"""
-        # Extract numbers
-        numbers = re.findall(r'\d+(?:\.\d+)?', amount_str)
-        if not numbers:
-            return 100.0
-        
-        amount = float(numbers[0])
-        amount_lower = amount_str.lower()
-        
-        # Convert to grams
-        if 'cup' in amount_lower:
-            return amount * 240  # 1 cup ≈ 240g
-        elif 'tbsp' in amount_lower or 'tablespoon' in amount_lower:
-            return amount * 15
-        elif 'tsp' in amount_lower or 'teaspoon' in amount_lower:
-            return amount * 5
-        elif 'oz' in amount_lower:
-            return amount * 28.35
-        elif 'lb' in amount_lower or 'pound' in amount_lower:
-            return amount * 453.6
-        else:
-            return amount  # Assume grams
+    def get_fdc_nutrition(self, ingredient_name: str, amount_grams: float, record: Dict = None) -> Dict:
+        """Get nutrition data with FDC verification (record: an already resolved lookup record)"""
+        return nutrition_for_amount(ingredient_name, amount_grams, record)
     
     def generate_meal_with_fdc(self, meal_context: Dict, target_macros: Dict) -> Dict:
         """Generate meal with FDC verification"""
@@ -255,11 +137,14 @@ class EnhancedMealPlanner:
             
             meal_concept = json.loads(result)
             
+            # Resolve the meal's distinct ingredients in one batch, then scale per amount
+            resolved = resolve_ingredients([ingredient['name'] for ingredient in meal_concept['ingredients']])
+            
             # Get FDC-verified nutrition for each ingredient
             verified_ingredients = []
             for ingredient in meal_concept['ingredients']:
-                amount_grams = self.parse_amount_to_grams(ingredient['amount'])
-                nutrition = self.get_fdc_nutrition(ingredient['name'], amount_grams)
+                amount_grams = parse_amount_to_grams(ingredient['amount'])
+                nutrition = self.get_fdc_nutrition(ingredient['name'], amount_grams, resolved.get(ingredient['name']))
                 verified_ingredients.append(nutrition)
             
             # Calculate totals
@@ -333,12 +218,13 @@ def display_meal_adjuster(meal_data: Dict, target_macros: Dict, meal_key: str) -
         
         # Quick adjustment buttons
         if st.button(f"🎯 Auto-Adjust", key=f"{meal_key}_auto"):
-            auto_adjust_portions(meal_key, target_macros, updated_totals)
+            auto_adjust_portions(meal_key, target_macros, meal_data['ingredients'])
             st.rerun()
         
         if st.button(f"🔄 Reset", key=f"{meal_key}_reset"):
             for ing_name in st.session_state[f"{meal_key}_adjustments"]:
                 st.session_state[f"{meal_key}_adjustments"][ing_name] = 1.0
+                st.session_state.pop(f"{meal_key}_{ing_name}_slider", None)
             st.rerun()
     
     # Display ingredient details
@@ -430,22 +316,18 @@ def display_ingredient_table(ingredients: List[Dict]):
     df = pd.DataFrame(data)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
-def auto_adjust_portions(meal_key: str, targets: Dict, actuals: Dict):
+def auto_adjust_portions(meal_key: str, targets: Dict, ingredients: List[Dict]):
     """Auto-adjust ingredient portions to hit targets"""
-    # Calculate scaling factors
-    scaling_factors = []
-    for macro in ['calories', 'protein', 'carbs', 'fat']:
-        if actuals.get(macro, 0) > 0 and targets.get(macro, 0) > 0:
-            factor = targets[macro] / actuals[macro]
-            scaling_factors.append(factor)
+    current_factors = st.session_state[f"{meal_key}_adjustments"]
+    base_nutrition = {ing['name']: ing for ing in ingredients if ing['name'] in current_factors}
+    factors = optimize_adjustment_factors(
+        {name: current_factors[name] for name in base_nutrition}, base_nutrition, targets, step=0.05
+    )
     
-    if scaling_factors:
-        avg_scaling = sum(scaling_factors) / len(scaling_factors)
-        
-        # Apply to all ingredients
-        for ing_name in st.session_state[f"{meal_key}_adjustments"]:
-            current = st.session_state[f"{meal_key}_adjustments"][ing_name]
-            st.session_state[f"{meal_key}_adjustments"][ing_name] = current * avg_scaling
+    for ing_name, factor in factors.items():
+        st.session_state[f"{meal_key}_adjustments"][ing_name] = factor
+        # Slider widget state overrides value=, so drop it
+        st.session_state.pop(f"{meal_key}_{ing_name}_slider", None)
 
 # Main App
 def main():
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live at the repository root (the pages and scripts add it the same way)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
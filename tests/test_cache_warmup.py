@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+fdc_api = pytest.importorskip('fdc_api')
+
+import cache_warmup
+import nutrition_lookup
+from fallback_nutrition import FALLBACK_NUTRITION_DB
+from ingredient_resolution import ResolutionStore
+from spelling_index import SpellingIndex
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = ResolutionStore(str(tmp_path / 'resolutions.json'))
+    monkeypatch.setattr(nutrition_lookup, '_cache', {})
+    monkeypatch.setattr(nutrition_lookup, '_cache_loaded', True)
+    monkeypatch.setattr(nutrition_lookup, 'get_resolution_store', lambda: store)
+    monkeypatch.setattr(nutrition_lookup, 'correct_query', SpellingIndex([]).correct)
+    monkeypatch.setattr(nutrition_lookup.fdc_api, 'search_foods', lambda query, page_size=5: [])
+    return store
+
+
+def test_warmup_keeps_one_spelling_per_canonical_key(monkeypatch, tmp_path):
+    recipes_path = tmp_path / 'ni-recipes.json'
+    recipes_path.write_text(json.dumps([{'ingredients': [{'item': 'Peanut Butter'}, {'item': 'peanut butters'}]}]))
+    monkeypatch.setattr(cache_warmup, 'collect_food_list_names', lambda: ['Sweet Potato'])
+
+    ingredients = cache_warmup.collect_warmup_ingredients(str(recipes_path))
+    assert ingredients[:2] == ['Peanut Butter', 'Sweet Potato']
+    assert len(ingredients) == len(set(map(nutrition_lookup.canonicalize_ingredient, ingredients)))
+
+
+@pytest.mark.parametrize('food', ['peanut butter', 'sweet potato', 'cottage cheese'])
+def test_warmup_resolves_the_original_spelling(store, monkeypatch, tmp_path, food):
+    recipes_path = tmp_path / 'ni-recipes.json'
+    recipes_path.write_text(json.dumps([{'ingredients': [{'item': food}]}]))
+    monkeypatch.setattr(cache_warmup, 'collect_food_list_names', lambda: [])
+
+    cache_warmup.warm_nutrition_cache(cache_warmup.collect_warmup_ingredients(str(recipes_path)),
+                                      max_rate=0, persist=False)
+
+    record = nutrition_lookup.get_cached_nutrition(food)
+    assert record['per_100g'] == FALLBACK_NUTRITION_DB[food]
+    assert store.get(nutrition_lookup.canonicalize_ingredient(food))['per_100g'] == FALLBACK_NUTRITION_DB[food]
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip('common_foods_database')
+
+import fallback_nutrition
+import food_catalog
+import food_search_index
+import spelling_index
+from catalog_manager import CatalogManager, CatalogSnapshot
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    # Installing a generation sets these; monkeypatch puts the real ones back afterwards
+    for module, name in [(food_catalog, '_catalog'), (fallback_nutrition, 'FALLBACK_STORE'),
+                         (food_search_index, '_index'), (spelling_index, '_index')]:
+        monkeypatch.setattr(module, name, getattr(module, name))
+
+    path = tmp_path / 'foods.txt'
+    path.write_text('apple')
+    return path
+
+
+def manager_for(path):
+    def build(version, fingerprints, changed):
+        content = path.read_text()
+        if 'broken' in content:
+            raise ValueError('unreadable catalog')
+        return CatalogSnapshot(version, fingerprints, content, f"store {content}", f"index {content}", f"spelling {content}")
+
+    return CatalogManager(sources=lambda: {'foods': str(path)}, builder=build)
+
+
+def test_first_check_installs_a_generation(source):
+    manager = manager_for(source)
+    assert manager.snapshot() is None
+
+    assert manager.check()
+    assert manager.version == 1
+    assert manager.snapshot().catalog == 'apple'
+    assert food_catalog.get_food_catalog() == 'apple'
+
+    # Nothing changed: no rebuild
+    assert not manager.check()
+    assert manager.version == 1
+
+
+def test_changed_source_swaps_in_the_next_generation(source):
+    manager = manager_for(source)
+    manager.check()
+    first = manager.snapshot()
+
+    source.write_text('apple, pear')
+    assert manager.check()
+    assert manager.version == 2
+    assert manager.snapshot().catalog == 'apple, pear'
+    assert first.catalog == 'apple'
+
+
+def test_failed_build_keeps_the_previous_generation(source):
+    manager = manager_for(source)
+    manager.check()
+    installed = manager.snapshot()
+
+    source.write_text('broken edit')
+    assert not manager.check()
+    assert manager.snapshot() is installed
+    assert manager.version == 1
+    assert 'unreadable catalog' in manager.last_error
+    assert food_catalog.get_food_catalog() == 'apple'
+
+    # Fixing the file installs the next generation and clears the error
+    source.write_text('apple, fig')
+    assert manager.check()
+    assert manager.version == 2
+    assert manager.snapshot().catalog == 'apple, fig'
+    assert manager.last_error is None
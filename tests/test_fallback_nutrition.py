@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from fallback_nutrition import (
+    DEFAULT_FALLBACK_NUTRITION,
+    FALLBACK_CATEGORY_RULES,
+    FALLBACK_NUTRITION_DB,
+    FALLBACK_STORE,
+    KeywordAutomaton
+)
+
+
+def naive_find_all(keywords, text):
+    return sorted((index, start + len(keyword) - 1)
+                  for index, keyword in enumerate(keywords)
+                  for start in range(len(text) - len(keyword) + 1)
+                  if text.startswith(keyword, start))
+
+
+def test_automaton_reports_overlapping_and_nested_keywords():
+    keywords = ['he', 'she', 'his', 'hers']
+    automaton = KeywordAutomaton(keywords)
+    assert sorted(automaton.find_all('ushers')) == [(0, 3), (1, 3), (3, 5)]
+    assert automaton.matched_indices('this') == {2}
+    assert automaton.matched_indices('xyz') == set()
+
+
+def test_automaton_matches_a_naive_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        keywords = list({''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))})
+        text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 30)))
+        assert sorted(KeywordAutomaton(keywords).find_all(text)) == naive_find_all(keywords, text)
+
+
+def naive_fallback(ingredient):
+    """The fallback rules as plain scans: exact, longest key inside, inside a key, category keyword"""
+    table = {key.lower(): nutrition for key, nutrition in FALLBACK_NUTRITION_DB.items()}
+    text = (ingredient or '').lower().strip()
+    if not text:
+        return DEFAULT_FALLBACK_NUTRITION
+    if text in table:
+        return table[text]
+    contained = [key for key in table if key in text]
+    if contained:
+        return table[max(contained, key=len)]
+    for key in table:
+        if text in key:
+            return table[key]
+    for words, nutrition in FALLBACK_CATEGORY_RULES:
+        if any(word in text for word in words):
+            return nutrition
+    return DEFAULT_FALLBACK_NUTRITION
+
+
+@pytest.mark.parametrize('ingredient', [
+    'Chicken Breast', 'grilled chicken breast', 'brown rice', 'rice', 'chick', 'wild berry mix',
+    'mixed vegetable medley', 'fish sauce', 'something unknown', '', '  Rice  '
+])
+def test_store_lookup_matches_the_rules(ingredient):
+    assert FALLBACK_STORE.lookup(ingredient) == naive_fallback(ingredient)
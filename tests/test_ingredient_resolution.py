@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from ingredient_resolution import SOURCE_MANUAL, STORE_VERSION, ResolutionStore
+
+PER_100G = {'calories': 59, 'protein': 10.2, 'carbs': 3.6, 'fat': 0.4}
+
+
+def write_export(path, resolutions, version=STORE_VERSION):
+    path.write_text(json.dumps({'version': version, 'resolutions': resolutions}))
+    return str(path)
+
+
+def test_import_rejects_another_store_version(tmp_path):
+    store = ResolutionStore(str(tmp_path / 'resolutions.json'))
+    export = write_export(tmp_path / 'curated.json', {'greek yogurt': {'source': SOURCE_MANUAL, 'per_100g': PER_100G}},
+                          version=STORE_VERSION - 1)
+    with pytest.raises(ValueError):
+        store.import_file(export)
+    assert len(store) == 0
+
+
+def test_import_skips_incomplete_entries_and_fills_defaults(tmp_path):
+    store = ResolutionStore(str(tmp_path / 'resolutions.json'))
+    export = write_export(tmp_path / 'curated.json', {
+        'greek yogurt': {'fdc_id': 171304, 'source': SOURCE_MANUAL, 'per_100g': PER_100G},
+        'no source': {'fdc_id': 1, 'per_100g': PER_100G},
+        'unknown source': {'source': 'guess', 'per_100g': PER_100G},
+        'no macros': {'source': SOURCE_MANUAL, 'per_100g': {'calories': 100}}
+    })
+
+    assert store.import_file(export) == 1
+    entry = store.get('greek yogurt')
+    assert entry['per_100g'] == PER_100G
+    assert entry['confidence'] == 1.0
+    assert entry['fdc_id'] == 171304
+    assert store.get('no source') is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from meal_distribution import MAX_MEALS, TRAINING_SLOTS, get_day_meal_targets, get_meal_distribution_table, training_slot
+
+DAY_TARGETS = {'calories': 2400, 'protein': 180, 'carbs': 250, 'fat': 75}
+
+
+def old_distribution(slot, total_meals):
+    """The DIY page's original if/else distribution rules"""
+    meal = lambda description, protein, carbs, fat: {'description': description, 'protein': protein, 'carbs': carbs, 'fat': fat}
+    if slot not in ('BEFORE 9AM', '9AM-3PM', '3PM-6PM', 'AFTER 6PM'):
+        return {n: meal(f'Meal {n}', 1.0 / total_meals, 1.0 / total_meals, 1.0 / total_meals) for n in range(1, total_meals + 1)}
+
+    if slot == 'BEFORE 9AM':
+        pre, post, post_fat, rest_fat = 1, 2, 0.2, 0.7
+    elif slot == '9AM-3PM':
+        pre, post, post_fat, rest_fat = total_meals // 2, total_meals // 2 + 1, 0.1, 0.8
+    else:
+        pre, post, post_fat, rest_fat = total_meals - 1, total_meals, 0.1, 0.8
+
+    distribution = {}
+    for n in range(1, total_meals + 1):
+        if total_meals == 1:
+            distribution[n] = meal('All-in-one Meal', 1.0, 1.0, 1.0)
+        elif n == pre:
+            distribution[n] = meal('Pre-Workout', 0.3, 0.4, 0.1)
+        elif n == post:
+            distribution[n] = meal('Post-Workout', 0.4, 0.4, post_fat)
+        else:
+            distribution[n] = meal(f'Meal {n}', 0.3 / (total_meals - 2), 0.2 / (total_meals - 2), rest_fat / (total_meals - 2))
+    return distribution
+
+
+CASES = [(slot, total_meals) for slot in TRAINING_SLOTS for total_meals in range(1, MAX_MEALS + 1)]
+
+
+@pytest.mark.parametrize('slot, total_meals', CASES)
+def test_tables_match_the_original_rules(slot, total_meals):
+    table = get_meal_distribution_table(slot, total_meals)
+    expected = old_distribution(slot, total_meals)
+    assert list(table) == list(expected)
+    for meal_num, meal in expected.items():
+        assert table[meal_num]['description'] == meal['description']
+        for key in ['protein', 'carbs', 'fat']:
+            assert table[meal_num][key] == pytest.approx(meal[key])
+
+
+@pytest.mark.parametrize('slot, total_meals', CASES)
+def test_day_targets_scale_the_shares(slot, total_meals):
+    targets = get_day_meal_targets(DAY_TARGETS, slot, total_meals)
+    expected = [[DAY_TARGETS['calories'] * meal['protein'], DAY_TARGETS['protein'] * meal['protein'],
+                 DAY_TARGETS['carbs'] * meal['carbs'], DAY_TARGETS['fat'] * meal['fat']]
+                for meal in old_distribution(slot, total_meals).values()]
+    np.testing.assert_allclose(targets, expected)
+
+
+def test_training_slot_defaults_to_rest_day():
+    assert training_slot({'has_workout': True, 'workout_time': '3PM-6PM'}) == '3PM-6PM'
+    assert training_slot({'has_workout': True, 'workout_time': None}) == 'REST DAY'
+    assert training_slot({'has_workout': False, 'workout_time': 'BEFORE 9AM'}) == 'REST DAY'
+    assert training_slot(None) == 'REST DAY'
@@ -0,0 +1,27 @@
+import os
+
+from nutrient_matrix import build_nutrient_matrix, get_nutrient_matrix
+
+OATS = {'name': 'Oats', 'calories': 389, 'protein': 16.9, 'carbs': 66.3, 'fat': 6.9}
+TOFU = {'name': 'Tofu', 'calories': 76, 'protein': 8, 'carbs': 1.9, 'fat': 4.8}
+
+
+def test_cached_matrix_follows_a_rebuild(tmp_path):
+    path = str(tmp_path / 'nutrient_matrix')
+    assert get_nutrient_matrix(path) is None
+
+    build_nutrient_matrix(path, foods=[OATS])
+    matrix = get_nutrient_matrix(path)
+    assert matrix.names == ['Oats']
+    assert get_nutrient_matrix(path) is matrix
+
+    build_nutrient_matrix(path, foods=[OATS, TOFU])
+    rebuilt = get_nutrient_matrix(path)
+    assert rebuilt.names == ['Oats', 'Tofu']
+    assert rebuilt.totals(rebuilt.rows(['Tofu']), [200])['protein'] == 16
+
+    # The previous mapping stays readable for callers that still hold it
+    assert matrix.totals(matrix.rows(['Oats']), [100])['calories'] == 389
+
+    os.remove(path + '.index.json')
+    assert get_nutrient_matrix(path) is None
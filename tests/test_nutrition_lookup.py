@@ -0,0 +1,91 @@
+import pytest
+
+fdc_api = pytest.importorskip('fdc_api')
+
+import nutrition_lookup
+from fallback_nutrition import FALLBACK_NUTRITION_DB
+from ingredient_resolution import ResolutionStore
+from spelling_index import SpellingIndex
+
+VOCABULARY = ['quinoa', 'broccoli', 'fillet', 'berries', 'taco']
+
+
+def fdc_food(description, fdc_id):
+    return {'description': description, 'fdcId': fdc_id, 'foodNutrients': [
+        {'nutrientId': 1008, 'value': 120}, {'nutrientId': 1003, 'value': 4.4},
+        {'nutrientId': 1005, 'value': 21.3}, {'nutrientId': 1004, 'value': 1.9}
+    ]}
+
+
+FDC_FOODS = {
+    'quinoa': [fdc_food('Quinoa, cooked', 1)],
+    'broccoli': [fdc_food('Broccoli, raw', 2)],
+    'millet': [fdc_food('Millet, cooked', 3)],
+    'cherries': [fdc_food('Cherries, sweet, raw', 4)],
+    'taro': [fdc_food('Taro, cooked', 5)],
+    'fillet': [fdc_food('Fish fillet', 6)]
+}
+
+
+@pytest.fixture
+def lookup(monkeypatch, tmp_path):
+    searches = []
+
+    def search_foods(query, page_size=5):
+        searches.append(query)
+        if query in offline:
+            raise ConnectionError("FDC unreachable")
+        return FDC_FOODS.get(query, [])
+
+    offline = set()
+
+    store = ResolutionStore(str(tmp_path / 'resolutions.json'))
+    monkeypatch.setattr(nutrition_lookup, '_cache', {})
+    monkeypatch.setattr(nutrition_lookup, '_cache_loaded', True)
+    monkeypatch.setattr(nutrition_lookup, 'get_resolution_store', lambda: store)
+    monkeypatch.setattr(nutrition_lookup, 'correct_query', SpellingIndex(VOCABULARY).correct)
+    monkeypatch.setattr(nutrition_lookup.fdc_api, 'search_foods', search_foods)
+    return nutrition_lookup.lookup_ingredient, searches, store, offline
+
+
+def test_typos_reuse_the_corrected_record(lookup):
+    lookup_ingredient, searches, store, offline = lookup
+    lookup_ingredient('quinoa')
+    record = lookup_ingredient('quinao')
+    assert record['fdc_description'] == 'Quinoa, cooked'
+    assert lookup_ingredient('quinao')['fdc_description'] == 'Quinoa, cooked'
+    assert searches == ['quinoa', 'quinao']
+
+
+@pytest.mark.parametrize('typo, food', [('quinao', 'quinoa'), ('brocoli', 'broccoli')])
+def test_typos_missing_fdc_use_the_corrected_fallback(lookup, monkeypatch, typo, food):
+    lookup_ingredient, searches, store, offline = lookup
+    monkeypatch.delitem(FDC_FOODS, food)
+    record = lookup_ingredient(typo)
+    assert record['source'] == 'fallback'
+    assert record['per_100g'] == FALLBACK_NUTRITION_DB[food]
+    assert searches == [typo]
+    assert store.get(typo)['per_100g'] == FALLBACK_NUTRITION_DB[food]
+
+
+@pytest.mark.parametrize('typo, food', [('quinao', 'quinoa'), ('brocoli', 'broccoli')])
+def test_typos_use_the_corrected_fallback_offline(lookup, typo, food):
+    lookup_ingredient, searches, store, offline = lookup
+    offline.add(typo)
+    record = lookup_ingredient(typo)
+    assert record['per_100g'] == FALLBACK_NUTRITION_DB[food]
+    assert searches == [typo]
+    assert store.get(typo) is None
+
+
+@pytest.mark.parametrize('word, description', [
+    ('millet', 'Millet, cooked'),
+    ('cherries', 'Cherries, sweet, raw'),
+    ('taro', 'Taro, cooked')
+])
+def test_foods_found_as_typed_are_not_corrected(lookup, word, description):
+    lookup_ingredient, searches, store, offline = lookup
+    record = lookup_ingredient(word)
+    assert record['fdc_description'] == description
+    assert searches == [word]
+    assert store.get(nutrition_lookup.canonicalize_ingredient(word))['description'] == description
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from scipy.optimize import lsq_linear
+
+from portion_optimizer import (
+    FACTOR_BOUNDS,
+    FACTOR_REGULARIZATION,
+    MACRO_KEYS,
+    PORTION_BOUNDS,
+    calculate_kitchen_portions,
+    calculate_optimal_portions,
+    describe_portion,
+    get_row_scales,
+    optimize_portions_batch,
+    solve_adjustment_factors_batch,
+    solve_factors_vectorized
+)
+from selected_foods import meal_categories
+
+
+def random_meals(seed, n_meals=60, max_ingredients=6):
+    rng = np.random.default_rng(seed)
+    meals = []
+    for _ in range(n_meals):
+        n = int(rng.integers(1, max_ingredients + 1))
+        base = rng.uniform(0, 40, size=(n, 4))
+        base[:, 0] = base[:, 1] * 4 + base[:, 2] * 4 + base[:, 3] * 9
+        targets = base.sum(axis=0) * rng.uniform(0.3, 2.5)
+        if rng.random() < 0.2:
+            targets[rng.integers(4)] = 0
+        meals.append((base, targets, rng.uniform(0.5, 2.0, n)))
+    return meals
+
+
+def bvls_factors(base, targets, current, bounds=FACTOR_BOUNDS):
+    """One meal's factors with scipy's BVLS on the explicit least-squares system"""
+    scales = get_row_scales(targets)
+    reg = np.sqrt(FACTOR_REGULARIZATION)
+    A = np.vstack([base.T * scales[:, None], reg * np.eye(len(current))])
+    b = np.concatenate([targets * scales, reg * np.clip(current, *bounds)])
+    return lsq_linear(A, b, bounds=bounds, method='bvls').x
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_vectorized_factors_match_bvls(seed):
+    meals = random_meals(seed)
+    width = max(len(current) for _, _, current in meals)
+    base = np.zeros((len(meals), width, 4))
+    targets = np.array([meal_targets for _, meal_targets, _ in meals])
+    current = np.zeros((len(meals), width))
+    mask = np.zeros((len(meals), width), dtype=bool)
+    for index, (meal_base, _, meal_current) in enumerate(meals):
+        base[index, :len(meal_current)] = meal_base
+        current[index, :len(meal_current)] = meal_current
+        mask[index, :len(meal_current)] = True
+
+    factors = solve_factors_vectorized(base, targets, current, mask,
+                                       np.full(mask.shape, FACTOR_BOUNDS[0]), np.full(mask.shape, FACTOR_BOUNDS[1]))
+
+    for index, (meal_base, meal_targets, meal_current) in enumerate(meals):
+        n = len(meal_current)
+        np.testing.assert_allclose(factors[index, :n], bvls_factors(meal_base, meal_targets, meal_current), atol=1e-6)
+        assert np.all(factors[index, n:] == 0)
+
+
+def test_adjustment_batch_uses_the_same_solution():
+    meals = random_meals(4, n_meals=20)
+    solved = solve_adjustment_factors_batch([(base, dict(zip(MACRO_KEYS, targets)), current) for base, targets, current in meals])
+    for factors, (base, targets, current) in zip(solved, meals):
+        np.testing.assert_allclose(factors, bvls_factors(base, targets, current), atol=1e-6)
+
+
+def random_foods(rng, n):
+    foods = []
+    for i in range(n):
+        protein, carbs, fat = rng.uniform(0, 30), rng.uniform(0, 70), rng.uniform(0, 40)
+        foods.append({'name': f"food {i}", 'calories': protein * 4 + carbs * 4 + fat * 9,
+                      'protein': protein, 'carbs': carbs, 'fat': fat})
+    return foods
+
+
+def test_portion_batch_matches_per_meal_portions():
+    rng = np.random.default_rng(11)
+    meals = []
+    for _ in range(40):
+        foods = random_foods(rng, int(rng.integers(1, 7)))
+        targets = {'calories': rng.uniform(300, 900), 'protein': rng.uniform(20, 60),
+                   'carbs': rng.uniform(20, 120), 'fat': rng.uniform(5, 35)}
+        meals.append((foods, targets))
+    meals.append(([], {'calories': 500}))
+    meals.append((random_foods(rng, 3), {}))
+
+    for (foods, targets), portions in zip(meals, optimize_portions_batch(meals)):
+        expected = calculate_optimal_portions(foods, targets)
+        assert list(portions) == list(expected)
+        for name, grams in portions.items():
+            # Both round the same optimum; allow for rounding at exactly .5 g
+            assert abs(grams - expected[name]) <= 1
+            assert PORTION_BOUNDS[0] <= grams <= PORTION_BOUNDS[1]
+
+
+def test_kitchen_portions_use_the_meal_categories():
+    # Catalog food dicts carry no category; the meal's source lists supply it
+    meal_data = {'protein_sources': ['Tilapia'], 'carb_sources': ['Brown Rice'], 'fat_sources': ['Olive Oil']}
+    foods = [
+        {'name': 'Tilapia', 'calories': 128, 'protein': 26, 'carbs': 0, 'fat': 2.7},
+        {'name': 'Brown Rice', 'calories': 123, 'protein': 2.6, 'carbs': 23, 'fat': 0.9},
+        {'name': 'Olive Oil', 'calories': 884, 'protein': 0, 'carbs': 0, 'fat': 100}
+    ]
+    targets = {'calories': 600, 'protein': 40, 'carbs': 60, 'fat': 18}
+    categories = meal_categories(meal_data)
+
+    portions = calculate_kitchen_portions(foods, targets, categories)
+    assert portions['Tilapia'] % 25 == 0
+    assert portions['Brown Rice'] % 40 == 0
+    assert portions['Olive Oil'] % 5 == 0
+    assert describe_portion(foods[0], portions['Tilapia'], categories['Tilapia']).endswith(
+        f"x 25 g ({portions['Tilapia']:.0f} g)")
@@ -0,0 +1,46 @@
+import pytest
+
+from spelling_index import SpellingIndex, edit_distance
+
+VOCABULARY = ['quinoa', 'broccoli', 'fillet', 'berries', 'taco', 'chicken', 'breast', 'spinach', 'rice', 'brown']
+
+
+@pytest.fixture
+def index():
+    return SpellingIndex(VOCABULARY)
+
+
+@pytest.mark.parametrize('typo, expected', [
+    ('quinao', 'quinoa'),
+    ('brocoli', 'broccoli'),
+    ('chiken breast', 'chicken breast'),
+    ('spinnach', 'spinach')
+])
+def test_corrects_typos(index, typo, expected):
+    result = index.correct(typo)
+    assert result['changed']
+    assert result['corrected'] == expected
+
+
+@pytest.mark.parametrize('word', ['millet', 'cherries', 'taro'])
+def test_leaves_valid_foods_missing_from_the_vocabulary(index, word):
+    assert not index.correct(word)['changed']
+
+
+def test_known_words_and_numbers_pass_through(index):
+    result = index.correct('2% brown rice')
+    assert not result['changed']
+    assert result['corrected'] == '2% brown rice'
+    assert result['confidence'] == 1.0
+
+
+def test_short_words_get_one_edit_only(index):
+    # Two edits from "broccoli" would be allowed for an 8-letter word, not a 7-letter one
+    assert index.lookup('brocli')[0] == 'brocli'
+    assert index.lookup('brocolli')[0] == 'broccoli'
+
+
+def test_edit_distance_counts_transpositions_once():
+    assert edit_distance('quinao', 'quinoa', 2) == 1
+    assert edit_distance('taro', 'taco', 2) == 1
+    assert edit_distance('millet', 'fillet', 0) == 1
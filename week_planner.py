@@ -0,0 +1,65 @@
+"""
+Plan a whole week of DIY meals in one action.
+
+Food selections come from one template day or a rotation of days. Every
+day's per-meal targets come from the precomputed meal distribution tables,
+and all of the week's portion problems are solved in one vectorized batch.
+"""
+
+import time
+from typing import Dict, List
+
+from meal_distribution import MACRO_KEYS, get_day_meal_targets
+from portion_optimizer import optimize_portions_batch
+from selected_foods import MEAL_SOURCE_KEYS, SelectedFoodRegistry, meal_selection
+
+
+def rotate_meal_plan(templates: List[Dict], days: List[str], total_meals: int) -> Dict:
+    """
+    Meal plan for days from a rotation of template days
+
+    Day i copies templates[i % len(templates)]; meals a template lacks start empty.
+    """
+    meal_plan = {}
+    for index, day in enumerate(days):
+        template = templates[index % len(templates)] if templates else {}
+        meal_plan[day] = {
+            meal_num: {key: list(template.get(meal_num, {}).get(key, [])) for key in MEAL_SOURCE_KEYS}
+            for meal_num in range(1, total_meals + 1)
+        }
+    return meal_plan
+
+
+def plan_week(meal_plan: Dict, day_targets: Dict, day_slots: Dict, total_meals: int,
+              registry: SelectedFoodRegistry) -> Dict:
+    """
+    Portions for every meal of a week in one batched solve
+
+    Parameters:
+    - meal_plan: day -> meal_num -> *_sources lists (e.g. from rotate_meal_plan)
+    - day_targets: day -> daily calories/protein/carbs/fat; days without targets keep default portions
+    - day_slots: day -> training slot for the meal distribution
+
+    Returns:
+    - Dict with 'portions' ({(day, meal_num): {food name: grams}}, foods in slider order),
+      'meals' (problems solved) and 'solve_seconds'
+    """
+    keys = []
+    meals = []
+    for day, day_meals in meal_plan.items():
+        meal_targets = get_day_meal_targets(day_targets.get(day, {}), day_slots.get(day), total_meals)
+        for meal_num in sorted(day_meals):
+            foods = registry.foods_for(meal_selection(day_meals[meal_num]))
+            if foods and meal_num <= total_meals:
+                keys.append((day, meal_num))
+                meals.append((foods, dict(zip(MACRO_KEYS, meal_targets[meal_num - 1].tolist()))))
+
+    start = time.perf_counter()
+    portions = optimize_portions_batch(meals)
+    solve_seconds = time.perf_counter() - start
+
+    return {
+        'portions': dict(zip(keys, portions)),
+        'meals': len(meals),
+        'solve_seconds': solve_seconds
+    }